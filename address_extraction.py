@@ -0,0 +1,267 @@
+import os
+import re
+import threading
+import time
+from functools import lru_cache
+
+from emailbison_client import EMAILBISON_DOMAIN, get_emailbison_client
+
+# Custom variable name patterns per address component (international support)
+STREET_PATTERNS = [
+    'street', 'address', 'street_address', 'street address',
+    'addr', 'location', 'road', 'avenue', 'ave', 'blvd', 'boulevard',
+    'drive', 'dr', 'lane', 'ln', 'way', 'st', 'place', 'pl',
+    'strasse', 'rue', 'calle', 'via', 'gasse', 'straat', 'ulica',
+    'adresse', 'direccion', 'indirizzo', 'adres', 'endereco'
+]
+
+CITY_PATTERNS = [
+    'city', 'town', 'municipality', 'municipal', 'locality',
+    'community', 'village', 'borough', 'township', 'stadt',
+    'ville', 'ciudad', 'citta', 'stad', 'cidade', 'miasto'
+]
+
+STATE_PATTERNS = [
+    'state', 'province', 'region', 'territory', 'county',
+    'district', 'area', 'zone', 'land', 'bundesland', 'departement',
+    'provincia', 'regione', 'provincie', 'estado', 'canton'
+]
+
+ZIP_PATTERNS = [
+    'zip', 'zip_code', 'zipcode', 'postal', 'postal_code',
+    'postal code', 'postcode', 'post_code', 'code',
+    'zip code', 'postalcode', 'plz', 'cp', 'codigo postal',
+    'codice postale', 'postnummer'
+]
+
+# Abbreviations and common words that only count as a whole word ("st" but not "state"/"first",
+# "road" but not "broadcast"); every other pattern matches anywhere ("billingcity", "homestate")
+WHOLE_WORD_PATTERNS = {'st', 'dr', 'ln', 'pl', 'ave', 'way', 'rue', 'via', 'cp', 'plz', 'code', 'area', 'zone', 'land',
+                       'road', 'lane', 'drive', 'place', 'stad'}
+
+# When a name matches several components ("address_city"), the more specific one wins
+FIELD_PRIORITY = ('zip', 'city', 'state', 'street')
+
+# Workspace custom variable definitions are re-read from EmailBison this often
+CUSTOM_VARIABLE_ROLES_REFRESH_HOURS = int(os.environ.get('CUSTOM_VARIABLE_ROLES_REFRESH_HOURS', '6'))
+# Processes reload the stored mapping this often, picking up refreshes made elsewhere
+CUSTOM_VARIABLE_ROLES_RELOAD_SECONDS = 300
+
+CAMEL_CASE_BOUNDARY = re.compile(r'([a-z0-9])([A-Z])')
+NAME_SEPARATORS = re.compile(r'[\s_\-.]+')
+
+def _build_classifier():
+    """
+    One regex over all patterns, each alternative tagging its field. It is a lookahead, so
+    finditer tries every position and overlapping names ("companyaddresscity") all match.
+    """
+    alternatives = []
+    for field, patterns in (('street', STREET_PATTERNS), ('city', CITY_PATTERNS),
+                            ('state', STATE_PATTERNS), ('zip', ZIP_PATTERNS)):
+        for pattern in set(patterns):
+            # Names are normalized to single-space separated words before matching
+            words = re.escape(NAME_SEPARATORS.sub(' ', pattern))
+            if pattern in WHOLE_WORD_PATTERNS:
+                words = rf'(?<![a-z]){words}(?![a-z])'
+            alternatives.append((len(pattern), f'(?P<{field}_{len(alternatives)}>{words})'))
+    # Longest alternative first so "postal_code" is tried before "postal" and "code"
+    alternatives.sort(key=lambda alternative: -alternative[0])
+    return re.compile(r'(?=' + '|'.join(pattern for _, pattern in alternatives) + ')')
+
+ADDRESS_FIELD_CLASSIFIER = _build_classifier()
+
+@lru_cache(maxsize=4096)
+def classify_variable_name(name):
+    """
+    Address component ('street', 'city', 'state' or 'zip') a custom variable name refers to,
+    or None. Memoized: campaigns reuse a handful of variable names across thousands of leads.
+    """
+    normalized = NAME_SEPARATORS.sub(' ', CAMEL_CASE_BOUNDARY.sub(r'\1 \2', name).lower()).strip()
+    fields = {match.lastgroup.split('_')[0] for match in ADDRESS_FIELD_CLASSIFIER.finditer(normalized)}
+    for field in FIELD_PRIORITY:
+        if field in fields:
+            return field
+    return None
+
+# {variable name: role or None} from custom_variable_roles; names not in it fall back to classify_variable_name
+_variable_roles = {}
+_variable_roles_loaded_at = None
+_variable_roles_lock = threading.Lock()
+
+def variable_role(name):
+    """Address role of a custom variable: the workspace mapping when the name is known, else the name heuristics"""
+    role = _variable_roles.get(name, False)
+    if role is False:
+        return classify_variable_name(name)
+    return role
+
+def definition_role(definition):
+    """Address role for an /api/custom-variables definition, from its name and then its label"""
+    return classify_variable_name(definition.get('name') or '') or classify_variable_name(definition.get('label') or '')
+
+def load_custom_variable_roles(db_manager, force=False):
+    """Load the stored name → role mapping into this process (at most every CUSTOM_VARIABLE_ROLES_RELOAD_SECONDS)"""
+    global _variable_roles, _variable_roles_loaded_at
+    with _variable_roles_lock:
+        if (not force and _variable_roles_loaded_at is not None
+                and time.monotonic() - _variable_roles_loaded_at < CUSTOM_VARIABLE_ROLES_RELOAD_SECONDS):
+            return len(_variable_roles)
+        try:
+            rows = db_manager.execute_query("SELECT name, role FROM custom_variable_roles")
+            _variable_roles = {name: role for name, role in rows}
+        except Exception as e:
+            print(f"Error loading custom variable roles: {e}")
+        _variable_roles_loaded_at = time.monotonic()
+        return len(_variable_roles)
+
+def refresh_custom_variable_roles(db_manager, force=False):
+    """
+    Re-read the workspace's custom variable definitions from EmailBison and store each
+    one's address role, when the stored mapping is older than CUSTOM_VARIABLE_ROLES_REFRESH_HOURS.
+    Rows with role_source = 'manual' keep their role. Returns the number of definitions stored.
+    """
+    try:
+        if not force:
+            rows = db_manager.execute_query("""
+                SELECT COALESCE(MAX(refreshed_at) < NOW() - make_interval(hours => %s), true)
+                FROM custom_variable_roles
+            """, (CUSTOM_VARIABLE_ROLES_REFRESH_HOURS,))
+            if rows and not rows[0][0]:
+                load_custom_variable_roles(db_manager)
+                return 0
+
+        response = get_emailbison_client().get(f'{EMAILBISON_DOMAIN}/api/custom-variables', timeout=10)
+        response.raise_for_status()
+        definitions = [definition for definition in response.json().get('data', []) if definition.get('name')]
+        if not definitions:
+            print("No custom variable definitions returned, keeping the stored roles")
+            return 0
+
+        rows = [(definition['name'], definition.get('id'), definition.get('label'), definition_role(definition))
+                for definition in definitions]
+        db_manager.bulk_upsert("""
+            INSERT INTO custom_variable_roles (name, variable_id, label, role, refreshed_at)
+            VALUES %s
+            ON CONFLICT (name) DO UPDATE SET
+                variable_id = EXCLUDED.variable_id,
+                label = EXCLUDED.label,
+                role = CASE WHEN custom_variable_roles.role_source = 'manual'
+                            THEN custom_variable_roles.role ELSE EXCLUDED.role END,
+                refreshed_at = NOW()
+        """, rows, template='(%s, %s, %s, %s, NOW())')
+        # Variables deleted from the workspace fall back to the name heuristics
+        db_manager.execute_query(
+            "DELETE FROM custom_variable_roles WHERE role_source = 'inferred' AND NOT (name = ANY(%s))",
+            ([row[0] for row in rows],)
+        )
+
+        address_count = sum(1 for row in rows if row[3])
+        print(f"Refreshed custom variable roles: {len(rows)} variables, {address_count} address fields")
+        load_custom_variable_roles(db_manager, force=True)
+        return len(rows)
+    except Exception as e:
+        print(f"Error refreshing custom variable roles: {e}")
+        return 0
+
+def _clean_variables(custom_vars):
+    """[(name, value)] for custom variables with a non-empty name and value"""
+    cleaned = []
+    for var in custom_vars:
+        var_name = var.get('name', '') or ''
+        var_value = (var.get('value', '') or '').strip()
+        if not var_name or not var_value or var_value == 'None':
+            continue
+        cleaned.append((var_name, var_value))
+    return cleaned
+
+def extract_address_from_custom_variables(custom_vars):
+    """
+    Extract address components from custom variables with flexible naming.
+    Handles different variable names across campaigns but always finds:
+    - Street address (street, address, street_address, etc.)
+    - City (city, town, municipality, etc.)
+    - State (state, province, region, etc.)
+    - Zip/Postal code (zip, zip_code, postal_code, postal code, etc.)
+    """
+    if not isinstance(custom_vars, list):
+        return None, None, None, None
+
+    variables = _clean_variables(custom_vars)
+    found = {}
+    for var_name, var_value in variables:
+        field = variable_role(var_name)
+        # Take the first match for each component
+        if field and field not in found:
+            found[field] = var_value
+
+    address, city, state, zip_code = (found.get(field) for field in ('street', 'city', 'state', 'zip'))
+
+    # If we still don't have all components, try to infer from remaining variables
+    if not address or not city or not state or not zip_code:
+        names_by_value = {}
+        for var_name, var_value in variables:
+            names_by_value.setdefault(var_value, set()).add(var_name.lower().strip())
+        assigned_names = set()
+        for value in (address, city, state, zip_code):
+            assigned_names.update(names_by_value.get(value, ()))
+
+        for var_name, var_value in variables:
+            # Skip if already assigned
+            if var_name.lower().strip() in assigned_names:
+                continue
+
+            # Try to infer based on value patterns (international support)
+            has_digit = any(char.isdigit() for char in var_value)
+            if not address and len(var_value) > 10 and has_digit:
+                # Looks like a street address (longer text with numbers)
+                address = var_value
+            elif not city and 3 < len(var_value) < 50 and not has_digit:
+                # Looks like a city name (medium length, no numbers)
+                city = var_value
+            elif not state and ((len(var_value) == 2 and var_value.isupper()) or 3 < len(var_value) < 20):
+                # Looks like a state/province (2 uppercase letters or medium length text)
+                state = var_value
+            elif not zip_code and (
+                (len(var_value) == 5 and var_value.isdigit()) or  # US ZIP
+                (len(var_value) == 10 and var_value.replace('-', '').isdigit()) or  # US ZIP+4
+                (len(var_value) == 6 and var_value.replace(' ', '').isalnum()) or  # Canadian postal
+                (len(var_value) == 4 and var_value.isdigit()) or  # Some European postal codes
+                (len(var_value) == 5 and var_value.replace(' ', '').isalnum())  # Mixed postal codes
+            ):
+                # Looks like a postal code (various international formats)
+                zip_code = var_value
+            else:
+                continue
+            assigned_names.update(names_by_value.get(var_value, ()))
+
+    return address, city, state, zip_code
+
+def benchmark(lead_count=50000):
+    """Time extraction over synthetic leads shaped like EmailBison custom_variables"""
+    import random
+
+    name_sets = [
+        ['Street Address', 'City', 'State', 'Zip Code', 'Company Size', 'Industry'],
+        ['address', 'town', 'province', 'postal_code', 'first_line', 'linkedin_url'],
+        ['streetAddress', 'billingCity', 'region', 'postcode', 'headcount', 'website'],
+        ['Adresse', 'Ville', 'Departement', 'Code Postal', 'Secteur', 'Effectif'],
+        ['custom_1', 'custom_2', 'custom_3', 'custom_4', 'notes', 'source']
+    ]
+    values = ['1200 Main St Suite 4', 'Austin', 'TX', '78701', '51-200', 'Software']
+    rng = random.Random(0)
+    leads = [
+        [{'name': name, 'value': value} for name, value in zip(rng.choice(name_sets), values)]
+        for _ in range(lead_count)
+    ]
+
+    classify_variable_name.cache_clear()
+    started = time.perf_counter()
+    for custom_vars in leads:
+        extract_address_from_custom_variables(custom_vars)
+    elapsed = time.perf_counter() - started
+    print(f"{lead_count} leads in {elapsed:.2f}s ({elapsed / lead_count * 1e6:.1f} us/lead), "
+          f"name cache: {classify_variable_name.cache_info()}")
+    return elapsed
+
+if __name__ == '__main__':
+    benchmark()
@@ -1,21 +1,66 @@
-from flask import Flask, render_template, jsonify
+from flask import Flask, render_template, jsonify, request, g
 import os
+import json
+import base64
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
 import random
-import requests
 from collections import Counter
-from supabase_manager_postgres_backup import get_db_manager, get_sync_manager
+from supabase_manager_postgres_backup import get_db_manager, get_sync_manager, start_query_count
+from emailbison_client import EMAILBISON_DOMAIN, get_emailbison_client
+from ttl_cache import TTLCache
+from address_extraction import definition_role
+from geocoding import build_lead_address, enqueue_geocode_jobs, geocode_queue_progress
 
 app = Flask(__name__)
 
-# EmailBison API configuration (kept for manual sync if needed)
-EMAILBISON_API_KEY = os.environ.get('EMAILBISON_API_KEY', '5|LJwTR33haOeU6bSlBGU08roquoklOlZg3CsNgEMtdd040014')
-EMAILBISON_DOMAIN = os.environ.get('EMAILBISON_DOMAIN', 'https://send.longrun.agency')
-EMAILBISON_HEADERS = {
-    'Authorization': f'Bearer {EMAILBISON_API_KEY}',
-    'Content-Type': 'application/json',
-    'Accept': 'application/json'
-}
+# Syncing and geocoding run in the worker process (worker.py); web processes only read and
+# leave refresh hints. Set for single-process hosting so the web process runs them itself.
+RUN_SYNC_IN_WEB = os.environ.get('RUN_SYNC_IN_WEB', 'false').lower() in ('1', 'true', 'yes')
+if RUN_SYNC_IN_WEB:
+    get_sync_manager().start_background_sync()
+
+# Dashboard loads older than this ask the background sync for a refresh
+DASHBOARD_REFRESH_AFTER_SECONDS = int(os.environ.get('DASHBOARD_REFRESH_AFTER_SECONDS', '120'))
+
+# Computed dashboard payloads, shared by every browser viewing the same range.
+# Keys include the sync data generation, so a finished sync makes older entries unreachable.
+DASHBOARD_CACHE_TTL_SECONDS = int(os.environ.get('DASHBOARD_CACHE_TTL_SECONDS', '300'))
+DASHBOARD_CACHE_MAX_ENTRIES = int(os.environ.get('DASHBOARD_CACHE_MAX_ENTRIES', '64'))
+dashboard_cache = TTLCache(maxsize=DASHBOARD_CACHE_MAX_ENTRIES, ttl=DASHBOARD_CACHE_TTL_SECONDS)
+
+# Upper bound on one dashboard computation; sections still running after it are dropped
+DASHBOARD_DEADLINE_SECONDS = float(os.environ.get('DASHBOARD_DEADLINE_SECONDS', '8'))
+
+# EmailBison workspace responses for ranges that include today are reused for this long;
+# ranges that ended before yesterday are kept until the sync purges them as unread
+# (see api_response_cache and API_CACHE_RETENTION_DAYS)
+API_CACHE_TTL_SECONDS = int(os.environ.get('API_CACHE_TTL_SECONDS', '300'))
+
+# Per-campaign stats fallback: concurrent EmailBison calls, statuses whose stats are frozen,
+# and how long a frozen campaign's stats for a range reaching today are reused
+REALTIME_METRICS_WORKERS = int(os.environ.get('REALTIME_METRICS_WORKERS', '8'))
+FROZEN_CAMPAIGN_STATUSES = {'finished', 'completed', 'paused'}
+FROZEN_CAMPAIGN_CACHE_TTL_SECONDS = int(os.environ.get('FROZEN_CAMPAIGN_CACHE_TTL_SECONDS', '86400'))
+
+# Marks an input a dashboard helper should fetch itself (None already means "fetched, unavailable")
+NOT_FETCHED = object()
+
+@app.before_request
+def count_db_queries():
+    g.db_query_counter = start_query_count()
+
+@app.after_request
+def report_db_queries(response):
+    """Expose the number of database round trips a request made (X-DB-Queries header)"""
+    counter = getattr(g, 'db_query_counter', None)
+    if counter is not None:
+        response.headers['X-DB-Queries'] = str(counter.count)
+        if request.path.startswith('/api/'):
+            print(f"{request.path}: {counter.count} DB queries")
+    return response
 
 @app.route('/')
 def index():
@@ -140,62 +185,143 @@ def get_campaign_detail(campaign_id):
             'campaign': None
         })
 
+# Keyset pagination: cursors are opaque tokens wrapping the sort key of the last row served
+REPLY_PAGE_DEFAULT_LIMIT = 25
+REPLY_PAGE_MAX_LIMIT = 100
+
+def encode_cursor(values):
+    """Pack a row's sort key into an opaque, URL-safe cursor token"""
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode()).decode().rstrip('=')
+
+def decode_cursor(token, length):
+    """Unpack a cursor token from encode_cursor; raises ValueError if it is malformed"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {token}") from e
+    if not isinstance(values, list) or len(values) != length:
+        raise ValueError(f"Invalid cursor: {token}")
+    return values
+
+def get_page_limit(default=REPLY_PAGE_DEFAULT_LIMIT, maximum=REPLY_PAGE_MAX_LIMIT):
+    """Page size from the limit query parameter, clamped to [1, maximum]"""
+    return min(maximum, max(1, request.args.get('limit', default, type=int)))
+
+# Replies sort newest first on (received_at, id); unparseable dates sort last via -infinity.
+# The same expression backs idx_replies_feed and idx_replies_campaign_feed (migrations/0007).
+REPLY_SORT_KEY = "COALESCE({r}.received_at, '-infinity'::timestamptz)"
+
+def fetch_reply_page(conditions, params, cursor=None, limit=REPLY_PAGE_DEFAULT_LIMIT, latest_per_lead=False):
+    """
+    One page of non-automated replies matching ``conditions``, newest first.
+    
+    Conditions reference the replies table as {r}. Returns (replies, next_cursor);
+    next_cursor is None on the last page. With latest_per_lead only each lead's most
+    recent matching reply is listed.
+    """
+    conditions = ['{r}.automated_reply = false'] + list(conditions)
+    params = list(params)
+    sort_key = REPLY_SORT_KEY.format(r='r')
+    
+    where = [condition.format(r='r') for condition in conditions]
+    if latest_per_lead:
+        newer_conditions = ' AND '.join(condition.format(r='newer') for condition in conditions)
+        where.append(f"""NOT EXISTS (
+            SELECT 1 FROM replies newer
+            WHERE newer.lead_id = r.lead_id AND {newer_conditions}
+            AND ({REPLY_SORT_KEY.format(r='newer')}, newer.id) > ({sort_key}, r.id)
+        )""")
+        params = params * 2
+    
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor, 2)
+        where.append(f"({sort_key}, r.id) < (%s::timestamptz, %s)")
+        params.extend([sort_value, last_id])
+    
+    db_manager = get_db_manager()
+    rows = db_manager.execute_query(f"""
+        SELECT r.id, {sort_key}::text, r.reply_uuid, r.lead_id, r.campaign_id, r.date_received,
+               r.interested, r.automated_reply, r.subject, r.content, r.sender_email,
+               l.first_name, l.last_name, l.email, l.title, l.company,
+               c.name as campaign_name
+        FROM replies r
+        LEFT JOIN leads l ON r.lead_id = l.id
+        LEFT JOIN campaigns c ON r.campaign_id = c.id
+        WHERE {' AND '.join(where)}
+        ORDER BY {sort_key} DESC, r.id DESC
+        LIMIT %s
+    """, tuple(params) + (limit + 1,))
+    
+    replies = []
+    for reply in rows[:limit]:
+        replies.append({
+            'reply_uuid': reply[2],
+            'lead_id': reply[3],
+            'campaign_id': reply[4],
+            'date_received': reply[5],
+            'interested': bool(reply[6]),
+            'automated_reply': bool(reply[7]),
+            'subject': reply[8],
+            'content': reply[9],
+            'sender_email': reply[10],
+            'lead_name': f"{reply[11] or ''} {reply[12] or ''}".strip(),
+            'lead_email': reply[13],
+            'lead_title': reply[14],
+            'lead_company': reply[15],
+            'campaign_name': reply[16]
+        })
+    
+    # The extra row fetched past the limit tells us whether another page exists
+    next_cursor = encode_cursor([rows[limit - 1][1], rows[limit - 1][0]]) if len(rows) > limit else None
+    return replies, next_cursor
+
 @app.route('/api/campaign/<int:campaign_id>/replies')
 def get_campaign_replies(campaign_id):
-    """Get replies for a specific campaign from database"""
+    """
+    Get replies for a specific campaign from database, one page at a time.
+    
+    The "all" tab lists each lead's latest reply; "positive" lists every interested reply.
+    Pass tab and the previous response's next_cursor to fetch the following page of one
+    tab. Without a cursor both tabs' first pages and the totals are returned.
+    """
     try:
-        # Fetch replies from database
-        db_manager = get_db_manager()
-        replies = db_manager.execute_query("""
-            SELECT r.reply_uuid, r.lead_id, r.date_received, r.interested, r.automated_reply, 
-                   r.subject, r.content, r.sender_email,
-                   l.first_name, l.last_name, l.email, l.title, l.company
-            FROM replies r
-            LEFT JOIN leads l ON r.lead_id = l.id
-            WHERE r.campaign_id = %s
-            AND r.automated_reply = false
-            ORDER BY r.date_received DESC
-        """, (campaign_id,))
-        
-        # Process ALL replies without deduplication
-        all_replies_list = []
-        for reply in replies:
-            all_replies_list.append({
-                'reply_uuid': reply[0],
-                'lead_id': reply[1],
-                'date_received': reply[2],
-                'interested': bool(reply[3]),
-                'automated_reply': bool(reply[4]),
-                'subject': reply[5],
-                'content': reply[6],
-                'sender_email': reply[7],
-                'lead_name': f"{reply[8] or ''} {reply[9] or ''}".strip(),
-                'lead_email': reply[10],
-                'lead_title': reply[11],
-                'lead_company': reply[12]
-            })
-        
-        # Process replies for "All" tab - deduplicate by lead_id, keeping latest reply
-        deduplicated_replies = {}
-        for reply_data in all_replies_list:
-            lead_id = reply_data['lead_id']
-            if lead_id not in deduplicated_replies:
-                deduplicated_replies[lead_id] = reply_data
-        
-        deduplicated_list = list(deduplicated_replies.values())
-        deduplicated_list.sort(key=lambda x: x['date_received'], reverse=True)
-        
-        # Separate positive replies - NO deduplication
-        positive_replies = [r for r in all_replies_list if r['interested']]
+        tab = request.args.get('tab')
+        cursor = request.args.get('cursor')
+        if cursor and tab not in ('all', 'positive'):
+            raise ValueError("cursor requires tab=all or tab=positive")
+        limit = get_page_limit()
         
-        return jsonify({
+        result = {
             'success': True,
-            'all_replies': deduplicated_list,
-            'positive_replies': positive_replies,
-            'total_replies': len(deduplicated_list),
-            'positive_count': len(positive_replies)
-        })
+            'all_replies': [],
+            'positive_replies': [],
+            'next_cursor': {'all': None, 'positive': None}
+        }
         
+        if tab in (None, 'all'):
+            result['all_replies'], result['next_cursor']['all'] = fetch_reply_page(
+                ['{r}.campaign_id = %s'], [campaign_id], cursor=cursor, limit=limit, latest_per_lead=True
+            )
+        if tab in (None, 'positive'):
+            result['positive_replies'], result['next_cursor']['positive'] = fetch_reply_page(
+                ['{r}.campaign_id = %s', '{r}.interested = true'], [campaign_id], cursor=cursor, limit=limit
+            )
+        
+        # Totals only come with the first page; later pages stay constant-time
+        if not cursor:
+            db_manager = get_db_manager()
+            counts = db_manager.execute_query("""
+                SELECT COUNT(DISTINCT lead_id), COUNT(*) FILTER (WHERE interested)
+                FROM replies
+                WHERE campaign_id = %s AND automated_reply = false
+            """, (campaign_id,))
+            result['total_replies'] = counts[0][0] if counts else 0
+            result['positive_count'] = counts[0][1] if counts else 0
+        
+        return jsonify(result)
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         print(f"Error fetching campaign replies: {e}")
         return jsonify({
@@ -209,91 +335,39 @@ def get_campaign_replies(campaign_id):
 
 @app.route('/api/recent-activity')
 def get_recent_activity():
-    """Get recent replies activity across all campaigns from database"""
+    """
+    Get recent replies activity across all campaigns from database.
+    
+    "All" lists each lead's latest reply, "positive" every interested reply, 10 per page.
+    Pass tab and the previous response's next_cursor for older activity.
+    """
     try:
-        db_manager = get_db_manager()
-        
-        # Fetch recent replies for "All" tab - deduplicated by lead_id
-        all_replies_raw = db_manager.execute_query("""
-            SELECT r.reply_uuid, r.lead_id, r.campaign_id, r.date_received, r.interested, 
-                   r.subject, r.content, r.sender_email,
-                   l.first_name, l.last_name, l.email, l.title, l.company,
-                   c.name as campaign_name
-            FROM replies r
-            LEFT JOIN leads l ON r.lead_id = l.id
-            LEFT JOIN campaigns c ON r.campaign_id = c.id
-            WHERE r.automated_reply = false
-            ORDER BY r.date_received DESC
-            LIMIT 20
-        """)
+        tab = request.args.get('tab')
+        cursor = request.args.get('cursor')
+        if cursor and tab not in ('all', 'positive'):
+            raise ValueError("cursor requires tab=all or tab=positive")
+        limit = get_page_limit(default=10)
         
-        # Process replies for "All" tab - deduplicate by lead_id, keeping latest reply
-        processed_all_replies = {}
-        for reply in all_replies_raw:
-            lead_id = reply[1]
-            if lead_id not in processed_all_replies:
-                processed_all_replies[lead_id] = {
-                    'reply_uuid': reply[0],
-                    'lead_id': lead_id,
-                    'campaign_id': reply[2],
-                    'date_received': reply[3],
-                    'interested': bool(reply[4]),
-                    'subject': reply[5],
-                    'content': reply[6],
-                    'sender_email': reply[7],
-                    'lead_name': f"{reply[8] or ''} {reply[9] or ''}".strip(),
-                    'lead_email': reply[10],
-                    'lead_title': reply[11],
-                    'lead_company': reply[12],
-                    'campaign_name': reply[13]
-                }
-        
-        # Convert to list and sort by date
-        all_replies_list = list(processed_all_replies.values())
-        all_replies_list.sort(key=lambda x: x['date_received'], reverse=True)
-        
-        # Get latest 10 replies for "All" tab
-        latest_replies = all_replies_list[:10]
-        
-        # Fetch positive replies for "Positive" tab - NO deduplication, just last 10
-        positive_replies_raw = db_manager.execute_query("""
-            SELECT r.reply_uuid, r.lead_id, r.campaign_id, r.date_received, r.interested, 
-                   r.subject, r.content, r.sender_email,
-                   l.first_name, l.last_name, l.email, l.title, l.company,
-                   c.name as campaign_name
-            FROM replies r
-            LEFT JOIN leads l ON r.lead_id = l.id
-            LEFT JOIN campaigns c ON r.campaign_id = c.id
-            WHERE r.automated_reply = false AND r.interested = true
-            ORDER BY r.date_received DESC
-            LIMIT 10
-        """)
+        result = {
+            'success': True,
+            'all_replies': [],
+            'positive_replies': [],
+            'next_cursor': {'all': None, 'positive': None}
+        }
         
-        # Process positive replies - NO deduplication
-        positive_replies = []
-        for reply in positive_replies_raw:
-            positive_replies.append({
-                'reply_uuid': reply[0],
-                'lead_id': reply[1],
-                'campaign_id': reply[2],
-                'date_received': reply[3],
-                'interested': bool(reply[4]),
-                'subject': reply[5],
-                'content': reply[6],
-                'sender_email': reply[7],
-                'lead_name': f"{reply[8] or ''} {reply[9] or ''}".strip(),
-                'lead_email': reply[10],
-                'lead_title': reply[11],
-                'lead_company': reply[12],
-                'campaign_name': reply[13]
-            })
+        if tab in (None, 'all'):
+            result['all_replies'], result['next_cursor']['all'] = fetch_reply_page(
+                [], [], cursor=cursor, limit=limit, latest_per_lead=True
+            )
+        if tab in (None, 'positive'):
+            result['positive_replies'], result['next_cursor']['positive'] = fetch_reply_page(
+                ['{r}.interested = true'], [], cursor=cursor, limit=limit
+            )
         
-        return jsonify({
-            'success': True,
-            'all_replies': latest_replies,
-            'positive_replies': positive_replies
-        })
+        return jsonify(result)
         
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         print(f"Error fetching recent activity: {e}")
         import traceback
@@ -321,23 +395,19 @@ def get_dashboard_data():
         # Calculate date range
         date_range = calculate_date_range(timeframe, start_date, end_date)
         
-        # Sync leads from EmailBison API for the selected timeframe
-        print(f"Syncing leads for timeframe: {timeframe}")
-        synced_leads = sync_leads_for_timeframe(timeframe, start_date, end_date)
-        
-        # Fetch data from database
-        leads_data = fetch_leads_from_db()
-        campaigns_data = fetch_campaigns_from_db()
+        # Serve what is already in the database; ask the background sync to refresh if it is stale
+        data_freshness = get_data_freshness()
+        queue_refresh_if_stale(data_freshness)
         
-        # Process the data with time filtering
-        metrics = calculate_metrics_from_db(leads_data, campaigns_data, date_range)
-        chart_data = generate_chart_data_from_db(leads_data, campaigns_data, date_range)
+        metrics, chart_data, timed_out_sections, failed_sections = get_dashboard_payload(timeframe, date_range, data_freshness)
         
         data = {
             'metrics': metrics,
             'chart_data': chart_data,
             'timeframe_label': date_range['label'],
-            'synced_leads_count': len(synced_leads)
+            'data_freshness': data_freshness,
+            'timed_out_sections': timed_out_sections,
+            'failed_sections': failed_sections
         }
         return jsonify(data)
     except Exception as e:
@@ -361,7 +431,7 @@ def get_dashboard_data():
                 'lead_sources': generate_source_data()
             },
             'timeframe_label': 'Last 7 Days',
-            'synced_leads_count': 0
+            'data_freshness': None
         }
         return jsonify(data)
 
@@ -388,19 +458,15 @@ def get_custom_timeframe_data():
         
         print(f"Processing custom timeframe: {date_range['label']}")
         
-        # Fetch data from database
-        leads_data = fetch_leads_from_db()
-        campaigns_data = fetch_campaigns_from_db()
-        
-        # Process the data with time filtering
-        metrics = calculate_metrics_from_db(leads_data, campaigns_data, date_range)
-        chart_data = generate_chart_data_from_db(leads_data, campaigns_data, date_range)
+        metrics, chart_data, timed_out_sections, failed_sections = get_dashboard_payload('custom', date_range, get_data_freshness())
         
         data = {
             'success': True,
             'metrics': metrics,
             'chart_data': chart_data,
-            'timeframe_label': date_range['label']
+            'timeframe_label': date_range['label'],
+            'timed_out_sections': timed_out_sections,
+            'failed_sections': failed_sections
         }
         return jsonify(data)
         
@@ -426,12 +492,150 @@ def get_custom_timeframe_data():
                 'reply_status': {'labels': [], 'values': []},
                 'leads_by_title': {'labels': [], 'values': []},
                 'leads_by_location': {'labels': [], 'values': []},
-                'campaign_performance': {'labels': [], 'rates': [], 'positive_counts': [], 'contacted_counts': []},
-                'map_locations': []
+                'campaign_performance': {'labels': [], 'rates': [], 'positive_counts': [], 'contacted_counts': []}
             },
             'timeframe_label': 'Custom Range'
         })
 
+def get_dashboard_payload(timeframe, date_range, data_freshness):
+    """
+    Return (metrics, chart_data, timed_out_sections, failed_sections) for a date range.
+    
+    Complete results are computed at most once per sync generation; partial results
+    (some section missed the deadline or failed and fell back) are returned but never cached.
+    """
+    def compute():
+        chart_range = resolve_chart_date_range(date_range)
+        started = time.monotonic()
+        
+        # Independent upstream calls and DB aggregations run side by side.
+        # Each value is the fallback used if that section fails or misses the deadline.
+        sections = {
+            'campaigns': (lambda: fetch_campaigns_from_db(raise_errors=True), {'campaigns': []}),
+            'aggregates': (lambda: fetch_dashboard_aggregates(chart_range['start'], chart_range['end'], raise_errors=True),
+                           dict(EMPTY_DASHBOARD_AGGREGATES)),
+            'workspace_stats': (lambda: fetch_workspace_stats_from_api(date_range['start'], date_range['end'],
+                                                                       raise_errors=True), None),
+            'line_chart': (lambda: fetch_workspace_line_chart_from_api(chart_range['start'], chart_range['end'],
+                                                                       raise_errors=True), None)
+        }
+        results, timed_out_sections, failed_sections = run_dashboard_sections(sections, DASHBOARD_DEADLINE_SECONDS)
+        
+        # Without workspace stats, dated ranges fall back to per-campaign stats calls. They only get
+        # what is left of the deadline: if the stats call itself was slow, they are not started at all.
+        realtime_metrics = None
+        if (results['workspace_stats'] is None and date_range['label'] != 'All Time'
+                and 'workspace_stats' not in timed_out_sections):
+            remaining = DASHBOARD_DEADLINE_SECONDS - (time.monotonic() - started)
+            if remaining > 0:
+                fallback = {
+                    'realtime_metrics': (lambda: fetch_realtime_metrics_from_api(date_range['start'], date_range['end'],
+                                                                                 raise_errors=True), None)
+                }
+                fallback_results, fallback_timed_out, fallback_failed = run_dashboard_sections(fallback, remaining)
+                realtime_metrics = fallback_results['realtime_metrics']
+                timed_out_sections += fallback_timed_out
+                failed_sections += fallback_failed
+            else:
+                timed_out_sections.append('realtime_metrics')
+        
+        metrics = calculate_metrics_from_db(
+            results['campaigns'], date_range, results['aggregates'],
+            workspace_stats=results['workspace_stats'],
+            realtime_metrics=realtime_metrics
+        )
+        chart_data = generate_chart_data_from_db(
+            results['campaigns'], chart_range, results['aggregates'],
+            line_chart_data=results['line_chart']
+        )
+        return metrics, chart_data, timed_out_sections, failed_sections
+    
+    generation = data_freshness.get('data_generation')
+    if generation is None:
+        # Sync status unavailable: without a generation we cannot tell when the entry goes stale
+        return compute()
+    
+    cache_key = (timeframe, date_range['start'], date_range['end'], generation)
+    return dashboard_cache.get_or_compute(cache_key, compute,
+                                          cache_if=lambda payload: not payload[2] and not payload[3])
+
+def run_dashboard_sections(sections, deadline):
+    """
+    Run {name: (fn, fallback)} concurrently on a request-scoped executor.
+    
+    Returns (results, timed_out, failed) where results holds every section's value, or its
+    fallback if it raised (listed in failed) or was still running at the deadline (timed_out).
+    """
+    executor = ThreadPoolExecutor(max_workers=len(sections), thread_name_prefix='dashboard')
+    # Each task runs in a copy of the request context so DB query counting still applies
+    futures = {
+        executor.submit(contextvars.copy_context().run, fn): name
+        for name, (fn, _) in sections.items()
+    }
+    done, pending = wait(futures, timeout=deadline)
+    # Don't block the response on stragglers; they finish in the background and are discarded
+    executor.shutdown(wait=False, cancel_futures=True)
+    
+    results = {}
+    failed = []
+    for future, name in futures.items():
+        results[name] = sections[name][1]
+        if future in done:
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                print(f"Dashboard section {name} failed: {e}")
+                failed.append(name)
+    
+    timed_out = sorted(futures[future] for future in pending)
+    if timed_out:
+        print(f"Dashboard sections timed out after {deadline:.1f}s: {', '.join(timed_out)}")
+    return results, timed_out, sorted(failed)
+
+def get_data_freshness():
+    """Report when the background sync last refreshed the database"""
+    try:
+        db_manager = get_db_manager()
+        status = db_manager.execute_query("""
+            SELECT last_sync, sync_in_progress,
+                   COALESCE(refresh_requested_at > last_sync, false) AS refresh_queued,
+                   EXTRACT(EPOCH FROM NOW() - last_sync) AS age_seconds,
+                   data_generation
+            FROM sync_status
+            WHERE id = 1
+        """)
+        
+        if not status:
+            return {'last_sync': None, 'age_seconds': None, 'sync_in_progress': False,
+                    'refresh_queued': False, 'data_generation': None}
+        
+        last_sync, in_progress, refresh_queued, age_seconds, data_generation = status[0]
+        return {
+            'last_sync': last_sync.isoformat() if last_sync else None,
+            'age_seconds': int(age_seconds) if age_seconds is not None else None,
+            'sync_in_progress': bool(in_progress),
+            'refresh_queued': bool(refresh_queued),
+            'data_generation': data_generation
+        }
+    except Exception as e:
+        print(f"Error reading sync status: {e}")
+        return {'last_sync': None, 'age_seconds': None, 'sync_in_progress': False,
+                'refresh_queued': False, 'data_generation': None}
+
+def queue_refresh_if_stale(data_freshness):
+    """Enqueue a background refresh hint when the data is older than DASHBOARD_REFRESH_AFTER_SECONDS"""
+    age_seconds = data_freshness.get('age_seconds')
+    if data_freshness.get('sync_in_progress') or data_freshness.get('refresh_queued'):
+        return
+    if age_seconds is not None and age_seconds < DASHBOARD_REFRESH_AFTER_SECONDS:
+        return
+    
+    try:
+        get_sync_manager().request_refresh()
+        data_freshness['refresh_queued'] = True
+    except Exception as e:
+        print(f"Error queueing data refresh: {e}")
+
 def format_date(date_string):
     """Format date string to readable format"""
     if not date_string:
@@ -517,36 +721,7 @@ def generate_source_data():
 
 # EmailBison API integration functions
 # Database functions
-def fetch_leads_from_db():
-    """Fetch leads from database"""
-    try:
-        db_manager = get_db_manager()
-        leads = db_manager.execute_query("""
-            SELECT id, email, first_name, last_name, title, company, phone, interested, created_at, updated_at
-            FROM leads
-        """)
-        
-        leads_list = []
-        for lead in leads:
-            leads_list.append({
-                'id': lead[0],
-                'email': lead[1],
-                'first_name': lead[2],
-                'last_name': lead[3],
-                'title': lead[4],
-                'company': lead[5],
-                'phone': lead[6],
-                'interested': bool(lead[7]),
-                'created_at': lead[8],
-                'updated_at': lead[9]
-            })
-        
-        return {'leads': leads_list}
-    except Exception as e:
-        print(f"Error fetching leads from database: {e}")
-        return {'leads': []}
-
-def fetch_campaigns_from_db():
+def fetch_campaigns_from_db(raise_errors=False):
     """Fetch campaigns from database"""
     try:
         db_manager = get_db_manager()
@@ -572,9 +747,12 @@ def fetch_campaigns_from_db():
         return {'campaigns': campaigns_list}
     except Exception as e:
         print(f"Error fetching campaigns from database: {e}")
+        if raise_errors:
+            raise
         return {'campaigns': []}
 
-def calculate_metrics_from_db(leads_data, campaigns_data, date_range):
+def calculate_metrics_from_db(campaigns_data, date_range, aggregates=None,
+                              workspace_stats=NOT_FETCHED, realtime_metrics=NOT_FETCHED):
     """Calculate dashboard metrics from database data"""
     campaigns_list = campaigns_data.get('campaigns', [])
     start_date = date_range['start']
@@ -588,10 +766,18 @@ def calculate_metrics_from_db(leads_data, campaigns_data, date_range):
     
     db_manager = get_db_manager()
     
+    def reply_totals():
+        """Unique replied and interested leads, from the dashboard aggregates when available"""
+        if aggregates is not None:
+            return aggregates['unique_replies'], aggregates['interested']
+        _, _, unique_replies, interested = calculate_metrics_from_replies(db_manager, start_date, end_date)
+        return unique_replies, interested
+    
     # For All Time, calculate from database with actual date range
     if date_range['label'] == 'All Time':
         # Try to get workspace stats from API first
-        workspace_stats = fetch_workspace_stats_from_api(start_date, end_date)
+        if workspace_stats is NOT_FETCHED:
+            workspace_stats = fetch_workspace_stats_from_api(start_date, end_date)
         if workspace_stats:
             total_unique_replies = workspace_stats.get('unique_replies_per_contact', 0)
             total_interested = workspace_stats.get('interested', 0)
@@ -599,14 +785,15 @@ def calculate_metrics_from_db(leads_data, campaigns_data, date_range):
             total_emails_sent = workspace_stats.get('emails_sent', 0)
         else:
             # Fallback to database calculation
-            _, _, total_unique_replies, total_interested = calculate_metrics_from_replies(db_manager, start_date, end_date)
+            total_unique_replies, total_interested = reply_totals()
             # Calculate contacted prospects from campaign data
             for campaign in campaigns_list:
                 total_prospects_contacted += campaign.get('total_leads_contacted', 0)
                 total_emails_sent += campaign.get('emails_sent', 0)
     else:
         # For specific date ranges, try to get workspace stats from API first
-        workspace_stats = fetch_workspace_stats_from_api(start_date, end_date)
+        if workspace_stats is NOT_FETCHED:
+            workspace_stats = fetch_workspace_stats_from_api(start_date, end_date)
         if workspace_stats:
             total_unique_replies = workspace_stats.get('unique_replies_per_contact', 0)
             total_interested = workspace_stats.get('interested', 0)
@@ -616,15 +803,16 @@ def calculate_metrics_from_db(leads_data, campaigns_data, date_range):
             # Fallback to individual campaign API calls
             try:
                 # Try to fetch real-time data from EmailBison API for the date range
-                real_data = fetch_realtime_metrics_from_api(start_date, end_date)
+                real_data = (fetch_realtime_metrics_from_api(start_date, end_date)
+                             if realtime_metrics is NOT_FETCHED else realtime_metrics)
                 if real_data:
                     total_prospects_contacted = real_data.get('prospects_contacted', 0)
                     total_emails_sent = real_data.get('emails_sent', 0)
                     # Still calculate replies from database even when using real-time data
-                    _, _, total_unique_replies, total_interested = calculate_metrics_from_replies(db_manager, start_date, end_date)
+                    total_unique_replies, total_interested = reply_totals()
                 else:
                     # Fallback to database calculation - get contacted from campaigns
-                    _, _, total_unique_replies, total_interested = calculate_metrics_from_replies(db_manager, start_date, end_date)
+                    total_unique_replies, total_interested = reply_totals()
                     # Calculate contacted prospects from campaign data
                     for campaign in campaigns_list:
                         total_prospects_contacted += campaign.get('total_leads_contacted', 0)
@@ -632,7 +820,7 @@ def calculate_metrics_from_db(leads_data, campaigns_data, date_range):
             except Exception as e:
                 print(f"Error fetching real-time data: {e}")
                 # Fallback to database calculation - get contacted from campaigns
-                _, _, total_unique_replies, total_interested = calculate_metrics_from_replies(db_manager, start_date, end_date)
+                total_unique_replies, total_interested = reply_totals()
                 # Calculate contacted prospects from campaign data
                 for campaign in campaigns_list:
                     total_prospects_contacted += campaign.get('total_leads_contacted', 0)
@@ -651,9 +839,13 @@ def calculate_metrics_from_db(leads_data, campaigns_data, date_range):
         'emails_sent': total_emails_sent
     }
 
-def fetch_workspace_line_chart_from_api(start_date, end_date):
+def fetch_workspace_line_chart_from_api(start_date, end_date, raise_errors=False):
     """Fetch workspace line chart data from EmailBison API for specific date range"""
     try:
+        cached = get_cached_api_response('workspace_line_chart', start_date, end_date)
+        if cached is not None:
+            return cached
+        
         print(f"Fetching workspace line chart data from Bison API for {start_date} to {end_date}")
         
         # Use the line chart stats endpoint
@@ -663,7 +855,7 @@ def fetch_workspace_line_chart_from_api(start_date, end_date):
             'end_date': end_date.strftime('%Y-%m-%d')
         }
         
-        response = requests.get(url, headers=EMAILBISON_HEADERS, params=params, timeout=10)
+        response = get_emailbison_client().get(url, params=params, timeout=10)
         response.raise_for_status()
         data = response.json()
         
@@ -685,18 +877,26 @@ def fetch_workspace_line_chart_from_api(start_date, end_date):
         
         print(f"Line chart data from Bison API: {len(replies_data)} reply days, {len(interested_data)} interested days")
         
-        return {
+        line_chart = {
             'replies': replies_data,
             'interested': interested_data
         }
+        cache_api_response('workspace_line_chart', start_date, end_date, line_chart)
+        return line_chart
         
     except Exception as e:
         print(f"Error fetching workspace line chart data: {e}")
+        if raise_errors:
+            raise
         return None
 
-def fetch_workspace_stats_from_api(start_date, end_date):
+def fetch_workspace_stats_from_api(start_date, end_date, raise_errors=False):
     """Fetch workspace stats from EmailBison API for specific date range"""
     try:
+        cached = get_cached_api_response('workspace_stats', start_date, end_date)
+        if cached is not None:
+            return cached
+        
         print(f"Fetching workspace stats from Bison API for {start_date} to {end_date}")
         
         # Use the workspace stats endpoint
@@ -706,7 +906,7 @@ def fetch_workspace_stats_from_api(start_date, end_date):
             'end_date': end_date.strftime('%Y-%m-%d')
         }
         
-        response = requests.get(url, headers=EMAILBISON_HEADERS, params=params, timeout=10)
+        response = get_emailbison_client().get(url, params=params, timeout=10)
         response.raise_for_status()
         data = response.json()
         
@@ -719,102 +919,308 @@ def fetch_workspace_stats_from_api(start_date, end_date):
         
         print(f"Workspace stats from Bison API: {unique_replies_per_contact} unique replies, {interested} interested, {total_leads_contacted} contacted, {emails_sent} emails sent")
         
-        return {
+        workspace_stats = {
             'unique_replies_per_contact': unique_replies_per_contact,
             'interested': interested,
             'total_leads_contacted': total_leads_contacted,
             'emails_sent': emails_sent
         }
+        cache_api_response('workspace_stats', start_date, end_date, workspace_stats)
+        return workspace_stats
         
     except Exception as e:
         print(f"Error fetching workspace stats: {e}")
+        if raise_errors:
+            raise
         return None
 
-def fetch_realtime_metrics_from_api(start_date, end_date):
+def api_cache_key(endpoint, start_date, end_date):
+    return f"{endpoint}:{start_date.isoformat()}:{end_date.isoformat()}"
+
+def is_closed_range(end_date):
+    """Ranges that ended before yesterday; the day of slack covers the workspace's timezone"""
+    return end_date < datetime.now().date() - timedelta(days=1)
+
+def get_cached_api_response(endpoint, start_date, end_date):
+    """Return a stored EmailBison response for this endpoint and range, or None if absent/expired"""
+    cache_key = api_cache_key(endpoint, start_date, end_date)
+    return get_cached_api_responses([cache_key]).get(cache_key)
+
+def get_cached_api_responses(cache_keys):
+    """Return {cache_key: response} for every unexpired stored response among cache_keys"""
+    if not cache_keys:
+        return {}
+    try:
+        db_manager = get_db_manager()
+        # last_read_at drives the sync's purge of unread closed ranges; it is only
+        # bumped once an hour per row so reads do not turn into a write per request
+        rows = db_manager.execute_query("""
+            WITH hits AS (
+                SELECT cache_key, response, last_read_at
+                FROM api_response_cache
+                WHERE cache_key = ANY(%s)
+                AND (expires_at IS NULL OR expires_at > NOW())
+            ), touched AS (
+                UPDATE api_response_cache
+                SET last_read_at = NOW()
+                FROM hits
+                WHERE api_response_cache.cache_key = hits.cache_key
+                AND (hits.last_read_at IS NULL OR hits.last_read_at < NOW() - INTERVAL '1 hour')
+            )
+            SELECT cache_key, response FROM hits
+        """, (list(cache_keys),))
+        return {cache_key: response for cache_key, response in rows}
+    except Exception as e:
+        print(f"Error reading API response cache: {e}")
+        return {}
+
+def cache_api_response(endpoint, start_date, end_date, response, ttl_seconds=API_CACHE_TTL_SECONDS):
+    """Store an EmailBison response (see cache_api_responses)"""
+    cache_api_responses([(endpoint, start_date, end_date, response, ttl_seconds)])
+
+def cache_api_responses(entries):
+    """
+    Store [(endpoint, start_date, end_date, response, ttl_seconds)] in one statement.
+    Closed ranges do not expire (the sync purges them once unread for
+    API_CACHE_RETENTION_DAYS); the rest expire after their ttl_seconds.
+    """
+    rows = [
+        (api_cache_key(endpoint, start_date, end_date), endpoint, start_date, end_date,
+         json.dumps(response), is_closed_range(end_date), ttl_seconds)
+        for endpoint, start_date, end_date, response, ttl_seconds in entries
+    ]
+    try:
+        db_manager = get_db_manager()
+        db_manager.bulk_upsert("""
+            INSERT INTO api_response_cache (cache_key, endpoint, start_date, end_date, response, fetched_at, expires_at, last_read_at)
+            VALUES %s
+            ON CONFLICT (cache_key) DO UPDATE SET
+                response = EXCLUDED.response,
+                fetched_at = EXCLUDED.fetched_at,
+                expires_at = EXCLUDED.expires_at,
+                last_read_at = EXCLUDED.last_read_at
+        """, rows, template="(%s, %s, %s, %s, %s, NOW(), CASE WHEN %s THEN NULL ELSE NOW() + make_interval(secs => %s) END, NOW())")
+    except Exception as e:
+        print(f"Error writing API response cache: {e}")
+
+def fetch_realtime_metrics_from_api(start_date, end_date, raise_errors=False):
     """Fetch real-time metrics from EmailBison API for specific date range"""
     try:
         print(f"Fetching real-time metrics from Bison API for {start_date} to {end_date}")
         
         # Get all campaigns from database
         db_manager = get_db_manager()
-        campaigns = db_manager.execute_query("SELECT id FROM campaigns")
-        campaign_ids = [row[0] for row in campaigns]
+        campaigns = db_manager.execute_query("SELECT id, status, updated_at FROM campaigns")
+        
+        # Stats of finished/paused campaigns barely move, so they are reused for
+        # FROZEN_CAMPAIGN_CACHE_TTL_SECONDS. Their key carries the campaign's updated_at, so
+        # resuming a campaign starts a new entry; the old one expires and is purged by the sync.
+        endpoints = {}
+        for campaign_id, status, updated_at in campaigns:
+            if (status or '').lower() in FROZEN_CAMPAIGN_STATUSES:
+                endpoints[campaign_id] = (f'campaign_stats/{campaign_id}@{updated_at}', FROZEN_CAMPAIGN_CACHE_TTL_SECONDS)
+            else:
+                endpoints[campaign_id] = (f'campaign_stats/{campaign_id}', API_CACHE_TTL_SECONDS)
+        
+        cached = get_cached_api_responses([api_cache_key(endpoint, start_date, end_date)
+                                           for endpoint, _ in endpoints.values()])
+        stats_by_campaign = {}
+        to_fetch = []
+        for campaign_id, (endpoint, _) in endpoints.items():
+            cache_key = api_cache_key(endpoint, start_date, end_date)
+            if cache_key in cached:
+                stats_by_campaign[campaign_id] = cached[cache_key]
+            else:
+                to_fetch.append(campaign_id)
+        
+        # Fetch the remaining campaigns concurrently on a bounded pool
+        failed_campaigns = []
+        if to_fetch:
+            with ThreadPoolExecutor(max_workers=min(REALTIME_METRICS_WORKERS, len(to_fetch))) as executor:
+                fetched = dict(zip(to_fetch, executor.map(
+                    lambda campaign_id: fetch_campaign_stats_for_period(campaign_id, start_date, end_date),
+                    to_fetch
+                )))
+            
+            new_entries = []
+            for campaign_id, stats in fetched.items():
+                if stats is None:
+                    failed_campaigns.append(campaign_id)  # Neither counted nor cached
+                    continue
+                stats_by_campaign[campaign_id] = stats
+                endpoint, ttl_seconds = endpoints[campaign_id]
+                new_entries.append((endpoint, start_date, end_date, stats, ttl_seconds))
+            if new_entries:
+                cache_api_responses(new_entries)
+        
+        # Totals missing campaigns would undercount; the successes above are cached, so a
+        # retry only refetches the failures
+        if failed_campaigns and raise_errors:
+            raise RuntimeError(f"Stats unavailable for {len(failed_campaigns)} of {len(endpoints)} campaigns")
         
         total_prospects_contacted = 0
         total_emails_sent = 0
+        for stats in stats_by_campaign.values():
+            total_prospects_contacted += stats.get('total_leads_contacted', 0) or 0
+            total_emails_sent += stats.get('emails_sent', 0) or 0
         
-        # Fetch stats for each campaign in the date range
-        for campaign_id in campaign_ids:
-            try:
-                # Try to fetch campaign stats for the specific date range
-                stats = fetch_campaign_stats_for_period(campaign_id, start_date, end_date)
-                if stats:
-                    total_prospects_contacted += stats.get('total_leads_contacted', 0)
-                    total_emails_sent += stats.get('emails_sent', 0)
-                    print(f"  Campaign {campaign_id}: {stats.get('total_leads_contacted', 0)} contacted, {stats.get('emails_sent', 0)} emails sent")
-            except Exception as e:
-                print(f"  Error fetching stats for campaign {campaign_id}: {e}")
-                continue
-        
-        print(f"Total from Bison API: {total_prospects_contacted} contacted, {total_emails_sent} emails sent")
+        print(f"Total from Bison API: {total_prospects_contacted} contacted, {total_emails_sent} emails sent "
+              f"({len(cached)} campaigns cached, {len(to_fetch)} fetched)")
         
         return {
             'prospects_contacted': total_prospects_contacted,
             'emails_sent': total_emails_sent,
             'unique_replies': 0,  # Will be calculated from replies
-            'interested': 0       # Will be calculated from replies
+            'interested': 0,      # Will be calculated from replies
+            'partial': bool(failed_campaigns)
         }
         
     except Exception as e:
         print(f"Error fetching real-time metrics: {e}")
+        if raise_errors:
+            raise
         return None
 
 def calculate_metrics_from_replies(db_manager, start_date, end_date):
-    """Calculate metrics from replies data as fallback"""
-    # Get replies data for the timeframe
-    all_replies = db_manager.execute_query("""
-        SELECT lead_id, interested, campaign_id
-        FROM replies 
-        WHERE DATE(LEFT(date_received, 10)) BETWEEN %s AND %s
-        AND automated_reply = false
-    """, (start_date.isoformat(), end_date.isoformat()))
-    
-    unique_leads = set()
-    interested_leads = set()
-    
-    for reply in all_replies:
-        lead_id = reply[0]
-        is_interested = reply[1]
-        campaign_id = reply[2]
-        
-        unique_leads.add(lead_id)
-        if is_interested:
-            interested_leads.add(lead_id)
-    
-    total_unique_replies = len(unique_leads)
-    total_interested = len(interested_leads)
+    """Calculate metrics from the daily reply rollup as fallback"""
+    # Distinct leads are counted across the per-day lead id arrays so multi-day repliers count once
+    stats = db_manager.execute_query("""
+        SELECT
+            (SELECT COUNT(DISTINCT lead_id)
+             FROM reply_daily_rollup r, unnest(r.lead_ids) AS lead_id
+             WHERE r.campaign_id = 0 AND r.stat_date BETWEEN %(start)s AND %(end)s),
+            (SELECT COUNT(DISTINCT lead_id)
+             FROM reply_daily_rollup r, unnest(r.interested_lead_ids) AS lead_id
+             WHERE r.campaign_id = 0 AND r.stat_date BETWEEN %(start)s AND %(end)s),
+            (SELECT COALESCE(SUM(reply_count), 0)
+             FROM reply_daily_rollup
+             WHERE campaign_id = 0 AND stat_date BETWEEN %(start)s AND %(end)s)
+    """, {'start': start_date.isoformat(), 'end': end_date.isoformat()})
+    
+    total_unique_replies, total_interested, total_replies = stats[0] if stats else (0, 0, 0)
     
     # For contacted prospects and emails sent, we need to get this from campaign data
     # since replies data only shows people who replied, not all contacted
     total_prospects_contacted = 0  # Will be calculated from campaign data
-    total_emails_sent = len(all_replies) if all_replies else 0  # Total replies received
+    total_emails_sent = int(total_replies or 0)  # Total replies received
     
     return total_prospects_contacted, total_emails_sent, total_unique_replies, total_interested
 
-def generate_chart_data_from_db(leads_data, campaigns_data, date_range):
-    """Generate chart data from database"""
-    leads_list = leads_data.get('leads', [])
-    campaigns_list = campaigns_data.get('campaigns', [])
-    
+EMPTY_DASHBOARD_AGGREGATES = {
+    'unique_replies': 0,
+    'interested': 0,
+    'reply_count': 0,
+    'daily': [],
+    'campaigns': [],
+    'titles': [],
+    'companies': []
+}
+
+def fetch_dashboard_aggregates(start_date, end_date, raise_errors=False):
+    """
+    Compute every dashboard aggregate for a date range in a single round trip.
+    
+    Returns a dict with:
+        unique_replies / interested / reply_count - range totals (distinct leads, replies)
+        daily     - [stat_date, unique_leads, interested_leads] per day with replies
+        campaigns - [campaign_name, positive_leads, positive_replies, total_leads_contacted]
+        titles    - top 10 [title, count] among interested leads
+        companies - top 10 [company, count] among interested leads
+    """
+    try:
+        db_manager = get_db_manager()
+        result = db_manager.execute_query("""
+            WITH days AS (
+                SELECT stat_date, campaign_id, unique_leads, interested_leads,
+                       reply_count, interested_count, lead_ids, interested_lead_ids
+                FROM reply_daily_rollup
+                WHERE stat_date BETWEEN %(start)s AND %(end)s
+            ),
+            all_days AS (
+                SELECT * FROM days WHERE campaign_id = 0
+            ),
+            campaign_counts AS (
+                SELECT campaign_id, SUM(interested_count) AS positive_replies
+                FROM days
+                WHERE campaign_id <> 0
+                GROUP BY campaign_id
+            ),
+            campaign_leads AS (
+                SELECT d.campaign_id, COUNT(DISTINCT lead_id) AS positive_leads
+                FROM days d
+                CROSS JOIN LATERAL unnest(d.interested_lead_ids) AS lead_id
+                WHERE d.campaign_id <> 0
+                GROUP BY d.campaign_id
+            ),
+            interested AS (
+                SELECT DISTINCT lead_id
+                FROM replies
+                WHERE received_date BETWEEN %(start)s AND %(end)s
+                AND interested = true
+                AND automated_reply = false
+            ),
+            titles AS (
+                SELECT l.title, COUNT(*) AS count
+                FROM leads l
+                INNER JOIN interested i ON i.lead_id = l.id
+                WHERE l.title IS NOT NULL AND l.title != ''
+                GROUP BY l.title
+                ORDER BY count DESC
+                LIMIT 10
+            ),
+            companies AS (
+                SELECT l.company, COUNT(*) AS count
+                FROM leads l
+                INNER JOIN interested i ON i.lead_id = l.id
+                WHERE l.company IS NOT NULL AND l.company != ''
+                GROUP BY l.company
+                ORDER BY count DESC
+                LIMIT 10
+            )
+            SELECT json_build_object(
+                'unique_replies', (SELECT COUNT(DISTINCT lead_id)
+                                   FROM all_days, unnest(all_days.lead_ids) AS lead_id),
+                'interested', (SELECT COUNT(DISTINCT lead_id)
+                               FROM all_days, unnest(all_days.interested_lead_ids) AS lead_id),
+                'reply_count', (SELECT COALESCE(SUM(reply_count), 0) FROM all_days),
+                'daily', (SELECT COALESCE(json_agg(json_build_array(stat_date, unique_leads, interested_leads)
+                                                   ORDER BY stat_date), '[]'::json)
+                          FROM all_days),
+                'campaigns', (SELECT COALESCE(json_agg(json_build_array(
+                                          COALESCE(c.name, 'Campaign ' || cc.campaign_id),
+                                          COALESCE(cl.positive_leads, 0),
+                                          cc.positive_replies,
+                                          COALESCE(c.total_leads_contacted, 0))), '[]'::json)
+                              FROM campaign_counts cc
+                              LEFT JOIN campaign_leads cl ON cl.campaign_id = cc.campaign_id
+                              LEFT JOIN campaigns c ON c.id = cc.campaign_id),
+                'titles', (SELECT COALESCE(json_agg(json_build_array(title, count) ORDER BY count DESC), '[]'::json)
+                           FROM titles),
+                'companies', (SELECT COALESCE(json_agg(json_build_array(company, count) ORDER BY count DESC), '[]'::json)
+                              FROM companies)
+            )
+        """, {'start': start_date.isoformat(), 'end': end_date.isoformat()})
+        
+        if not result or not result[0][0]:
+            return dict(EMPTY_DASHBOARD_AGGREGATES)
+        return result[0][0]
+    except Exception as e:
+        print(f"Error fetching dashboard aggregates: {e}")
+        if raise_errors:
+            raise
+        return dict(EMPTY_DASHBOARD_AGGREGATES)
+
+def resolve_chart_date_range(date_range):
+    """Narrow "All Time" to the dates that actually have replies; other ranges pass through"""
     # For "All Time", use the full date range from database
     if date_range['label'] == 'All Time':
         # Get the actual date range from the database
         db_manager = get_db_manager()
         date_range_result = db_manager.execute_query("""
-            SELECT MIN(DATE(LEFT(date_received, 10))) as min_date, 
-                   MAX(DATE(LEFT(date_received, 10))) as max_date
-            FROM replies 
-            WHERE automated_reply = false
+            SELECT MIN(stat_date) as min_date, 
+                   MAX(stat_date) as max_date
+            FROM reply_daily_rollup 
+            WHERE campaign_id = 0
         """)
         
         if date_range_result and len(date_range_result) > 0 and date_range_result[0] and len(date_range_result[0]) > 0 and date_range_result[0][0]:
@@ -837,38 +1243,44 @@ def generate_chart_data_from_db(leads_data, campaigns_data, date_range):
                 end_date = max_date
             except:
                 # Fallback to last 90 days if parsing fails
-                from datetime import timedelta
                 start_date = max(date_range['start'], (datetime.now() - timedelta(days=90)).date())
                 end_date = date_range['end']
         else:
             # Fallback to last 90 days if no data
-            from datetime import timedelta
             start_date = max(date_range['start'], (datetime.now() - timedelta(days=90)).date())
             end_date = date_range['end']
     else:
         start_date = date_range['start']
         end_date = date_range['end']
     
+    return {'start': start_date, 'end': end_date, 'label': date_range['label']}
+
+def generate_chart_data_from_db(campaigns_data, date_range, aggregates=None, line_chart_data=NOT_FETCHED):
+    """Generate chart data from database for a range resolved by resolve_chart_date_range"""
+    campaigns_list = campaigns_data.get('campaigns', [])
+    start_date = date_range['start']
+    end_date = date_range['end']
+    
+    if aggregates is None:
+        aggregates = fetch_dashboard_aggregates(start_date, end_date)
+    
     # 1. Replies Over Time
-    replies_over_time = generate_replies_over_time_from_db(campaigns_list, {'start': start_date, 'end': end_date})
+    replies_over_time = generate_replies_over_time_from_db(campaigns_list, {'start': start_date, 'end': end_date}, aggregates, line_chart_data)
     
     # 2. Campaign Breakdown
-    campaign_breakdown = generate_campaign_breakdown_from_db(campaigns_list, {'start': start_date, 'end': end_date})
+    campaign_breakdown = generate_campaign_breakdown_from_db(campaigns_list, {'start': start_date, 'end': end_date}, aggregates)
     
     # 3. Reply Status Breakdown
-    reply_status = generate_reply_status_breakdown_from_db(campaigns_list, {'start': start_date, 'end': end_date})
+    reply_status = generate_reply_status_breakdown_from_db(campaigns_list, {'start': start_date, 'end': end_date}, aggregates)
     
     # 4. Positive Leads by Title
-    leads_by_title = generate_leads_by_title_from_db(leads_list, campaigns_list, {'start': start_date, 'end': end_date})
+    leads_by_title = generate_leads_by_title_from_db(campaigns_list, {'start': start_date, 'end': end_date}, aggregates)
     
     # 5. Positive Leads by Location
-    leads_by_location = generate_leads_by_location_from_db(leads_list, campaigns_list, {'start': start_date, 'end': end_date})
+    leads_by_location = generate_leads_by_location_from_db(campaigns_list, {'start': start_date, 'end': end_date}, aggregates)
     
     # 6. Campaign Performance - Positive Replies vs Contacted
-    campaign_performance = generate_campaign_performance_from_db(campaigns_list, {'start': start_date, 'end': end_date})
-    
-    # 7. Map Locations Data
-    map_locations = generate_map_locations_from_db(leads_list, campaigns_list, {'start': start_date, 'end': end_date, 'label': date_range['label']})
+    campaign_performance = generate_campaign_performance_from_db(campaigns_list, {'start': start_date, 'end': end_date}, aggregates)
     
     return {
         'replies_over_time': replies_over_time,
@@ -876,17 +1288,17 @@ def generate_chart_data_from_db(leads_data, campaigns_data, date_range):
         'reply_status': reply_status,
         'leads_by_title': leads_by_title,
         'leads_by_location': leads_by_location,
-        'campaign_performance': campaign_performance,
-        'map_locations': map_locations
+        'campaign_performance': campaign_performance
     }
 
-def generate_replies_over_time_from_db(campaigns_list, date_range):
+def generate_replies_over_time_from_db(campaigns_list, date_range, aggregates=None, line_chart_data=NOT_FETCHED):
     """Generate replies over time chart data from EmailBison API"""
     start_date = date_range['start']
     end_date = date_range['end']
     
     # Try to get line chart data from EmailBison API first
-    line_chart_data = fetch_workspace_line_chart_from_api(start_date, end_date)
+    if line_chart_data is NOT_FETCHED:
+        line_chart_data = fetch_workspace_line_chart_from_api(start_date, end_date)
     if line_chart_data:
         # Process API data into the expected format
         replies_data = line_chart_data.get('replies', [])
@@ -938,41 +1350,26 @@ def generate_replies_over_time_from_db(campaigns_list, date_range):
     # Fallback to database calculation if API fails
     print("Falling back to database calculation for replies over time")
     
-    # Get replies grouped by date
-    db_manager = get_db_manager()
-    replies = db_manager.execute_query("""
-        SELECT DATE(LEFT(date_received, 10)) as reply_date, lead_id, interested
-        FROM replies
-        WHERE DATE(LEFT(date_received, 10)) BETWEEN %s AND %s
-        AND automated_reply = false
-        ORDER BY date_received
-    """, (start_date.isoformat(), end_date.isoformat()))
-    
-    # Group by date and deduplicate by lead
+    # Unique replying/interested leads per day from the rollup
+    if aggregates is None:
+        aggregates = fetch_dashboard_aggregates(start_date, end_date)
+    daily_counts = aggregates['daily']
+    
     replies_by_date = {}
-    for reply in replies:
-        # Handle both date objects (Postgres) and strings (SQLite)
-        if isinstance(reply[0], str):
-            reply_date = datetime.strptime(reply[0], '%Y-%m-%d').date()
+    for row in daily_counts:
+        # Handle both date objects (Postgres) and strings
+        if isinstance(row[0], str):
+            reply_date = datetime.strptime(row[0], '%Y-%m-%d').date()
         else:
-            reply_date = reply[0]  # Already a date object
-        lead_id = reply[1]
-        is_interested = reply[2]
-        
-        if reply_date not in replies_by_date:
-            replies_by_date[reply_date] = {'leads': set(), 'interested_leads': set()}
-        
-        replies_by_date[reply_date]['leads'].add(lead_id)
-        if is_interested:
-            replies_by_date[reply_date]['interested_leads'].add(lead_id)
+            reply_date = row[0]
+        replies_by_date[reply_date] = (row[1], row[2])
     
     # Create date buckets
     all_replies_counts = {}
     interested_counts = {}
     current = start_date
     while current <= end_date:
-        all_replies_counts[current] = len(replies_by_date.get(current, {}).get('leads', set()))
-        interested_counts[current] = len(replies_by_date.get(current, {}).get('interested_leads', set()))
+        all_replies_counts[current], interested_counts[current] = replies_by_date.get(current, (0, 0))
         current += timedelta(days=1)
     
     labels = [d.strftime('%b %d') for d in sorted(all_replies_counts.keys())]
@@ -985,38 +1382,14 @@ def generate_replies_over_time_from_db(campaigns_list, date_range):
         'positive_values': positive_values
     }
 
-def generate_campaign_breakdown_from_db(campaigns_list, date_range):
+def generate_campaign_breakdown_from_db(campaigns_list, date_range, aggregates=None):
     """Generate campaign breakdown pie chart from database - shows only positive replies (leads)"""
-    start_date = date_range['start']
-    end_date = date_range['end']
-    
-    # Get campaign positive reply counts for the date range
-    db_manager = get_db_manager()
-    campaign_replies = db_manager.execute_query("""
-        SELECT campaign_id, COUNT(DISTINCT lead_id) as unique_leads
-        FROM replies
-        WHERE DATE(LEFT(date_received, 10)) BETWEEN %s AND %s
-        AND automated_reply = false
-        AND interested = true
-        GROUP BY campaign_id
-    """, (start_date.isoformat(), end_date.isoformat()))
+    if aggregates is None:
+        aggregates = fetch_dashboard_aggregates(date_range['start'], date_range['end'])
     
-    campaign_data = []
-    for campaign_reply in campaign_replies:
-        campaign_id = campaign_reply[0]
-        unique_leads = campaign_reply[1]
-        
-        # Find campaign name
-        campaign_name = f'Campaign {campaign_id}'
-        for campaign in campaigns_list:
-            if campaign.get('id') == campaign_id:
-                campaign_name = campaign.get('name', f'Campaign {campaign_id}')
-                break
-        
-        if unique_leads > 0:
-            campaign_data.append((campaign_name, unique_leads))
-    
-    # Sort by positive lead count
+    # Campaign positive lead counts for the date range, sorted by positive lead count
+    campaign_data = [(name, positive_leads) for name, positive_leads, _, _ in aggregates['campaigns']
+                     if positive_leads > 0]
     campaign_data.sort(key=lambda x: x[1], reverse=True)
     
     # Top 10 campaigns + others
@@ -1032,144 +1405,58 @@ def generate_campaign_breakdown_from_db(campaigns_list, date_range):
     
     return {'labels': labels, 'values': values}
 
-def generate_reply_status_breakdown_from_db(campaigns_list, date_range):
+def generate_reply_status_breakdown_from_db(campaigns_list, date_range, aggregates=None):
     """Generate reply status breakdown chart from database"""
-    start_date = date_range['start']
-    end_date = date_range['end']
+    if aggregates is None:
+        aggregates = fetch_dashboard_aggregates(date_range['start'], date_range['end'])
     
-    # Get unique leads and interested leads for the date range
-    db_manager = get_db_manager()
-    stats = db_manager.execute_query("""
-        SELECT 
-            COUNT(DISTINCT lead_id) as total_replied,
-            COUNT(DISTINCT CASE WHEN interested = true THEN lead_id END) as total_interested
-        FROM replies
-        WHERE DATE(LEFT(date_received, 10)) BETWEEN %s AND %s
-        AND automated_reply = false
-    """, (start_date.isoformat(), end_date.isoformat()))
-    
-    if stats:
-        total_replied = stats[0][0]
-        total_interested = stats[0][1]
-        non_interested = total_replied - total_interested if total_replied > total_interested else 0
-    else:
-        total_replied = 0
-        total_interested = 0
-        non_interested = 0
+    # Unique leads and interested leads for the date range
+    total_replied = aggregates['unique_replies']
+    total_interested = aggregates['interested']
+    
+    non_interested = total_replied - total_interested if total_replied > total_interested else 0
     
     return {
         'labels': ['Interested', 'Replied (Not Interested)'],
         'values': [total_interested, non_interested]
     }
 
-def generate_leads_by_title_from_db(leads_list, campaigns_list, date_range):
+def generate_leads_by_title_from_db(campaigns_list, date_range, aggregates=None):
     """Generate positive leads by title breakdown from database"""
-    start_date = date_range['start']
-    end_date = date_range['end']
+    if aggregates is None:
+        aggregates = fetch_dashboard_aggregates(date_range['start'], date_range['end'])
     
-    # Get interested leads from the date range
-    db_manager = get_db_manager()
-    interested_leads = db_manager.execute_query("""
-        SELECT DISTINCT r.lead_id
-        FROM replies r
-        WHERE DATE(LEFT(r.date_received, 10)) BETWEEN %s AND %s
-        AND r.interested = true
-        AND r.automated_reply = false
-    """, (start_date.isoformat(), end_date.isoformat()))
-    
-    lead_ids = [lead[0] for lead in interested_leads]
-    
-    if not lead_ids:
-        return {'labels': [], 'values': []}
-    
-    # Get titles for these leads
-    placeholders = ','.join(['%s' for _ in lead_ids])
-    titles = db_manager.execute_query(f"""
-        SELECT title, COUNT(*) as count
-        FROM leads
-        WHERE id IN ({placeholders})
-        AND title IS NOT NULL AND title != ''
-        GROUP BY title
-        ORDER BY count DESC
-        LIMIT 10
-    """, lead_ids)
+    # Top 10 titles among leads with an interested reply in the date range
+    titles = aggregates['titles']
     
     labels = [title[0] for title in titles]
     values = [title[1] for title in titles]
     
     return {'labels': labels, 'values': values}
 
-def generate_leads_by_location_from_db(leads_list, campaigns_list, date_range):
+def generate_leads_by_location_from_db(campaigns_list, date_range, aggregates=None):
     """Generate positive leads by location (company-based) from database"""
-    start_date = date_range['start']
-    end_date = date_range['end']
+    if aggregates is None:
+        aggregates = fetch_dashboard_aggregates(date_range['start'], date_range['end'])
     
-    # Get interested leads from the date range
-    db_manager = get_db_manager()
-    interested_leads = db_manager.execute_query("""
-        SELECT DISTINCT r.lead_id
-        FROM replies r
-        WHERE DATE(LEFT(r.date_received, 10)) BETWEEN %s AND %s
-        AND r.interested = true
-        AND r.automated_reply = false
-    """, (start_date.isoformat(), end_date.isoformat()))
-    
-    lead_ids = [lead[0] for lead in interested_leads]
-    
-    if not lead_ids:
-        return {'labels': [], 'values': []}
-    
-    # Get companies for these leads
-    placeholders = ','.join(['%s' for _ in lead_ids])
-    companies = db_manager.execute_query(f"""
-        SELECT company, COUNT(*) as count
-        FROM leads
-        WHERE id IN ({placeholders})
-        AND company IS NOT NULL AND company != ''
-        GROUP BY company
-        ORDER BY count DESC
-        LIMIT 10
-    """, lead_ids)
+    # Top 10 companies among leads with an interested reply in the date range
+    companies = aggregates['companies']
     
     labels = [company[0] for company in companies]
     values = [company[1] for company in companies]
     
     return {'labels': labels, 'values': values}
 
-def generate_campaign_performance_from_db(campaigns_list, date_range):
+def generate_campaign_performance_from_db(campaigns_list, date_range, aggregates=None):
     """Generate campaign performance chart: Positive Rate (Positive Replies / Contacted People)"""
-    start_date = date_range['start']
-    end_date = date_range['end']
-    
-    db_manager = get_db_manager()
+    if aggregates is None:
+        aggregates = fetch_dashboard_aggregates(date_range['start'], date_range['end'])
     
-    # Get campaign data with positive replies and contacted counts
+    # Only include campaigns with positive replies in the selected timeframe
     campaign_data = []
-    
-    for campaign in campaigns_list:
-        campaign_id = campaign.get('id')
-        campaign_name = campaign.get('name', f'Campaign {campaign_id}')
-        
-        # Get positive replies count for this campaign in date range
-        positive_replies = db_manager.execute_query("""
-            SELECT COUNT(*) as positive_count
-            FROM replies
-            WHERE campaign_id = %s
-            AND interested = true
-            AND automated_reply = false
-            AND DATE(LEFT(date_received, 10)) BETWEEN %s AND %s
-        """, (campaign_id, start_date.isoformat(), end_date.isoformat()))
-        
-        positive_count = positive_replies[0][0] if positive_replies else 0
-        
-        # Get contacted count from campaign
-        contacted_count = campaign.get('total_leads_contacted', 0)
-        
-        # Calculate positive rate (percentage)
-        positive_rate = (positive_count / contacted_count * 100) if contacted_count > 0 else 0
-        
-        # Only include campaigns with positive replies in the selected timeframe
+    for campaign_name, _, positive_count, contacted_count in aggregates['campaigns']:
         if positive_count > 0 and contacted_count > 0:
+            positive_rate = positive_count / contacted_count * 100
             campaign_data.append({
                 'name': campaign_name,
                 'positive': positive_count,
@@ -1194,587 +1481,134 @@ def generate_campaign_performance_from_db(campaigns_list, date_range):
         'contacted_counts': contacted_counts
     }
 
-def build_comprehensive_address_string(custom_vars):
+# Map clustering: grid cells per 256px map tile; from MAP_CLUSTER_MAX_ZOOM on, only leads
+# sharing a spot (e.g. the same ZIP centroid) are grouped
+MAP_CLUSTER_CELLS_PER_TILE = 4
+MAP_CLUSTER_MAX_ZOOM = 15
+# Clusters this small list their lead ids so the popup can fetch details directly; so do
+# clusters zooming cannot split (max zoom, or every member on one point), up to
+# MAP_CLUSTER_POINT_IDS_MAX ids that the popup pages through MAP_CLUSTER_LEAD_IDS_MAX at a time
+MAP_CLUSTER_LEAD_IDS_MAX = 10
+MAP_CLUSTER_POINT_IDS_MAX = 500
+
+def parse_bbox(bbox):
+    """(west, south, east, north) from a "west,south,east,north" string, clamped to the globe"""
+    try:
+        west, south, east, north = (float(value) for value in bbox.split(','))
+    except (AttributeError, ValueError):
+        raise ValueError("bbox must be west,south,east,north")
+    south, north = max(-90.0, min(south, north)), min(90.0, max(south, north))
+    # A viewport wider than the world (or wrapped across the antimeridian) covers every longitude
+    if east - west >= 360 or west < -180 or east > 180:
+        west, east = -180.0, 180.0
+    return west, south, east, north
+
+def generate_map_clusters_from_db(date_range, bbox, zoom):
     """
-    Build a comprehensive address string from ALL address-related custom variables.
-    This approach gets all address-related variables and combines them into one string,
-    then geocodes that complete string. Works regardless of variable naming conventions.
+    Interested leads (positive reply in the range) with coordinates inside bbox, grouped
+    into grid cells sized for the zoom level. Each cluster is its members' mean position.
+    lead_ids is set for small clusters and for clusters zooming in would not split.
     """
-    if not isinstance(custom_vars, list):
-        return None
-    
-    # Comprehensive patterns for address-related variables (international support)
-    address_patterns = [
-        # Street/Address patterns
-        'street', 'address', 'street_address', 'street address', 
-        'addr', 'location', 'road', 'avenue', 'ave', 'blvd', 'boulevard',
-        'drive', 'dr', 'lane', 'ln', 'way', 'st', 'place', 'pl',
-        'strasse', 'rue', 'calle', 'via', 'gasse', 'straat', 'ulica',
-        'adresse', 'direccion', 'indirizzo', 'adres', 'endereco',
-        
-        # City patterns
-        'city', 'town', 'municipality', 'municipal', 'locality',
-        'community', 'village', 'borough', 'township', 'stadt',
-        'ville', 'ciudad', 'citta', 'stad', 'cidade', 'miasto',
-        
-        # State/Province patterns
-        'state', 'province', 'region', 'territory', 'county',
-        'district', 'area', 'zone', 'land', 'bundesland', 'departement',
-        'provincia', 'regione', 'provincie', 'estado', 'canton',
-        
-        # Postal/Zip patterns
-        'zip', 'zip_code', 'zipcode', 'postal', 'postal_code', 
-        'postal code', 'postcode', 'post_code', 'code', 'zipcode',
-        'zip code', 'postalcode', 'plz', 'cp', 'codigo postal',
-        'codice postale', 'postcode', 'postnummer'
-    ]
-    
-    address_components = []
-    
-    for var in custom_vars:
-        var_name = var.get('name', '') or ''
-        var_value = var.get('value', '') or ''
-        
-        # Skip if name or value is None
-        if not var_name or not var_value:
-            continue
-            
-        var_name = var_name.lower().strip()
-        var_value = var_value.strip()
-        
-        # Skip empty values
-        if not var_value or var_value == 'None' or var_value == '':
-            continue
-        
-        # Check if this variable is address-related
-        if any(pattern in var_name for pattern in address_patterns):
-            address_components.append(var_value)
-            print(f"  Added address component '{var_name}': '{var_value}'")
+    west, south, east, north = bbox
+    zoom = max(0, min(int(zoom), MAP_CLUSTER_MAX_ZOOM))
+    cell_size = 360.0 / (2 ** zoom) / MAP_CLUSTER_CELLS_PER_TILE
+    if zoom >= MAP_CLUSTER_MAX_ZOOM:
+        cell_size = 1e-6
     
-    # If we found address components, combine them into a comprehensive string
-    if address_components:
-        comprehensive_address = ', '.join(address_components)
-        print(f"  Comprehensive address: '{comprehensive_address}'")
-        return comprehensive_address
-    
-    return None
-
-def extract_address_from_custom_variables(custom_vars):
-    """
-    Extract address components from custom variables with flexible naming.
-    Handles different variable names across campaigns but always finds:
-    - Street address (street, address, street_address, etc.)
-    - City (city, town, municipality, etc.)
-    - State (state, province, region, etc.)
-    - Zip/Postal code (zip, zip_code, postal_code, postal code, etc.)
+    db_manager = get_db_manager()
+    rows = db_manager.execute_query("""
+        SELECT COUNT(*), AVG(l.latitude)::float8, AVG(l.longitude)::float8,
+               CASE WHEN COUNT(*) <= %(ids_max)s OR %(max_zoom)s
+                         OR (MIN(l.latitude) = MAX(l.latitude) AND MIN(l.longitude) = MAX(l.longitude))
+                    THEN (ARRAY_AGG(l.id ORDER BY l.id))[1:%(point_ids_max)s] END
+        FROM leads l
+        WHERE l.latitude BETWEEN %(south)s AND %(north)s
+        AND l.longitude BETWEEN %(west)s AND %(east)s
+        AND EXISTS (
+            SELECT 1 FROM replies r
+            WHERE r.lead_id = l.id
+            AND r.automated_reply = false
+            AND r.interested = true
+            AND r.received_date BETWEEN %(start)s AND %(end)s
+        )
+        GROUP BY floor(l.latitude / %(cell)s), floor(l.longitude / %(cell)s)
+    """, {
+        'south': south, 'north': north, 'west': west, 'east': east,
+        'start': date_range['start'], 'end': date_range['end'],
+        'cell': cell_size, 'ids_max': MAP_CLUSTER_LEAD_IDS_MAX,
+        'max_zoom': zoom >= MAP_CLUSTER_MAX_ZOOM, 'point_ids_max': MAP_CLUSTER_POINT_IDS_MAX
+    })
+    
+    return [{
+        'lat': lat,
+        'lng': lng,
+        'count': count,
+        'lead_ids': lead_ids
+    } for count, lat, lng, lead_ids in rows]
+
+@app.route('/api/map')
+def get_map_clusters():
     """
-    if not isinstance(custom_vars, list):
-        return None, None, None, None
-    
-    address = None
-    city = None
-    state = None
-    zip_code = None
-    
-    # Define patterns for each address component (international support)
-    street_patterns = [
-        'street', 'address', 'street_address', 'street address', 
-        'addr', 'location', 'road', 'avenue', 'ave', 'blvd', 'boulevard',
-        'drive', 'dr', 'lane', 'ln', 'way', 'st', 'place', 'pl',
-        'strasse', 'rue', 'calle', 'via', 'gasse', 'straat', 'ulica',
-        'adresse', 'direccion', 'indirizzo', 'adres', 'endereco'
-    ]
-    
-    city_patterns = [
-        'city', 'town', 'municipality', 'municipal', 'locality',
-        'community', 'village', 'borough', 'township', 'stadt',
-        'ville', 'ciudad', 'citta', 'stad', 'cidade', 'miasto'
-    ]
-    
-    state_patterns = [
-        'state', 'province', 'region', 'territory', 'county',
-        'district', 'area', 'zone', 'land', 'bundesland', 'departement',
-        'provincia', 'regione', 'provincie', 'estado', 'canton'
-    ]
-    
-    zip_patterns = [
-        'zip', 'zip_code', 'zipcode', 'postal', 'postal_code', 
-        'postal code', 'postcode', 'post_code', 'code', 'zipcode',
-        'zip code', 'postalcode', 'plz', 'cp', 'codigo postal',
-        'codice postale', 'postcode', 'postnummer'
-    ]
+    Clustered interested-lead locations for the visible map area.
     
-    for var in custom_vars:
-        var_name = var.get('name', '').lower().strip()
-        var_value = var.get('value', '').strip()
-        
-        if not var_value or var_value == 'None':
-            continue
-        
-        # Check for street address
-        if any(pattern in var_name for pattern in street_patterns):
-            if not address:  # Take the first match
-                address = var_value
-        
-        # Check for city
-        elif any(pattern in var_name for pattern in city_patterns):
-            if not city:  # Take the first match
-                city = var_value
-        
-        # Check for state
-        elif any(pattern in var_name for pattern in state_patterns):
-            if not state:  # Take the first match
-                state = var_value
-        
-        # Check for zip/postal code
-        elif any(pattern in var_name for pattern in zip_patterns):
-            if not zip_code:  # Take the first match
-                zip_code = var_value
-    
-    # If we still don't have all components, try to infer from remaining variables
-    if not address or not city or not state or not zip_code:
-        for var in custom_vars:
-            var_name = var.get('name', '') or ''
-            var_value = var.get('value', '') or ''
-            
-            # Skip if name or value is None
-            if not var_name or not var_value:
-                continue
-                
-            var_name = var_name.lower().strip()
-            var_value = var_value.strip()
-            
-            if not var_value or var_value == 'None':
-                continue
-            
-            # Skip if already assigned
-            if var_name in [v.get('name', '').lower().strip() for v in custom_vars if v.get('value', '').strip() in [address, city, state, zip_code]]:
-                continue
-            
-            # Try to infer based on value patterns (international support)
-            if not address and len(var_value) > 10 and any(char.isdigit() for char in var_value):
-                # Looks like a street address (longer text with numbers)
-                address = var_value
-            
-            elif not city and len(var_value) > 3 and len(var_value) < 50 and not any(char.isdigit() for char in var_value):
-                # Looks like a city name (medium length, no numbers)
-                city = var_value
-            
-            elif not state and (len(var_value) == 2 and var_value.isupper()) or (len(var_value) > 3 and len(var_value) < 20):
-                # Looks like a state/province (2 uppercase letters or medium length text)
-                state = var_value
-            
-            elif not zip_code and (
-                (len(var_value) == 5 and var_value.isdigit()) or  # US ZIP
-                (len(var_value) == 10 and var_value.replace('-', '').isdigit()) or  # US ZIP+4
-                (len(var_value) == 6 and var_value.replace(' ', '').isalnum()) or  # Canadian postal
-                (len(var_value) == 4 and var_value.isdigit()) or  # Some European postal codes
-                (len(var_value) == 5 and var_value.replace(' ', '').isalnum())  # Mixed postal codes
-            ):
-                # Looks like a postal code (various international formats)
-                zip_code = var_value
-    
-    return address, city, state, zip_code
-
-def fetch_leads_from_emailbison_with_timeframe(timeframe, start_date=None, end_date=None):
-    """
-    Fetch leads from EmailBison API with timeframe filtering
-    """
-    try:
-        # Calculate date range
-        date_range = calculate_date_range(timeframe, start_date, end_date)
-        
-        # Prepare API parameters
-        params = {
-            'per_page': 100,  # Get more leads per page
-            'page': 1
-        }
-        
-        # Add date filtering based on timeframe
-        if timeframe != 'all':
-            # Use updated_at for filtering
-            params['updated_at_from'] = date_range['start'].isoformat()
-            params['updated_at_to'] = date_range['end'].isoformat()
-        
-        print(f"Fetching leads from EmailBison with params: {params}")
-        
-        # Make API request
-        url = f'{EMAILBISON_DOMAIN}/api/leads'
-        response = requests.get(url, headers=EMAILBISON_HEADERS, params=params, timeout=30)
-        response.raise_for_status()
-        
-        data = response.json()
-        leads = data.get('data', [])
-        
-        print(f"Fetched {len(leads)} leads from EmailBison API")
-        
-        # If we have pagination, fetch more pages
-        total_pages = data.get('last_page', 1)
-        if total_pages > 1:
-            print(f"Fetching additional pages (total: {total_pages})")
-            for page in range(2, min(total_pages + 1, 6)):  # Limit to 5 pages max
-                params['page'] = page
-                try:
-                    response = requests.get(url, headers=EMAILBISON_HEADERS, params=params, timeout=30)
-                    response.raise_for_status()
-                    page_data = response.json()
-                    page_leads = page_data.get('data', [])
-                    leads.extend(page_leads)
-                    print(f"Fetched page {page}: {len(page_leads)} leads")
-                except Exception as e:
-                    print(f"Error fetching page {page}: {e}")
-                    break
-        
-        print(f"Total leads fetched: {len(leads)}")
-        return leads
-        
-    except Exception as e:
-        print(f"Error fetching leads from EmailBison: {e}")
-        import traceback
-        traceback.print_exc()
-        return []
-
-def sync_leads_for_timeframe(timeframe, start_date=None, end_date=None):
-    """
-    Sync leads from EmailBison API for specific timeframe and store in database
+    Takes bbox=west,south,east,north and zoom plus the dashboard's timeframe parameters.
+    Lead details are fetched per marker from /api/map/leads.
     """
     try:
-        print(f"\n=== Syncing leads for timeframe: {timeframe} ===")
+        bbox = parse_bbox(request.args.get('bbox', '-180,-90,180,90'))
+        zoom = request.args.get('zoom', 4, type=int)
+        date_range = calculate_date_range(request.args.get('timeframe', '7d'),
+                                          request.args.get('start_date'), request.args.get('end_date'))
+        chart_range = resolve_chart_date_range(date_range)
         
-        # Fetch leads from EmailBison API
-        leads = fetch_leads_from_emailbison_with_timeframe(timeframe, start_date, end_date)
-        
-        if not leads:
-            print("No leads fetched from EmailBison API")
-            return []
-        
-        # Get database manager
-        db_manager = get_db_manager()
-        
-        synced_leads = []
-        
-        for lead in leads:
-            try:
-                # Extract comprehensive address string from ALL address-related custom variables
-                custom_vars = lead.get('custom_variables', [])
-                comprehensive_address = build_comprehensive_address_string(custom_vars)
-                
-                # If we don't have comprehensive address, try traditional extraction
-                if not comprehensive_address:
-                    address, city, state, zip_code = extract_address_from_custom_variables(custom_vars)
-                    
-                    # If we don't have complete address, try to extract from other fields
-                    if not address or not city or not state or not zip_code:
-                        # Try to get address from other lead fields
-                        if not address:
-                            address = lead.get('address', '') or ''
-                        if not city:
-                            city = lead.get('city', '') or ''
-                        if not state:
-                            state = lead.get('state', '') or ''
-                        if not zip_code:
-                            zip_code = lead.get('zip_code', '') or lead.get('postal_code', '') or ''
-                    
-                    # Build address string from components
-                    if address and city and state and zip_code:
-                        comprehensive_address = f"{address}, {city}, {state} {zip_code}"
-                
-                print(f"Comprehensive address for lead {lead.get('id')}: '{comprehensive_address}'")
-                
-                # Determine if lead is interested
-                is_interested = lead.get('verification_status') == 'interested'
-                
-                # Parse comprehensive address into components for database storage
-                address_parts = comprehensive_address.split(', ') if comprehensive_address else []
-                street = address_parts[0] if len(address_parts) > 0 else ''
-                city = address_parts[1] if len(address_parts) > 1 else ''
-                state = address_parts[2] if len(address_parts) > 2 else ''
-                zip_code = address_parts[3] if len(address_parts) > 3 else ''
-                
-                # Also consider leads with complete address data as potentially valuable
-                has_complete_address = street and city and state and zip_code
-                if has_complete_address and not is_interested:
-                    print(f"Lead {lead.get('id')} has complete address but is not marked as interested")
-                
-                # Insert or update lead in database
-                db_manager.execute_query('''
-                    INSERT INTO leads (id, email, first_name, last_name, title, company, phone, 
-                                     state, address, city, zip_code, geocoded_address, interested, created_at, updated_at, last_synced)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
-                    ON CONFLICT (id) DO UPDATE SET
-                        email = EXCLUDED.email,
-                        first_name = EXCLUDED.first_name,
-                        last_name = EXCLUDED.last_name,
-                        title = EXCLUDED.title,
-                        company = EXCLUDED.company,
-                        phone = EXCLUDED.phone,
-                        state = EXCLUDED.state,
-                        address = EXCLUDED.address,
-                        city = EXCLUDED.city,
-                        zip_code = EXCLUDED.zip_code,
-                        geocoded_address = EXCLUDED.geocoded_address,
-                        interested = EXCLUDED.interested,
-                        updated_at = EXCLUDED.updated_at,
-                        last_synced = NOW()
-                ''', (
-                    lead.get('id'),
-                    lead.get('email', ''),
-                    lead.get('first_name', ''),
-                    lead.get('last_name', ''),
-                    lead.get('title', ''),
-                    lead.get('company', ''),
-                    lead.get('phone', ''),
-                    state,
-                    street,
-                    city,
-                    zip_code,
-                    comprehensive_address,  # Store comprehensive address for geocoding
-                    is_interested,
-                    lead.get('created_at', ''),
-                    lead.get('updated_at', '')
-                ))
-                
-                synced_leads.append(lead)
-                
-            except Exception as e:
-                print(f"Error processing lead {lead.get('id', 'unknown')}: {e}")
-                continue
-        
-        print(f"Successfully synced {len(synced_leads)} leads to database")
-        
-        # Trigger geocoding for leads without coordinates
-        print("Triggering geocoding for leads without coordinates...")
-        geocode_leads_for_timeframe(timeframe)
-        
-        return synced_leads
-        
-    except Exception as e:
-        print(f"Error syncing leads for timeframe: {e}")
-        import traceback
-        traceback.print_exc()
-        return []
-
-def geocode_leads_for_timeframe(timeframe):
-    """
-    Geocode leads for specific timeframe that don't have coordinates
-    """
-    try:
-        db_manager = get_db_manager()
-        
-        # Get leads that need geocoding for this timeframe
-        leads_to_geocode = db_manager.execute_query("""
-            SELECT id, address, city, state, zip_code, geocoded_address
-            FROM leads
-            WHERE (latitude IS NULL OR longitude IS NULL)
-            AND (
-                (address IS NOT NULL AND address != '') OR
-                (city IS NOT NULL AND city != '') OR
-                (state IS NOT NULL AND state != '') OR
-                (zip_code IS NOT NULL AND zip_code != '') OR
-                (geocoded_address IS NOT NULL AND geocoded_address != '')
-            )
-            AND interested = true
-            LIMIT 20
-        """)
-        
-        if not leads_to_geocode:
-            print("No leads need geocoding")
-            return
-        
-        print(f"Geocoding {len(leads_to_geocode)} leads...")
-        
-        for lead_row in leads_to_geocode:
-            lead_id, address, city, state, zip_code, geocoded_address = lead_row
-            
-            # Use comprehensive address if available, otherwise build from components
-            if geocoded_address and str(geocoded_address).strip():
-                full_address = str(geocoded_address).strip()
-                print(f"Using comprehensive address for lead {lead_id}: {full_address}")
-            else:
-                # Build complete address string: street, city, state zip
-                address_parts = []
-                
-                # Add street address if available
-                if address and str(address).strip() and address != 'None':
-                    address_parts.append(str(address).strip())
-                
-                # Add city if available
-                if city and str(city).strip() and city != 'None':
-                    address_parts.append(str(city).strip())
-                
-                # Add state if available
-                if state and str(state).strip() and state != 'None':
-                    address_parts.append(str(state).strip())
-                
-                # Add zip code if available
-                if zip_code and str(zip_code).strip() and zip_code != 'None':
-                    address_parts.append(str(zip_code).strip())
-                
-                # Form complete address string
-                full_address = ', '.join(address_parts)
-                
-                # Only geocode if we have a meaningful address (at least 2 components)
-                if len(address_parts) < 2:
-                    print(f"Skipping lead {lead_id}: insufficient address data ({full_address})")
-                    continue
-                
-                if not full_address:
-                    print(f"Skipping lead {lead_id}: empty address")
-                    continue
-                
-                print(f"Building address for lead {lead_id}: {full_address}")
-            
-            # Geocode the complete address
-            geocoded = geocode_address(full_address)
-            
-            if geocoded:
-                # Update the lead with coordinates
-                db_manager.execute_query("""
-                    UPDATE leads 
-                    SET latitude = %s, longitude = %s, geocoded_address = %s, geocoded_at = NOW()
-                    WHERE id = %s
-                """, (
-                    geocoded['lat'],
-                    geocoded['lng'],
-                    geocoded['display_name'],
-                    lead_id
-                ))
-                print(f"✓ Geocoded lead {lead_id}: {full_address} → {geocoded['display_name']}")
-            else:
-                print(f"✗ Failed to geocode lead {lead_id}: {full_address}")
-            
-            # Small delay to be respectful to the geocoding service
-            import time
-            time.sleep(0.5)
-        
-        print("Geocoding completed")
-        
-    except Exception as e:
-        print(f"Error in geocoding: {e}")
-
-def geocode_address(address_string):
-    """Geocode an address string to lat/lng coordinates using Nominatim (OpenStreetMap)"""
-    try:
-        if not address_string or not str(address_string).strip():
-            return None
-        
-        # Try different address formats for better geocoding success
-        address_formats = [
-            str(address_string).strip(),  # Original format
-        ]
-        
-        # If we have a full address, try simpler formats
-        if ',' in address_string:
-            parts = [str(part).strip() for part in str(address_string).split(',')]
-            if len(parts) >= 3:
-                # Try city, state zip format
-                address_formats.append(f"{parts[1]}, {parts[2]}")
-            if len(parts) >= 2:
-                # Try city, state format
-                address_formats.append(f"{parts[1]}, {parts[2].split()[0] if parts[2] else ''}")
-        
-        # Use Nominatim geocoding service
-        url = "https://nominatim.openstreetmap.org/search"
-        headers = {
-            'User-Agent': 'LongRun Reports App/1.0 (contact@longrun.agency)'
-        }
-        
-        for address_format in address_formats:
-            if not str(address_format).strip():
-                continue
-                
-            params = {
-                'q': str(address_format).strip(),
-                'format': 'json',
-                'limit': 1,
-                'addressdetails': 1
-            }
-            
-            try:
-                response = requests.get(url, params=params, headers=headers, timeout=5)
-                response.raise_for_status()
-                data = response.json()
-                
-                if data and len(data) > 0:
-                    result = data[0]
-                    return {
-                        'lat': float(result['lat']),
-                        'lng': float(result['lon']),
-                        'display_name': result.get('display_name', ''),
-                        'confidence': result.get('importance', 0)
-                    }
-            except Exception as e:
-                print(f"Error geocoding address format '{address_format}': {e}")
-                continue
-        
-        return None
-    
+        clusters = generate_map_clusters_from_db(chart_range, bbox, zoom)
+        return jsonify({
+            'success': True,
+            'clusters': clusters,
+            'total': sum(cluster['count'] for cluster in clusters),
+            'zoom': zoom
+        })
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e), 'clusters': []}), 400
     except Exception as e:
-        print(f"Error geocoding address '{address_string}': {e}")
-        return None
+        print(f"Error in get_map_clusters: {e}")
+        return jsonify({'success': False, 'error': str(e), 'clusters': []})
 
-def generate_map_locations_from_db(leads_list, campaigns_list, date_range):
-    """Generate individual lead locations with cached coordinates for interactive map"""
+@app.route('/api/map/leads')
+def get_map_lead_details():
+    """Popup details for up to MAP_CLUSTER_LEAD_IDS_MAX map leads (ids=1,2,3), with their latest positive reply"""
     try:
-        start_date = date_range['start']
-        end_date = date_range['end']
+        lead_ids = [int(lead_id) for lead_id in request.args.get('ids', '').split(',') if lead_id.strip()]
+        lead_ids = lead_ids[:MAP_CLUSTER_LEAD_IDS_MAX]
+        if not lead_ids:
+            return jsonify({'success': True, 'leads': []})
         
         db_manager = get_db_manager()
-        
-        # Get interested leads (positive replies) with their cached coordinates
-        # For shorter timeframes, also include leads from a broader range to show more data
-        if date_range['label'] in ['Last 7 Days', 'Month to Date']:
-            # For short timeframes, expand the date range to show more map data
-            extended_start = start_date - timedelta(days=90)  # Go back 90 days
-            date_filter = f"DATE(LEFT(r.date_received, 10)) BETWEEN '{extended_start.isoformat()}' AND '{end_date.isoformat()}'"
-        else:
-            date_filter = f"DATE(LEFT(r.date_received, 10)) BETWEEN '{start_date.isoformat()}' AND '{end_date.isoformat()}'"
-        
-        print(f"Map query date filter: {date_filter}")
-        
-        interested_leads = db_manager.execute_query(f"""
-            SELECT DISTINCT l.id, l.first_name, l.last_name, l.email, l.title, l.company, 
-                   l.address, l.city, l.state, l.zip_code, l.phone,
-                   l.latitude, l.longitude, l.geocoded_address,
-                   r.date_received, c.name as campaign_name
-        FROM leads l
-        INNER JOIN replies r ON l.id = r.lead_id
-            LEFT JOIN campaigns c ON r.campaign_id = c.id
-            WHERE {date_filter}
-        AND r.automated_reply = false
-            AND r.interested = true
-            AND l.latitude IS NOT NULL
-            AND l.longitude IS NOT NULL
-            ORDER BY r.date_received DESC
-        """)
-        
-        print(f"Found {len(interested_leads)} interested leads with coordinates")
-        
-        lead_locations = []
-        
-        for lead in interested_leads:
-            lead_id, first_name, last_name, email, title, company, address, city, state, zip_code, phone, lat, lng, geocoded_address, date_received, campaign_name = lead
-            
-            # Build full address string - use whatever data is available
-            address_parts = []
-            if address and str(address).strip() and address != 'None':
-                address_parts.append(str(address).strip())
-            if city and str(city).strip() and city != 'None':
-                address_parts.append(str(city).strip())
-            if state and str(state).strip() and state != 'None':
-                address_parts.append(str(state).strip())
-            if zip_code and str(zip_code).strip() and zip_code != 'None':
-                address_parts.append(str(zip_code).strip())
-            
+        rows = db_manager.execute_query("""
+            SELECT l.id, l.first_name, l.last_name, l.email, l.title, l.company, l.phone,
+                   l.address, l.city, l.state, l.zip_code, l.geocoded_address,
+                   l.latitude::float8, l.longitude::float8,
+                   latest.date_received, latest.campaign_name
+            FROM leads l
+            LEFT JOIN LATERAL (
+                SELECT r.date_received, c.name AS campaign_name
+                FROM replies r
+                LEFT JOIN campaigns c ON r.campaign_id = c.id
+                WHERE r.lead_id = l.id AND r.automated_reply = false AND r.interested = true
+                ORDER BY r.received_at DESC NULLS LAST
+                LIMIT 1
+            ) latest ON true
+            WHERE l.id = ANY(%s)
+            ORDER BY l.id
+        """, (lead_ids,))
+        
+        leads = []
+        for (lead_id, first_name, last_name, email, title, company, phone, address, city, state,
+             zip_code, geocoded_address, lat, lng, date_received, campaign_name) in rows:
             # Use geocoded address if available, otherwise build from parts
-            if geocoded_address and str(geocoded_address).strip():
-                full_address = str(geocoded_address).strip()
-            elif address_parts:
-                full_address = ', '.join(address_parts)
-        else:
-            full_address = 'Unknown Address'
-        
-        lead_locations.append({
+            full_address = (str(geocoded_address).strip() if geocoded_address and str(geocoded_address).strip()
+                            else build_lead_address(address, city, state, zip_code)[0]) or 'Unknown Address'
+            leads.append({
                 'lead_id': lead_id,
                 'name': f"{first_name or ''} {last_name or ''}".strip(),
                 'email': email,
@@ -1782,25 +1616,18 @@ def generate_map_locations_from_db(leads_list, campaigns_list, date_range):
                 'company': company,
                 'phone': phone,
                 'address': full_address,
-                'street': address if address != 'None' else '',
-                'city': city if city != 'None' else '',
-                'state': state if state != 'None' else '',
-                'zip': zip_code if zip_code != 'None' else '',
-                'lat': float(lat),
-                'lng': float(lng),
+                'lat': lat,
+                'lng': lng,
                 'date_received': date_received,
-                'campaign_name': campaign_name,
-                'confidence': 1.0  # Cached coordinates are considered high confidence
+                'campaign_name': campaign_name
             })
         
-        print(f"Generated {len(lead_locations)} map locations")
-        return lead_locations
-        
+        return jsonify({'success': True, 'leads': leads})
+    except ValueError:
+        return jsonify({'success': False, 'error': 'ids must be comma-separated lead ids', 'leads': []}), 400
     except Exception as e:
-        print(f"Error in generate_map_locations_from_db: {e}")
-        import traceback
-        traceback.print_exc()
-        return []
+        print(f"Error in get_map_lead_details: {e}")
+        return jsonify({'success': False, 'error': str(e), 'leads': []})
 
 # Legacy API functions (kept for reference)
 def fetch_emailbison_leads(max_pages=5):
@@ -1810,7 +1637,7 @@ def fetch_emailbison_leads(max_pages=5):
         url = f'{EMAILBISON_DOMAIN}/api/leads'
         
         # Fetch first page to get meta info
-        response = requests.get(url, headers=EMAILBISON_HEADERS, timeout=10)
+        response = get_emailbison_client().get(url, timeout=10)
         response.raise_for_status()
         data = response.json()
         
@@ -1825,7 +1652,7 @@ def fetch_emailbison_leads(max_pages=5):
         
         # Fetch additional pages
         for page in range(2, last_page + 1):
-            response = requests.get(f'{url}?page={page}', headers=EMAILBISON_HEADERS, timeout=10)
+            response = get_emailbison_client().get(f'{url}?page={page}', timeout=10)
             if response.status_code == 200:
                 page_data = response.json()
                 if 'data' in page_data:
@@ -1840,7 +1667,7 @@ def fetch_emailbison_campaigns():
     """Fetch campaign data from EmailBison API"""
     try:
         url = f'{EMAILBISON_DOMAIN}/api/campaigns'
-        response = requests.get(url, headers=EMAILBISON_HEADERS, timeout=10)
+        response = get_emailbison_client().get(url, timeout=10)
         response.raise_for_status()
         data = response.json()
         
@@ -1860,12 +1687,12 @@ def fetch_campaign_stats_for_period(campaign_id, start_date, end_date):
             'start_date': start_date.strftime('%Y-%m-%d'),
             'end_date': end_date.strftime('%Y-%m-%d')
         }
-        response = requests.post(url, headers=EMAILBISON_HEADERS, json=payload, timeout=10)
+        response = get_emailbison_client().post(url, json=payload, timeout=10)
         response.raise_for_status()
         return response.json().get('data', {})
     except Exception as e:
         print(f"Error fetching stats for campaign {campaign_id}: {e}")
-        return {}
+        return None
 
 def calculate_metrics(leads_data, campaigns_data, date_range):
     """Calculate dashboard metrics using correct definitions"""
@@ -2150,7 +1977,7 @@ def generate_replies_over_time(campaigns_list, date_range):
                 if not replies_url.startswith('http'):
                     replies_url = f'https://{replies_url}'
                 
-                replies_response = requests.get(replies_url, headers=EMAILBISON_HEADERS)
+                replies_response = get_emailbison_client().get(replies_url)
                 
                 if replies_response.status_code == 200:
                     replies_data = replies_response.json()
@@ -2282,7 +2109,7 @@ def generate_campaign_breakdown(campaigns_list, date_range):
                 if not replies_url.startswith('http'):
                     replies_url = f'https://{replies_url}'
                 
-                replies_response = requests.get(replies_url, headers=EMAILBISON_HEADERS)
+                replies_response = get_emailbison_client().get(replies_url)
                 
                 if replies_response.status_code == 200:
                     replies_data = replies_response.json()
@@ -2367,7 +2194,7 @@ def generate_reply_status_breakdown(campaigns_list, date_range):
                 if not replies_url.startswith('http'):
                     replies_url = f'https://{replies_url}'
                 
-                replies_response = requests.get(replies_url, headers=EMAILBISON_HEADERS)
+                replies_response = get_emailbison_client().get(replies_url)
                 
                 if replies_response.status_code == 200:
                     replies_data = replies_response.json()
@@ -2444,7 +2271,7 @@ def generate_leads_by_title(leads_list, campaigns_list, date_range):
                 if not replies_url.startswith('http'):
                     replies_url = f'https://{replies_url}'
                 
-                replies_response = requests.get(replies_url, headers=EMAILBISON_HEADERS)
+                replies_response = get_emailbison_client().get(replies_url)
                 
                 if replies_response.status_code == 200:
                     replies_data = replies_response.json()
@@ -2525,7 +2352,7 @@ def generate_leads_by_location(leads_list, campaigns_list, date_range):
                 if not replies_url.startswith('http'):
                     replies_url = f'https://{replies_url}'
                 
-                replies_response = requests.get(replies_url, headers=EMAILBISON_HEADERS)
+                replies_response = get_emailbison_client().get(replies_url)
                 
                 if replies_response.status_code == 200:
                     replies_data = replies_response.json()
@@ -2583,101 +2410,70 @@ def generate_leads_by_location(leads_list, campaigns_list, date_range):
 
 @app.route('/api/geocode-leads')
 def geocode_leads():
-    """Manual endpoint to trigger geocoding for leads"""
+    """
+    Manual endpoint to trigger geocoding for leads.
+    
+    The web tier only enqueues: a refresh hint makes the sync leader's next pass place
+    leads from the offline gazetteer and queue the rest for the geocoding worker
+    (interested leads first); poll /api/geocode-progress for progress. With precise=true,
+    leads with a street address sitting at a gazetteer centroid are queued here for
+    street-level coordinates.
+    """
     try:
         db_manager = get_db_manager()
-        
-        # Get a few leads that need geocoding (prioritize interested leads)
-        leads_to_geocode = db_manager.execute_query("""
-            SELECT id, address, city, state, zip_code, interested
-            FROM leads
-            WHERE (latitude IS NULL OR longitude IS NULL)
-            AND (
-                (address IS NOT NULL AND address != '') OR
-                (city IS NOT NULL AND city != '') OR
-                (state IS NOT NULL AND state != '') OR
-                (zip_code IS NOT NULL AND zip_code != '')
-            )
-            ORDER BY interested DESC, id ASC
-            LIMIT 10
-        """)
-        
-        if not leads_to_geocode:
-            return jsonify({
-                'success': True,
-                'message': 'No leads need geocoding',
-                'geocoded_count': 0
-            })
-        
-        geocoded_count = 0
-        
-        for lead_row in leads_to_geocode:
-            lead_id, address, city, state, zip_code, interested = lead_row
-            
-            # Build complete address string: street, city, state zip
-            address_parts = []
-            
-            # Add street address if available
-            if address and str(address).strip() and address != 'None':
-                address_parts.append(str(address).strip())
-            
-            # Add city if available
-            if city and str(city).strip() and city != 'None':
-                address_parts.append(str(city).strip())
-            
-            # Add state if available
-            if state and str(state).strip() and state != 'None':
-                address_parts.append(str(state).strip())
-            
-            # Add zip code if available
-            if zip_code and str(zip_code).strip() and zip_code != 'None':
-                address_parts.append(str(zip_code).strip())
-            
-            # Form complete address string
-            full_address = ', '.join(address_parts)
-            
-            # Only geocode if we have a meaningful address (at least 2 components)
-            if len(address_parts) < 2:
-                print(f"Skipping lead {lead_id}: insufficient address data ({full_address})")
-                continue
+        precise = request.args.get('precise', 'false').lower() == 'true'
+        get_sync_manager().request_refresh()
+        
+        counts = {'queued': 0, 'from_cache': 0, 'skipped': 0}
+        if precise:
+            leads_to_geocode = db_manager.execute_query("""
+                SELECT id, address, city, state, zip_code, interested
+                FROM leads
+                WHERE geocode_source LIKE 'gazetteer%'
+                AND address IS NOT NULL AND address != ''
+            """)
             
-            if not full_address:
-                print(f"Skipping lead {lead_id}: empty address")
-                continue
-            
-            print(f"Geocoding lead {lead_id}: {full_address}")
-            
-            # Geocode the complete address
-            geocoded = geocode_address(full_address)
+            jobs = []
+            for lead_id, address, city, state, zip_code, interested in leads_to_geocode:
+                # Build complete address string: street, city, state zip
+                full_address, component_count = build_lead_address(address, city, state, zip_code)
+                
+                # Only geocode if we have a meaningful address (at least 2 components)
+                if component_count < 2:
+                    continue
+                jobs.append((lead_id, full_address, bool(interested)))
             
-            if geocoded:
-                # Update the lead with coordinates
-                db_manager.execute_query("""
-                    UPDATE leads 
-                    SET latitude = %s, longitude = %s, geocoded_address = %s, geocoded_at = NOW()
-                    WHERE id = %s
-                """, (
-                    geocoded['lat'],
-                    geocoded['lng'],
-                    geocoded['display_name'],
-                    lead_id
-                ))
-                geocoded_count += 1
-                print(f"✓ Geocoded lead {lead_id}: {full_address} → {geocoded['display_name']} (Interested: {interested})")
-            else:
-                print(f"✗ Failed to geocode lead {lead_id}: {full_address}")
+            counts = enqueue_geocode_jobs(db_manager, jobs)
         
         return jsonify({
             'success': True,
-            'message': f'Geocoded {geocoded_count} leads',
-            'geocoded_count': geocoded_count
+            'message': f"Queued {counts['queued']} leads for geocoding; the next sync places and queues the rest",
+            'refresh_queued': True,
+            'queued': counts['queued'],
+            'from_cache': counts['from_cache'],
+            'skipped': counts['skipped'],
+            'progress': geocode_queue_progress(db_manager)
         })
         
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e),
-            'geocoded_count': 0
+            'queued': 0
+        })
+
+@app.route('/api/geocode-progress')
+def get_geocode_progress():
+    """Geocoding queue status: jobs by status, leads waiting and recent throughput"""
+    try:
+        return jsonify({
+            'success': True,
+            'progress': geocode_queue_progress(get_db_manager())
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
         })
 
 @app.route('/api/custom-variables')
@@ -2685,27 +2481,23 @@ def get_custom_variables():
     """Fetch custom variables from EmailBison API to identify address-related fields"""
     try:
         url = f'{EMAILBISON_DOMAIN}/api/custom-variables'
-        response = requests.get(url, headers=EMAILBISON_HEADERS, timeout=10)
+        response = get_emailbison_client().get(url, timeout=10)
         response.raise_for_status()
         data = response.json()
         
         custom_variables = data.get('data', [])
         
-        # Filter for address-related variables
+        # Address-related variables, classified the same way the sync maps them
         address_variables = []
-        address_keywords = ['address', 'city', 'state', 'zip', 'location', 'street', 'town', 'county']
-        
         for var in custom_variables:
-            var_name = var.get('name', '').lower()
-            var_label = var.get('label', '').lower()
-            
-            # Check if variable name or label contains address-related keywords
-            if any(keyword in var_name or keyword in var_label for keyword in address_keywords):
+            role = definition_role(var)
+            if role:
                 address_variables.append({
                     'id': var.get('id'),
                     'name': var.get('name'),
                     'label': var.get('label'),
-                    'type': var.get('type')
+                    'type': var.get('type'),
+                    'role': role
                 })
         
         return jsonify({
@@ -2727,9 +2519,15 @@ def get_custom_variables():
 def sync_data():
     """Manual sync endpoint to refresh data from EmailBison API"""
     try:
-        # Trigger a manual sync
+        # Sync here only when this process runs syncs; otherwise (or if another process is
+        # the sync leader) the sync is queued for the worker
         data_sync_manager = get_sync_manager()
-        data_sync_manager.sync_data()
+        if RUN_SYNC_IN_WEB:
+            synced_here = data_sync_manager.sync_data()
+        else:
+            data_sync_manager.request_refresh()
+            synced_here = False
+        message = 'Data sync completed' if synced_here else 'Data sync queued'
         
         # Get sync status
         db_manager = get_db_manager()
@@ -2739,7 +2537,7 @@ def sync_data():
             last_sync, in_progress, error = sync_status[0]
             return jsonify({
                 'success': True,
-                'message': 'Data sync completed',
+                'message': message,
                 'last_sync': last_sync,
                 'sync_in_progress': bool(in_progress),
                 'error': error
@@ -2747,7 +2545,7 @@ def sync_data():
         else:
             return jsonify({
                 'success': True,
-                'message': 'Data sync completed',
+                'message': message,
                 'last_sync': None,
                 'sync_in_progress': False,
                 'error': None
@@ -2759,13 +2557,197 @@ def sync_data():
             'error': str(e)
         })
 
+# Searchable text per lead; must match the idx_leads_search_trgm expression (migrations/0005)
+LEAD_SEARCH_DOCUMENT = """
+    lower(coalesce(l.first_name, '') || ' ' || coalesce(l.last_name, '') || ' ' ||
+          coalesce(l.email, '') || ' ' || coalesce(l.company, '') || ' ' || coalesce(l.title, ''))
+"""
+
 @app.route('/api/leads')
 def get_leads():
-    """Get all leads with filtering and search options"""
+    """
+    Search and filter leads from the local database.
+    
+    Pagination is keyset on id: pass the previous response's next_cursor as cursor.
+    page alone still works for jumping straight to a page, and only cursor-less requests
+    count the total. Campaign, interested, replied and emails-sent filters read the
+    synced lead_campaigns rows. Until a full lead sync has completed the tables are
+    partial, so requests are proxied to EmailBison instead.
+    """
+    if not leads_fully_synced():
+        return get_leads_from_emailbison()
+    
     try:
-        from flask import request
+        search = request.args.get('search')
+        campaign = request.args.get('campaign', type=int)
+        interested = request.args.get('interested')
+        replied = request.args.get('replied')
+        emails_sent = request.args.get('filters.emails_sent')
+        created_after = request.args.get('created_after')
+        created_before = request.args.get('created_before')
+        cursor = request.args.get('cursor')
+        page = max(1, request.args.get('page', 1, type=int))
+        per_page = min(100, max(1, request.args.get('per_page', 50, type=int)))
+        
+        conditions = []
+        params = {}
+        
+        # Every search word must appear somewhere in name/email/company/title (trigram index)
+        if search:
+            for i, word in enumerate(search.lower().split()):
+                escaped = word.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+                conditions.append(f"{LEAD_SEARCH_DOCUMENT} LIKE %(search_{i})s")
+                params[f'search_{i}'] = f'%{escaped}%'
+        
+        # Per-campaign filters match any of the lead's campaigns, or only the selected one
+        campaign_scope = ''
+        if campaign:
+            campaign_scope = 'AND lc.campaign_id = %(campaign)s'
+            params['campaign'] = campaign
+            conditions.append(f"EXISTS (SELECT 1 FROM lead_campaigns lc WHERE lc.lead_id = l.id {campaign_scope})")
+        
+        if interested == 'interested':
+            conditions.append(f"""EXISTS (SELECT 1 FROM lead_campaigns lc WHERE lc.lead_id = l.id
+                                  AND lc.interested {campaign_scope})""")
+        elif interested == 'not_interested':
+            conditions.append(f"""EXISTS (SELECT 1 FROM lead_campaigns lc WHERE lc.lead_id = l.id
+                                  AND NOT lc.interested {campaign_scope})""")
+        
+        if replied == 'replied':
+            conditions.append(f"""EXISTS (SELECT 1 FROM lead_campaigns lc WHERE lc.lead_id = l.id
+                                  AND lc.replies > 0 {campaign_scope})""")
+        elif replied == 'no_replies':
+            conditions.append(f"""EXISTS (SELECT 1 FROM lead_campaigns lc WHERE lc.lead_id = l.id {campaign_scope})
+                              AND NOT EXISTS (SELECT 1 FROM lead_campaigns lc WHERE lc.lead_id = l.id
+                                              AND lc.replies > 0 {campaign_scope})""")
+        
+        # Emails sent to the lead, summed over its campaigns (or the selected campaign)
+        if emails_sent and (emails_sent.isdigit() or emails_sent == '1-3'):
+            emails_sent_total = f"""(SELECT COALESCE(SUM(lc.emails_sent), 0) FROM lead_campaigns lc
+                                    WHERE lc.lead_id = l.id {campaign_scope})"""
+            if emails_sent.isdigit():
+                conditions.append(f"{emails_sent_total} = %(emails_sent)s")
+                params['emails_sent'] = int(emails_sent)
+            else:
+                conditions.append(f"{emails_sent_total} >= 1")
+        
+        # created_at is stored as ISO text, so date prefixes compare correctly as strings
+        if created_after:
+            conditions.append("LEFT(l.created_at, 10) >= %(created_after)s")
+            params['created_after'] = created_after
+        if created_before:
+            conditions.append("LEFT(l.created_at, 10) <= %(created_before)s")
+            params['created_before'] = created_before
+        
+        where_clause = ' AND '.join(conditions) if conditions else 'true'
         
-        # Get query parameters for filtering and searching
+        page_conditions = where_clause
+        if cursor:
+            page_conditions += " AND l.id < %(after_id)s"
+            params['after_id'] = int(decode_cursor(cursor, 1)[0])
+            offset = 0
+        else:
+            offset = (page - 1) * per_page
+        params['limit'] = per_page
+        params['offset'] = offset
+        
+        db_manager = get_db_manager()
+        rows = db_manager.execute_query(f"""
+            SELECT l.id, l.first_name, l.last_name, l.email, l.title, l.company, l.phone,
+                   l.created_at, l.updated_at
+            FROM leads l
+            WHERE {page_conditions}
+            ORDER BY l.id DESC
+            LIMIT %(limit)s OFFSET %(offset)s
+        """, params)
+        # Counting every match is the expensive part; cursor pages reuse the first page's total
+        total = None
+        if not cursor:
+            total = db_manager.execute_query(f"SELECT COUNT(*) FROM leads l WHERE {where_clause}", params)[0][0]
+        
+        leads_list = []
+        for row in rows:
+            leads_list.append({
+                'id': row[0],
+                'first_name': row[1],
+                'last_name': row[2],
+                'email': row[3],
+                'title': row[4],
+                'company': row[5],
+                'phone': row[6],
+                'created_at': row[7],
+                'updated_at': row[8],
+                'formatted_created_at': format_date(row[7]) if row[7] else None,
+                'formatted_updated_at': format_date(row[8]) if row[8] else None,
+                'lead_campaign_data': []
+            })
+        
+        # Per-campaign state for the page, in EmailBison's lead_campaign_data shape
+        if leads_list:
+            campaign_rows = db_manager.execute_query("""
+                SELECT lead_id, campaign_id, status, interested, replies, emails_sent
+                FROM lead_campaigns
+                WHERE lead_id = ANY(%s)
+                ORDER BY lead_id, campaign_id DESC
+            """, ([lead['id'] for lead in leads_list],))
+            leads_by_id = {lead['id']: lead for lead in leads_list}
+            for lead_id, campaign_id, status, is_interested, replies, lead_emails_sent in campaign_rows:
+                leads_by_id[lead_id]['lead_campaign_data'].append({
+                    'campaign_id': campaign_id,
+                    'status': status,
+                    'interested': bool(is_interested),
+                    'replies': replies,
+                    'emails_sent': lead_emails_sent
+                })
+        
+        total_pages = max(1, (total + per_page - 1) // per_page) if total is not None else None
+        next_cursor = encode_cursor([leads_list[-1]['id']]) if len(leads_list) == per_page else None
+        
+        return jsonify({
+            'success': True,
+            'leads': leads_list,
+            'total': total,
+            'current_page': page,
+            'last_page': total_pages,
+            'per_page': per_page,
+            'next_cursor': next_cursor,
+            'links': {},
+            'meta': {},
+            'filters_applied': {
+                'search': search,
+                'campaign': campaign,
+                'interested': interested,
+                'replied': replied,
+                'emails_sent': emails_sent,
+                'created_after': created_after,
+                'created_before': created_before
+            }
+        })
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e), 'leads': [], 'total': 0}), 400
+    except Exception as e:
+        print(f"Error searching leads: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'leads': [],
+            'total': 0
+        })
+
+def leads_fully_synced():
+    """True once a lead sync has walked every page, i.e. leads and lead_campaigns hold the whole workspace"""
+    try:
+        rows = get_db_manager().execute_query(
+            "SELECT last_full_sync IS NOT NULL FROM sync_watermarks WHERE entity = 'leads' AND scope_id = 0"
+        )
+        return bool(rows and rows[0][0])
+    except Exception as e:
+        print(f"Error reading lead sync state: {e}")
+        return False
+
+def get_leads_from_emailbison():
+    """Proxy a leads listing to EmailBison (used until the local lead tables are fully synced)"""
+    try:
         search = request.args.get('search')
         campaign = request.args.get('campaign')
         interested = request.args.get('interested')
@@ -2773,193 +2755,98 @@ def get_leads():
         emails_sent = request.args.get('filters.emails_sent')
         created_after = request.args.get('created_after')
         created_before = request.args.get('created_before')
-        page = int(request.args.get('page', 1))
-        per_page = int(request.args.get('per_page', 50))
+        page = max(1, request.args.get('page', 1, type=int))
+        per_page = min(100, max(1, request.args.get('per_page', 50, type=int)))
         
-        # Determine which endpoint to use based on campaign filter
+        # Campaign filtering uses the campaign-specific endpoint
         if campaign:
-            # Use campaign-specific endpoint for campaign filtering
             api_url = f"{EMAILBISON_DOMAIN}/api/campaigns/{campaign}/leads"
         else:
-            # Use general leads endpoint for other filters
             api_url = f"{EMAILBISON_DOMAIN}/api/leads"
         
-        # Build query parameters based on EmailBison API documentation
-        params = {}
-        
-        # Add search parameter if provided
+        params = {'page': page, 'per_page': per_page}
         if search:
             params['search'] = search
-        
-        # Add date filters if provided
         if created_after:
             params['created_after'] = created_after
         if created_before:
             params['created_before'] = created_before
-        
-        # Add pagination parameters
-        params['page'] = page
-        params['per_page'] = per_page
-        
-        # Check if we need client-side filtering for unsupported parameters
-        needs_client_filtering = interested or replied
-        
-        # Add emails sent filter using proper EmailBison API parameters
         if emails_sent:
             if emails_sent.isdigit():
-                # Exact match for specific number (e.g., "2" -> "=2")
                 params['filters.emails_sent'] = f'={emails_sent}'
             elif emails_sent == '1-3':
-                # Range filter: >= 1 (covers 1-3 range)
                 params['filters.emails_sent'] = '>=1'
         
-        # For client-side filtering, get more data from API to ensure we have enough data to filter
+        # EmailBison cannot filter on interested/replied; fetch a larger page and filter here
+        needs_client_filtering = interested or replied
         if needs_client_filtering:
-            # For client-side filtering, we need to get a larger dataset
-            # This ensures we have enough leads to filter and paginate properly
-            if campaign:
-                # For campaign-specific endpoint, get more data per page
-                params['per_page'] = min(1000, per_page * 50)
-            else:
-                # For general leads endpoint, get more data per page
-                params['per_page'] = min(1000, per_page * 50)
+            params['page'] = 1
+            params['per_page'] = min(1000, per_page * 50)
         
-        # Don't send unsupported parameters to the API
-        # These will be handled by client-side filtering
-        
-        # Make request to EmailBison API
-        response = requests.get(api_url, headers=EMAILBISON_HEADERS, params=params)
-        
-        print(f"API Request: {api_url} with params: {params}")
-        print(f"API Response Status: {response.status_code}")
-        
-        if response.status_code == 200:
-            leads_data = response.json()
-            print(f"API Response Data: {leads_data}")
-            
-            # Debug: Check if filters are being applied by the API
-            print(f"Debug - Filters sent to API:")
-            print(f"  - search: {search}")
-            print(f"  - campaign: {campaign}")
-            print(f"  - interested: {interested} (client-side)")
-            print(f"  - replied: {replied} (client-side)")
-            print(f"  - emails_sent: {emails_sent} (API: filters.emails_sent={params.get('filters.emails_sent')})")
-            print(f"  - created_after: {created_after}")
-            print(f"  - created_before: {created_before}")
-            
-            # Debug: Check response structure
-            if 'data' in leads_data:
-                print(f"Debug - Received {len(leads_data['data'])} leads")
-                if leads_data['data']:
-                    print(f"Debug - First lead sample: {leads_data['data'][0]}")
-            else:
-                print(f"Debug - No 'data' field in response")
-                print(f"Debug - Response keys: {list(leads_data.keys())}")
-            
-            # Process leads data according to EmailBison pagination format
-            leads_list = leads_data.get('data', [])
-            meta = leads_data.get('meta', {})
-            links = leads_data.get('links', {})
-            
-            # Extract pagination info from meta field
-            current_page = meta.get('current_page', page)
-            last_page = meta.get('last_page', 1)
-            total_count = meta.get('total', len(leads_list))  # Total count across all pages
-            
-            print(f"Processed: {len(leads_list)} leads, total: {total_count}, current_page: {current_page}, last_page: {last_page}")
-            
-            # Apply client-side filtering for parameters not supported by EmailBison API
-            filtered_leads = leads_list.copy()
-            
-            # Filter by interested status
-            if interested:
-                if interested == 'interested':
-                    filtered_leads = [lead for lead in filtered_leads 
-                                    if lead.get('lead_campaign_data') and 
-                                    any(campaign_data.get('interested') == True 
-                                        for campaign_data in lead.get('lead_campaign_data', []))]
-                elif interested == 'not_interested':
-                    filtered_leads = [lead for lead in filtered_leads 
-                                    if lead.get('lead_campaign_data') and 
-                                    any(campaign_data.get('interested') == False 
-                                        for campaign_data in lead.get('lead_campaign_data', []))]
-            
-            # Filter by replied status
-            if replied:
-                if replied == 'replied':
-                    filtered_leads = [lead for lead in filtered_leads 
-                                    if lead.get('lead_campaign_data') and 
-                                    any(campaign_data.get('replies', 0) > 0 
-                                        for campaign_data in lead.get('lead_campaign_data', []))]
-                elif replied == 'no_replies':
-                    filtered_leads = [lead for lead in filtered_leads 
-                                    if lead.get('lead_campaign_data') and 
-                                    all(campaign_data.get('replies', 0) == 0 
-                                        for campaign_data in lead.get('lead_campaign_data', []))]
-            
-            # Emails sent filtering is now handled by EmailBison API using proper parameters
-            # No client-side filtering needed for emails_sent
-            
-            # Apply client-side pagination if we did client-side filtering
-            # Note: emails_sent is now handled by API, so only interested/replied need client-side filtering
-            if needs_client_filtering:
-                total_filtered = len(filtered_leads)
-                start_index = (page - 1) * per_page
-                end_index = start_index + per_page
-                paginated_leads = filtered_leads[start_index:end_index]
-                total_pages = max(1, (total_filtered + per_page - 1) // per_page)  # Ceiling division, minimum 1 page
-                
-                # Ensure page number is within valid range
-                if page > total_pages:
-                    page = total_pages
-                    start_index = (page - 1) * per_page
-                    end_index = start_index + per_page
-                    paginated_leads = filtered_leads[start_index:end_index]
-                
-                print(f"Client-side filtering: {total_filtered} total, page {page}/{total_pages}, showing {len(paginated_leads)} leads")
-                print(f"Pagination details: start_index={start_index}, end_index={end_index}, per_page={per_page}")
-            else:
-                paginated_leads = filtered_leads
-                total_filtered = total_count
-                total_pages = last_page
-                print(f"API pagination: {total_filtered} total, page {page}/{total_pages}, showing {len(paginated_leads)} leads")
-            
-            # Format dates
-            for lead in paginated_leads:
-                if lead.get('created_at'):
-                    lead['formatted_created_at'] = format_date(lead['created_at'])
-                if lead.get('updated_at'):
-                    lead['formatted_updated_at'] = format_date(lead['updated_at'])
-            
-            return jsonify({
-                'success': True,
-                'leads': paginated_leads,
-                'total': total_filtered,
-                'current_page': page,
-                'last_page': total_pages,
-                'per_page': per_page,
-                'links': links,
-                'meta': meta,
-                'filters_applied': {
-                    'search': search,
-                    'campaign': campaign,
-                    'interested': interested,
-                    'replied': replied,
-                    'emails_sent': emails_sent,
-                    'created_after': created_after,
-                    'created_before': created_before
-                }
-            })
-        else:
+        response = get_emailbison_client().get(api_url, params=params)
+        if response.status_code != 200:
             return jsonify({
                 'success': False,
                 'error': f'API request failed with status {response.status_code}',
                 'leads': [],
                 'total': 0
             })
+        
+        leads_data = response.json()
+        leads_list = leads_data.get('data', [])
+        meta = leads_data.get('meta', {})
+        
+        if needs_client_filtering:
+            def campaign_data(lead):
+                return lead.get('lead_campaign_data') or []
             
+            if interested == 'interested':
+                leads_list = [lead for lead in leads_list if any(data.get('interested') for data in campaign_data(lead))]
+            elif interested == 'not_interested':
+                leads_list = [lead for lead in leads_list
+                              if campaign_data(lead) and any(data.get('interested') is False for data in campaign_data(lead))]
+            if replied == 'replied':
+                leads_list = [lead for lead in leads_list if any((data.get('replies') or 0) > 0 for data in campaign_data(lead))]
+            elif replied == 'no_replies':
+                leads_list = [lead for lead in leads_list
+                              if campaign_data(lead) and all((data.get('replies') or 0) == 0 for data in campaign_data(lead))]
+            
+            total = len(leads_list)
+            total_pages = max(1, (total + per_page - 1) // per_page)
+            page = min(page, total_pages)
+            leads_list = leads_list[(page - 1) * per_page:page * per_page]
+        else:
+            total = meta.get('total', len(leads_list))
+            total_pages = meta.get('last_page', 1)
+        
+        for lead in leads_list:
+            if lead.get('created_at'):
+                lead['formatted_created_at'] = format_date(lead['created_at'])
+            if lead.get('updated_at'):
+                lead['formatted_updated_at'] = format_date(lead['updated_at'])
+        
+        return jsonify({
+            'success': True,
+            'leads': leads_list,
+            'total': total,
+            'current_page': page,
+            'last_page': total_pages,
+            'per_page': per_page,
+            'next_cursor': None,
+            'links': leads_data.get('links', {}),
+            'meta': meta,
+            'filters_applied': {
+                'search': search,
+                'campaign': campaign,
+                'interested': interested,
+                'replied': replied,
+                'emails_sent': emails_sent,
+                'created_after': created_after,
+                'created_before': created_before
+            }
+        })
     except Exception as e:
-        print(f"Error fetching leads data: {e}")
+        print(f"Error fetching leads from EmailBison: {e}")
         return jsonify({
             'success': False,
             'error': str(e),
@@ -2977,7 +2864,7 @@ def get_lead_detail(lead_id):
         print(f"API Request: {api_url}")
         
         # Make request to EmailBison API
-        response = requests.get(api_url, headers=EMAILBISON_HEADERS)
+        response = get_emailbison_client().get(api_url)
         
         print(f"API Response Status: {response.status_code}")
         
@@ -3024,7 +2911,7 @@ def get_lead_sent_emails(lead_id):
     """Get sent emails for a specific lead"""
     try:
         url = f"{EMAILBISON_DOMAIN}/api/leads/{lead_id}/sent-emails"
-        response = requests.get(url, headers=EMAILBISON_HEADERS)
+        response = get_emailbison_client().get(url)
         
         if response.status_code == 200:
             return response.json()
@@ -3039,7 +2926,7 @@ def get_lead_replies(lead_id):
     """Get replies for a specific lead"""
     try:
         url = f"{EMAILBISON_DOMAIN}/api/leads/{lead_id}/replies"
-        response = requests.get(url, headers=EMAILBISON_HEADERS)
+        response = get_emailbison_client().get(url)
         
         if response.status_code == 200:
             return response.json()
@@ -3050,10 +2937,10 @@ def get_lead_replies(lead_id):
         return jsonify({'error': str(e)}), 500
 
 if __name__ == '__main__':
-    # Initialize database and start background sync
+    # Initialize database and start background sync (syncs immediately), as a one-process dev server
     print("Initializing database and starting background sync...")
     data_sync_manager = get_sync_manager()
-    data_sync_manager.sync_data()  # Initial sync
+    data_sync_manager.start_background_sync()
     print("Starting Flask app...")
     app.run(host='0.0.0.0', port=5000, debug=True)
 
@@ -0,0 +1,40 @@
+import argparse
+import sys
+import time
+
+from app import app, dashboard_cache
+from supabase_manager_postgres_backup import get_db_manager
+
+def main():
+    """
+    Query-count regression check for the dashboard: requests /api/dashboard-data for each
+    timeframe with a cold dashboard cache against DATABASE_URL and reports the X-DB-Queries
+    header and wall time. A cold load should stay at about five queries however many campaigns
+    exist (see Query Counting in ARCHITECTURE.md); exits non-zero above --max-queries.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--timeframes', default='7d,mtd,lm', help='comma-separated dashboard timeframes')
+    parser.add_argument('--max-queries', type=int, default=10, help='fail above this many queries per load')
+    args = parser.parse_args()
+
+    campaign_count = get_db_manager().execute_query("SELECT COUNT(*) FROM campaigns")[0][0]
+    print(f"{campaign_count} campaigns in the database")
+
+    failed = False
+    with app.test_client() as client:
+        for timeframe in args.timeframes.split(','):
+            dashboard_cache.clear()
+            started = time.perf_counter()
+            response = client.get('/api/dashboard-data', query_string={'timeframe': timeframe})
+            elapsed = time.perf_counter() - started
+            queries = int(response.headers.get('X-DB-Queries', 0))
+            payload = response.get_json() or {}
+            partial = (payload.get('timed_out_sections') or []) + (payload.get('failed_sections') or [])
+            print(f"{timeframe:>4}: {queries} queries, {elapsed:.2f}s"
+                  + (f", partial: {', '.join(partial)}" if partial else ''))
+            failed = failed or queries > args.max_queries
+
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,141 @@
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# EmailBison API configuration
+EMAILBISON_DOMAIN = os.environ.get('EMAILBISON_DOMAIN', 'https://send.longrun.agency')
+EMAILBISON_API_KEY = os.environ.get('EMAILBISON_API_KEY', '5|LJwTR33haOeU6bSlBGU08roquoklOlZg3CsNgEMtdd040014')
+EMAILBISON_HEADERS = {
+    'Authorization': f'Bearer {EMAILBISON_API_KEY}',
+    'Accept': 'application/json',
+    'Accept-Encoding': 'gzip, deflate'
+}
+
+# Connection pool and timeout defaults shared by every EmailBison call
+EMAILBISON_POOL_SIZE = int(os.environ.get('EMAILBISON_POOL_SIZE', '20'))
+EMAILBISON_CONNECT_TIMEOUT = float(os.environ.get('EMAILBISON_CONNECT_TIMEOUT', '5'))
+EMAILBISON_READ_TIMEOUT = float(os.environ.get('EMAILBISON_READ_TIMEOUT', '20'))
+EMAILBISON_MAX_RETRIES = int(os.environ.get('EMAILBISON_MAX_RETRIES', '2'))
+
+# Request budget for throttled (background sync) calls
+EMAILBISON_MAX_REQUESTS_PER_SECOND = float(os.environ.get('EMAILBISON_MAX_REQUESTS_PER_SECOND', '5'))
+
+# Responses worth retrying: rate limited or a transient upstream failure
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+RETRY_BACKOFF_BASE = 0.5
+RETRY_BACKOFF_MAX = 10.0
+
+class RateLimiter:
+    """Thread-safe token bucket allowing ``rate`` acquisitions per second, bursting up to ``capacity``"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class EmailBisonClient:
+    """Keep-alive HTTP client for the EmailBison API with timeouts and retry/backoff"""
+
+    def __init__(self, domain=EMAILBISON_DOMAIN, headers=EMAILBISON_HEADERS,
+                 pool_size=EMAILBISON_POOL_SIZE, max_retries=EMAILBISON_MAX_RETRIES,
+                 rate_limiter=None):
+        self.domain = domain.rstrip('/')
+        self.max_retries = max_retries
+        self.timeout = (EMAILBISON_CONNECT_TIMEOUT, EMAILBISON_READ_TIMEOUT)
+        self.rate_limiter = rate_limiter or RateLimiter(EMAILBISON_MAX_REQUESTS_PER_SECOND)
+
+        # One pooled session reuses TLS connections to the EmailBison host across threads
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def url(self, path):
+        """Resolve an API path (or an absolute URL) against the EmailBison domain"""
+        if path.startswith('http://') or path.startswith('https://'):
+            return path
+        return f'{self.domain}/{path.lstrip("/")}'
+
+    def request(self, method, path, params=None, json=None, timeout=None, throttle=False, retries=None):
+        """Send a request, retrying connection errors and 429/5xx responses with jittered backoff.
+
+        ``timeout`` may be a single number or a (connect, read) tuple. Read timeouts are
+        not retried so a slow upstream cannot hold a worker for more than one timeout.
+        ``throttle`` routes the call through the shared rate limiter (used by background sync).
+        """
+        retries = self.max_retries if retries is None else retries
+        url = self.url(path)
+
+        for attempt in range(retries + 1):
+            if throttle:
+                self.rate_limiter.acquire()
+
+            try:
+                response = self.session.request(method, url, params=params, json=json,
+                                                timeout=timeout or self.timeout)
+            except requests.ConnectionError as e:
+                if attempt >= retries:
+                    raise
+                print(f"EmailBison connection error on {method} {url}, retrying: {e}")
+                time.sleep(_backoff_delay(attempt))
+                continue
+
+            if response.status_code in RETRY_STATUS_CODES and attempt < retries:
+                delay = _retry_after_seconds(response)
+                if delay is None:
+                    delay = _backoff_delay(attempt)
+                print(f"EmailBison returned {response.status_code} on {method} {url}, retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            return response
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+def _backoff_delay(attempt):
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * (2 ** (attempt + 1))))
+
+def _retry_after_seconds(response):
+    """Seconds requested by a Retry-After header, if it is given as a number"""
+    retry_after = response.headers.get('Retry-After', '').strip()
+    if retry_after.isdigit():
+        return min(RETRY_BACKOFF_MAX, float(retry_after))
+    return None
+
+# Global EmailBison client
+emailbison_client = None
+_client_lock = threading.Lock()
+
+def get_emailbison_client():
+    """Get or create the shared EmailBison client"""
+    global emailbison_client
+    if emailbison_client is None:
+        with _client_lock:
+            if emailbison_client is None:
+                emailbison_client = EmailBisonClient()
+    return emailbison_client
@@ -0,0 +1,152 @@
+import csv
+import gzip
+import os
+import re
+import sys
+import threading
+
+# Offline US ZIP centroids (see data/README.md for source and license)
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'us_zip_centroids.csv.gz')
+
+US_STATE_CODES = {
+    'alabama': 'AL', 'alaska': 'AK', 'arizona': 'AZ', 'arkansas': 'AR', 'california': 'CA',
+    'colorado': 'CO', 'connecticut': 'CT', 'delaware': 'DE', 'district of columbia': 'DC',
+    'florida': 'FL', 'georgia': 'GA', 'hawaii': 'HI', 'idaho': 'ID', 'illinois': 'IL',
+    'indiana': 'IN', 'iowa': 'IA', 'kansas': 'KS', 'kentucky': 'KY', 'louisiana': 'LA',
+    'maine': 'ME', 'maryland': 'MD', 'massachusetts': 'MA', 'michigan': 'MI', 'minnesota': 'MN',
+    'mississippi': 'MS', 'missouri': 'MO', 'montana': 'MT', 'nebraska': 'NE', 'nevada': 'NV',
+    'new hampshire': 'NH', 'new jersey': 'NJ', 'new mexico': 'NM', 'new york': 'NY',
+    'north carolina': 'NC', 'north dakota': 'ND', 'ohio': 'OH', 'oklahoma': 'OK', 'oregon': 'OR',
+    'pennsylvania': 'PA', 'rhode island': 'RI', 'south carolina': 'SC', 'south dakota': 'SD',
+    'tennessee': 'TN', 'texas': 'TX', 'utah': 'UT', 'vermont': 'VT', 'virginia': 'VA',
+    'washington': 'WA', 'west virginia': 'WV', 'wisconsin': 'WI', 'wyoming': 'WY',
+    'puerto rico': 'PR', 'guam': 'GU', 'virgin islands': 'VI', 'american samoa': 'AS',
+    'northern mariana islands': 'MP', 'washington dc': 'DC', 'washington d.c.': 'DC'
+}
+US_STATE_ABBREVIATIONS = set(US_STATE_CODES.values())
+
+# A ZIP (optionally ZIP+4) at the end of a comma-separated address part
+ZIP_PATTERN = re.compile(r'(?:^|\s)(\d{5})(?:-\d{4})?$')
+
+# Without a state, a ZIP is trusted when the lead's city centroid lies within this many degrees of it
+ZIP_CITY_MAX_DEGREES = 0.5
+
+_index = None
+_index_lock = threading.Lock()
+
+def _load_index():
+    """Read the bundled file once into {zip: (lat, lng, city, state)} and {(city, state): (lat, lng)}"""
+    global _index
+    if _index is not None:
+        return _index
+
+    with _index_lock:
+        if _index is not None:
+            return _index
+
+        zips = {}
+        city_sums = {}
+        with gzip.open(GAZETTEER_PATH, 'rt', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                lat, lng = float(row['lat']), float(row['lng'])
+                state = sys.intern(row['state'])
+                zips[row['zip']] = (lat, lng, sys.intern(row['city']), state)
+
+                # City centroid = mean of the ZIP centroids that use the name
+                names = [row['city']] + [name for name in row['other_cities'].split('|') if name]
+                for name in names:
+                    total = city_sums.setdefault((sys.intern(name.lower()), state), [0.0, 0.0, 0])
+                    total[0] += lat
+                    total[1] += lng
+                    total[2] += 1
+
+        cities = {key: (round(lat_sum / count, 4), round(lng_sum / count, 4))
+                  for key, (lat_sum, lng_sum, count) in city_sums.items()}
+        _index = (zips, cities)
+        print(f"Loaded gazetteer: {len(zips)} ZIP codes, {len(cities)} places")
+        return _index
+
+def normalize_state(state):
+    """Two-letter state code from a code or full name, or None"""
+    if not state:
+        return None
+    state = str(state).strip().rstrip('.')
+    if state.upper() in US_STATE_ABBREVIATIONS:
+        return state.upper()
+    return US_STATE_CODES.get(state.lower())
+
+def parse_address_text(text):
+    """
+    Best-effort (city, state, zip) from a free-text address such as
+    "123 Main St, Austin, TX 78701" or "Austin, Texas".
+    """
+    parts = [part.strip() for part in str(text or '').split(',') if part.strip()]
+    city = state = zip_code = None
+
+    for i in range(len(parts) - 1, -1, -1):
+        part = parts[i]
+        zip_match = ZIP_PATTERN.search(part)
+        if zip_match and not zip_code:
+            zip_code = zip_match.group(1)
+            part = part[:zip_match.start()].strip()
+            if not part:
+                continue
+        part_state = normalize_state(part)
+        if part_state and not state:
+            state = part_state
+            if i > 0:
+                city = parts[i - 1]
+            break
+
+    return city, state, zip_code
+
+def lookup_centroid(address=None, city=None, state=None, zip_code=None):
+    """
+    Resolve a lead to a ZIP or city centroid from the bundled gazetteer, without network.
+
+    Structured fields win; anything missing is parsed from the address text. A ZIP is only
+    trusted when the lead's state is empty or is that ZIP's state, since other countries
+    use five-digit postal codes too (Berlin 10115, Paris 75001); a state that is not a US
+    state means the lead is not in the US. Returns a geocode result dict with 'precision'
+    of 'zip' or 'city', or None when neither matches.
+    """
+    zips, cities = _load_index()
+
+    state_code = normalize_state(state)
+    if state and str(state).strip() and not state_code:
+        return None
+    zip5 = None
+    if zip_code:
+        zip_match = re.match(r'\s*(\d{5})', str(zip_code))
+        zip5 = zip_match.group(1) if zip_match else None
+
+    if address and not (zip5 and zip5 in zips) and not (city and state_code):
+        parsed_city, parsed_state, parsed_zip = parse_address_text(address)
+        # A bare five-digit number in free text is only a US ZIP next to a US state
+        zip5 = zip5 or (parsed_zip if state_code or parsed_state else None)
+        state_code = state_code or parsed_state
+        city = city or parsed_city
+
+    if zip5 and zip5 in zips:
+        lat, lng, zip_city, zip_state = zips[zip5]
+        if state_code:
+            zip_matches = state_code == zip_state
+        elif city:
+            # No state to check against: the city must be a place in the ZIP's state near the
+            # ZIP (Paris 75001 is not Paris, TX, which is nowhere near Addison's 75001)
+            place = cities.get((str(city).strip().lower(), zip_state))
+            zip_matches = (place is not None and abs(place[0] - lat) <= ZIP_CITY_MAX_DEGREES
+                           and abs(place[1] - lng) <= ZIP_CITY_MAX_DEGREES)
+        else:
+            zip_matches = True
+        if zip_matches:
+            return {'lat': lat, 'lng': lng, 'display_name': f"{zip_city}, {zip_state} {zip5}",
+                    'confidence': 0, 'precision': 'zip'}
+
+    if city and state_code:
+        place = cities.get((str(city).strip().lower(), state_code))
+        if place:
+            return {'lat': place[0], 'lng': place[1], 'display_name': f"{str(city).strip()}, {state_code}",
+                    'confidence': 0, 'precision': 'city'}
+
+    return None
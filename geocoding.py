@@ -0,0 +1,423 @@
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+from emailbison_client import RateLimiter
+from gazetteer import lookup_centroid
+
+# Nominatim (OpenStreetMap) search endpoint and the identification its usage policy asks for
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+NOMINATIM_HEADERS = {
+    'User-Agent': 'LongRun Reports App/1.0 (contact@longrun.agency)'
+}
+GEOCODE_PROVIDER = 'nominatim'
+# Nominatim countrycodes filter for queued lookups, shared by every path that enqueues so
+# jobs for the same address always run the same query (empty: search worldwide)
+GEOCODE_COUNTRY_CODES = os.environ.get('GEOCODE_COUNTRY_CODES', 'us') or None
+
+# How long a failed lookup is remembered before the address is tried upstream again.
+# "Not found" is a stable answer; errors (timeouts, 5xx, rate limiting) usually are not.
+GEOCODE_NOT_FOUND_RETRY_DAYS = int(os.environ.get('GEOCODE_NOT_FOUND_RETRY_DAYS', '30'))
+GEOCODE_ERROR_RETRY_MINUTES = int(os.environ.get('GEOCODE_ERROR_RETRY_MINUTES', '60'))
+
+# Geocoding worker: Nominatim's usage policy allows at most one request per second
+GEOCODE_MAX_REQUESTS_PER_SECOND = float(os.environ.get('GEOCODE_MAX_REQUESTS_PER_SECOND', '1'))
+GEOCODE_IDLE_POLL_SECONDS = 30
+# Jobs left 'running' this long (e.g. the process died mid-job) are handed out again;
+# the check runs this often, whether or not the queue is empty
+GEOCODE_STALE_JOB_MINUTES = 10
+GEOCODE_STALE_CHECK_SECONDS = 60
+# Finished jobs kept for progress metrics
+GEOCODE_JOB_RETENTION_DAYS = 7
+
+ZIP_PLUS_FOUR_PATTERN = re.compile(r'\b(\d{5})-\d{4}\b')
+ADDRESS_PUNCTUATION_PATTERN = re.compile(r"[^\w\s,#-]")
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+def normalize_address(address_string):
+    """
+    Cache key for an address: lowercase, punctuation and ZIP+4 suffix dropped,
+    whitespace collapsed and empty comma-separated parts removed, so
+    "123 Main St., Austin, TX 78701-1234" and "123 main st, austin,  tx 78701" share one entry.
+    """
+    if not address_string:
+        return ''
+
+    text = ZIP_PLUS_FOUR_PATTERN.sub(r'\1', str(address_string).lower())
+    text = ADDRESS_PUNCTUATION_PATTERN.sub('', text)
+    parts = [WHITESPACE_PATTERN.sub(' ', part).strip() for part in text.split(',')]
+    return ', '.join(part for part in parts if part and part != 'none')
+
+def build_lead_address(address, city, state, zip_code):
+    """Return (full_address, component_count) from a lead's street, city, state and zip"""
+    address_parts = []
+    for part in (address, city, state, zip_code):
+        if part and str(part).strip() and part != 'None':
+            address_parts.append(str(part).strip())
+    return ', '.join(address_parts), len(address_parts)
+
+def lookup_nominatim(address_string, country_codes=None, rate_limiter=None):
+    """
+    Query Nominatim for an address, falling back to simpler city/state formats.
+
+    Returns (result, status) where status is 'found', 'not_found' or 'error'
+    ('error' only when no format was found and at least one request failed).
+    Each request first takes a token from ``rate_limiter`` when one is given.
+    """
+    address_string = str(address_string).strip()
+
+    # Try different address formats for better geocoding success
+    address_formats = [address_string]
+
+    # If we have a full address, try simpler formats
+    if ',' in address_string:
+        parts = [part.strip() for part in address_string.split(',')]
+        if len(parts) >= 3:
+            # Try city, state zip format
+            address_formats.append(f"{parts[1]}, {parts[2]}")
+            # Try city, state format
+            address_formats.append(f"{parts[1]}, {parts[2].split()[0] if parts[2] else ''}")
+
+    had_error = False
+    for address_format in dict.fromkeys(address_formats):
+        if not address_format.strip(' ,'):
+            continue
+
+        params = {
+            'q': address_format,
+            'format': 'json',
+            'limit': 1,
+            'addressdetails': 1
+        }
+        if country_codes:
+            params['countrycodes'] = country_codes
+
+        try:
+            if rate_limiter:
+                rate_limiter.acquire()
+            response = requests.get(NOMINATIM_URL, params=params, headers=NOMINATIM_HEADERS, timeout=5)
+            response.raise_for_status()
+            data = response.json()
+
+            if data and len(data) > 0:
+                result = data[0]
+                return {
+                    'lat': float(result['lat']),
+                    'lng': float(result['lon']),
+                    'display_name': result.get('display_name', ''),
+                    'confidence': result.get('importance', 0),
+                    'place_id': result.get('place_id')
+                }, 'found'
+        except Exception as e:
+            print(f"Error geocoding address format '{address_format}': {e}")
+            had_error = True
+
+    return None, 'error' if had_error else 'not_found'
+
+def geocode_address_cached(db_manager, address_string, country_codes=None, rate_limiter=None):
+    """
+    Geocode an address through the geocode_cache table, asking Nominatim only on a miss.
+
+    Returns (result, called_upstream). Found addresses are served from the cache forever;
+    not-found and failed lookups are remembered until their retry_after passes, so the
+    same bad address is not sent upstream on every sync. Upstream requests are paced
+    by ``rate_limiter``.
+    """
+    address_key = normalize_address(address_string)
+    if not address_key:
+        return None, False
+
+    cached = db_manager.execute_query("""
+        SELECT status, latitude, longitude, display_name, confidence, retry_after
+        FROM geocode_cache
+        WHERE address_key = %s
+    """, (address_key,))
+
+    if cached:
+        status, lat, lng, display_name, confidence, retry_after = cached[0]
+        if status == 'found':
+            return {
+                'lat': float(lat),
+                'lng': float(lng),
+                'display_name': display_name or '',
+                'confidence': confidence or 0
+            }, False
+        if retry_after and retry_after > datetime.now(timezone.utc):
+            return None, False
+
+    try:
+        result, status = lookup_nominatim(address_string, country_codes, rate_limiter)
+    except Exception as e:
+        print(f"Error geocoding address '{address_string}': {e}")
+        result, status = None, 'error'
+
+    retry_after = None
+    if status == 'not_found':
+        retry_after = datetime.now(timezone.utc) + timedelta(days=GEOCODE_NOT_FOUND_RETRY_DAYS)
+    elif status == 'error':
+        retry_after = datetime.now(timezone.utc) + timedelta(minutes=GEOCODE_ERROR_RETRY_MINUTES)
+
+    try:
+        db_manager.execute_query("""
+            INSERT INTO geocode_cache (address_key, query, status, latitude, longitude, display_name,
+                                       confidence, provider, provider_place_id, retry_after)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (address_key) DO UPDATE SET
+                query = EXCLUDED.query,
+                status = EXCLUDED.status,
+                latitude = EXCLUDED.latitude,
+                longitude = EXCLUDED.longitude,
+                display_name = EXCLUDED.display_name,
+                confidence = EXCLUDED.confidence,
+                provider = EXCLUDED.provider,
+                provider_place_id = EXCLUDED.provider_place_id,
+                retry_after = EXCLUDED.retry_after,
+                attempts = geocode_cache.attempts + 1,
+                updated_at = NOW()
+        """, (
+            address_key,
+            str(address_string).strip(),
+            status,
+            result['lat'] if result else None,
+            result['lng'] if result else None,
+            result['display_name'] if result else None,
+            result['confidence'] if result else None,
+            GEOCODE_PROVIDER,
+            str(result['place_id']) if result and result.get('place_id') is not None else None,
+            retry_after
+        ))
+    except Exception as e:
+        print(f"Error caching geocode result for '{address_key}': {e}")
+
+    return result, True
+
+def locate_leads_offline(db_manager):
+    """
+    Place every lead still missing coordinates at its ZIP or city centroid from the bundled
+    gazetteer. No network and no pacing, so it covers all leads in one pass; Nominatim is
+    left for leads the gazetteer cannot place and for explicit street-level requests.
+    Returns the number of leads located.
+    """
+    leads_to_locate = db_manager.execute_query("""
+        SELECT id, address, city, state, zip_code, geocoded_address
+        FROM leads
+        WHERE (latitude IS NULL OR longitude IS NULL)
+        AND (
+            (city IS NOT NULL AND city != '') OR
+            (zip_code IS NOT NULL AND zip_code != '') OR
+            (geocoded_address IS NOT NULL AND geocoded_address != '')
+        )
+    """)
+
+    located = []
+    for lead_id, address, city, state, zip_code, geocoded_address in leads_to_locate:
+        # geocoded_address holds the comprehensive address assembled from custom variables
+        address_text = geocoded_address or build_lead_address(address, city, state, zip_code)[0]
+        centroid = lookup_centroid(address=address_text, city=city, state=state, zip_code=zip_code)
+        if centroid:
+            located.append((lead_id, centroid['lat'], centroid['lng'], f"gazetteer_{centroid['precision']}"))
+
+    if located:
+        db_manager.bulk_upsert("""
+            UPDATE leads
+            SET latitude = v.lat, longitude = v.lng, geocoded_at = NOW(), geocode_source = v.source
+            FROM (VALUES %s) AS v(id, lat, lng, source)
+            WHERE leads.id = v.id
+        """, located)
+
+    print(f"Located {len(located)} of {len(leads_to_locate)} leads from the offline gazetteer")
+    return len(located)
+
+def enqueue_geocode_jobs(db_manager, leads, country_codes=GEOCODE_COUNTRY_CODES):
+    """
+    Queue Nominatim lookups for leads, given as [(lead_id, address_string, interested)].
+
+    Leads sharing a normalized address share one job; a job serving any interested lead
+    is prioritized. Addresses already in geocode_cache are settled here without a job:
+    found ones are written to their leads, failed ones wait for their retry_after.
+    Returns {'queued', 'from_cache', 'skipped'} lead counts.
+    """
+    jobs = {}
+    for lead_id, address_string, interested in leads:
+        address_key = normalize_address(address_string)
+        if not address_key:
+            continue
+        job = jobs.setdefault(address_key, {'query': str(address_string).strip(), 'lead_ids': [], 'priority': 0})
+        job['lead_ids'].append(lead_id)
+        if interested:
+            job['priority'] = 1
+
+    counts = {'queued': 0, 'from_cache': 0, 'skipped': 0}
+    if not jobs:
+        return counts
+
+    cached_rows = db_manager.execute_query("""
+        SELECT address_key, status, latitude, longitude, display_name,
+               status = 'found' OR retry_after > NOW() AS settled
+        FROM geocode_cache
+        WHERE address_key = ANY(%s)
+    """, (list(jobs),))
+
+    found_updates = []
+    for address_key, status, lat, lng, display_name, settled in cached_rows:
+        if not settled:
+            continue
+        job = jobs.pop(address_key)
+        if status == 'found':
+            found_updates.extend((lead_id, lat, lng, display_name, GEOCODE_PROVIDER) for lead_id in job['lead_ids'])
+            counts['from_cache'] += len(job['lead_ids'])
+        else:
+            counts['skipped'] += len(job['lead_ids'])
+
+    if found_updates:
+        db_manager.bulk_upsert("""
+            UPDATE leads
+            SET latitude = v.lat, longitude = v.lng, geocoded_address = v.display_name,
+                geocoded_at = NOW(), geocode_source = v.source
+            FROM (VALUES %s) AS v(id, lat, lng, display_name, source)
+            WHERE leads.id = v.id
+        """, found_updates)
+
+    if jobs:
+        # Re-queueing an address merges lead ids; a job already running keeps running
+        db_manager.bulk_upsert("""
+            INSERT INTO geocode_jobs (address_key, query, country_codes, lead_ids, priority)
+            VALUES %s
+            ON CONFLICT (address_key) DO UPDATE SET
+                lead_ids = ARRAY(SELECT DISTINCT unnest(geocode_jobs.lead_ids || EXCLUDED.lead_ids)),
+                priority = GREATEST(geocode_jobs.priority, EXCLUDED.priority),
+                status = CASE WHEN geocode_jobs.status = 'running' THEN 'running' ELSE 'pending' END,
+                enqueued_at = CASE WHEN geocode_jobs.status IN ('done', 'failed') THEN NOW()
+                                   ELSE geocode_jobs.enqueued_at END
+        """, [(address_key, job['query'], country_codes, job['lead_ids'], job['priority'])
+              for address_key, job in jobs.items()],
+            template="(%s, %s, %s, %s::integer[], %s)")
+        counts['queued'] = sum(len(job['lead_ids']) for job in jobs.values())
+        geocode_jobs_available.set()
+
+    return counts
+
+def geocode_queue_progress(db_manager):
+    """Job counts by status plus recent throughput, for the progress endpoint"""
+    rows = db_manager.execute_query("""
+        SELECT status, COUNT(*), COALESCE(SUM(cardinality(lead_ids)), 0),
+               EXTRACT(EPOCH FROM NOW() - MIN(enqueued_at)),
+               COUNT(*) FILTER (WHERE finished_at > NOW() - INTERVAL '1 hour')
+        FROM geocode_jobs
+        GROUP BY status
+    """)
+
+    progress = {
+        'jobs': {'pending': 0, 'running': 0, 'done': 0, 'failed': 0},
+        'leads_waiting': 0,
+        'oldest_pending_seconds': None,
+        'finished_last_hour': 0,
+        'max_requests_per_second': GEOCODE_MAX_REQUESTS_PER_SECOND
+    }
+    for status, job_count, lead_count, oldest_seconds, finished_last_hour in rows:
+        progress['jobs'][status] = job_count
+        progress['finished_last_hour'] += finished_last_hour
+        if status in ('pending', 'running'):
+            progress['leads_waiting'] += lead_count
+        if status == 'pending' and oldest_seconds is not None:
+            progress['oldest_pending_seconds'] = int(oldest_seconds)
+    return progress
+
+# Set when jobs are queued so an idle worker in this process starts right away
+geocode_jobs_available = threading.Event()
+
+class GeocodeWorker:
+    """
+    Single background thread draining geocode_jobs: highest priority first, one address
+    per job, upstream requests paced by a token bucket. Jobs are claimed with
+    FOR UPDATE SKIP LOCKED, so workers in several processes never share a job.
+    """
+
+    def __init__(self, db_manager, rate=GEOCODE_MAX_REQUESTS_PER_SECOND, is_active=None):
+        self.db_manager = db_manager
+        self.rate_limiter = RateLimiter(rate, capacity=1)
+        # Optional callable; the worker idles while it returns False (e.g. not the sync leader)
+        self.is_active = is_active
+        self.thread = None
+
+    def start(self):
+        """Start the worker thread"""
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+            print("Geocoding worker started")
+
+    def _run(self):
+        last_stale_check = None
+        while True:
+            try:
+                if self.is_active is not None and not self.is_active():
+                    time.sleep(GEOCODE_IDLE_POLL_SECONDS)
+                    continue
+                # On a timer rather than only when idle: a steady backlog would otherwise
+                # leave jobs orphaned by a dead worker 'running' until the queue drained
+                if last_stale_check is None or time.monotonic() - last_stale_check >= GEOCODE_STALE_CHECK_SECONDS:
+                    last_stale_check = time.monotonic()
+                    self._release_stale_jobs()
+                if not self.process_next_job():
+                    geocode_jobs_available.wait(timeout=GEOCODE_IDLE_POLL_SECONDS)
+                    geocode_jobs_available.clear()
+            except Exception as e:
+                print(f"Geocoding worker error: {e}")
+                time.sleep(GEOCODE_IDLE_POLL_SECONDS)
+
+    def process_next_job(self):
+        """Claim and run the next pending job; returns False when the queue is empty"""
+        claimed = self.db_manager.execute_query("""
+            UPDATE geocode_jobs
+            SET status = 'running', started_at = NOW(), attempts = attempts + 1
+            WHERE address_key = (
+                SELECT address_key FROM geocode_jobs
+                WHERE status = 'pending'
+                ORDER BY priority DESC, enqueued_at
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING address_key, query, country_codes
+        """)
+        if not claimed:
+            return False
+
+        address_key, query, country_codes = claimed[0]
+        try:
+            geocoded, _ = geocode_address_cached(self.db_manager, query, country_codes, self.rate_limiter)
+        except Exception as e:
+            print(f"Error geocoding job '{address_key}': {e}")
+            geocoded = None
+
+        if geocoded:
+            # Lead ids are read at finish time so leads merged in while running are included
+            self.db_manager.execute_query("""
+                UPDATE leads
+                SET latitude = %s, longitude = %s, geocoded_address = %s, geocoded_at = NOW(),
+                    geocode_source = %s
+                WHERE id = ANY((SELECT lead_ids FROM geocode_jobs WHERE address_key = %s))
+            """, (geocoded['lat'], geocoded['lng'], geocoded['display_name'], GEOCODE_PROVIDER, address_key))
+
+        self.db_manager.execute_query("""
+            UPDATE geocode_jobs
+            SET status = %s, finished_at = NOW()
+            WHERE address_key = %s
+        """, ('done' if geocoded else 'failed', address_key))
+        print(f"Geocoded job {address_key}: {'found' if geocoded else 'failed'}")
+        return True
+
+    def _release_stale_jobs(self):
+        """Requeue jobs orphaned by a dead worker and drop old finished ones"""
+        self.db_manager.execute_query("""
+            UPDATE geocode_jobs SET status = 'pending'
+            WHERE status = 'running' AND started_at < NOW() - make_interval(mins => %s)
+        """, (GEOCODE_STALE_JOB_MINUTES,))
+        self.db_manager.execute_query("""
+            DELETE FROM geocode_jobs
+            WHERE status IN ('done', 'failed') AND finished_at < NOW() - make_interval(days => %s)
+        """, (GEOCODE_JOB_RETENTION_DAYS,))
@@ -0,0 +1,127 @@
+-- Baseline schema. Written with IF NOT EXISTS so databases created by the
+-- old init_database() are adopted without changes.
+
+-- Campaigns table
+CREATE TABLE IF NOT EXISTS campaigns (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    status TEXT,
+    unique_replies INTEGER DEFAULT 0,
+    interested INTEGER DEFAULT 0,
+    total_leads_contacted INTEGER DEFAULT 0,
+    emails_sent INTEGER DEFAULT 0,
+    created_at TEXT,
+    updated_at TEXT,
+    last_synced TIMESTAMP DEFAULT NOW()
+);
+
+-- Leads table
+CREATE TABLE IF NOT EXISTS leads (
+    id INTEGER PRIMARY KEY,
+    email TEXT,
+    first_name TEXT,
+    last_name TEXT,
+    title TEXT,
+    company TEXT,
+    phone TEXT,
+    state TEXT,
+    address TEXT,
+    city TEXT,
+    zip_code TEXT,
+    latitude DECIMAL(10, 8),
+    longitude DECIMAL(11, 8),
+    geocoded_address TEXT,
+    geocoded_at TIMESTAMP,
+    interested BOOLEAN DEFAULT false,
+    created_at TEXT,
+    updated_at TEXT,
+    last_synced TIMESTAMP DEFAULT NOW()
+);
+
+-- Address and geocoding fields for databases created before they existed
+ALTER TABLE leads ADD COLUMN IF NOT EXISTS address TEXT;
+ALTER TABLE leads ADD COLUMN IF NOT EXISTS city TEXT;
+ALTER TABLE leads ADD COLUMN IF NOT EXISTS zip_code TEXT;
+ALTER TABLE leads ADD COLUMN IF NOT EXISTS latitude DECIMAL(10, 8);
+ALTER TABLE leads ADD COLUMN IF NOT EXISTS longitude DECIMAL(11, 8);
+ALTER TABLE leads ADD COLUMN IF NOT EXISTS geocoded_address TEXT;
+ALTER TABLE leads ADD COLUMN IF NOT EXISTS geocoded_at TIMESTAMP;
+
+-- Replies table
+CREATE TABLE IF NOT EXISTS replies (
+    id SERIAL PRIMARY KEY,
+    reply_uuid TEXT UNIQUE,
+    lead_id INTEGER,
+    campaign_id INTEGER,
+    date_received TEXT,
+    interested BOOLEAN DEFAULT false,
+    automated_reply BOOLEAN DEFAULT false,
+    subject TEXT,
+    content TEXT,
+    sender_email TEXT,
+    created_at TIMESTAMP DEFAULT NOW(),
+    FOREIGN KEY (lead_id) REFERENCES leads (id),
+    FOREIGN KEY (campaign_id) REFERENCES campaigns (id)
+);
+
+-- Campaign stats table for time-based metrics
+CREATE TABLE IF NOT EXISTS campaign_stats (
+    id SERIAL PRIMARY KEY,
+    campaign_id INTEGER,
+    stat_date TEXT,
+    unique_replies INTEGER DEFAULT 0,
+    interested INTEGER DEFAULT 0,
+    total_leads_contacted INTEGER DEFAULT 0,
+    emails_sent INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT NOW(),
+    FOREIGN KEY (campaign_id) REFERENCES campaigns (id),
+    UNIQUE(campaign_id, stat_date)
+);
+
+-- Sync status table
+CREATE TABLE IF NOT EXISTS sync_status (
+    id INTEGER PRIMARY KEY,
+    last_sync TIMESTAMP DEFAULT NOW(),
+    sync_in_progress BOOLEAN DEFAULT false,
+    error_message TEXT
+);
+
+-- Pending refresh hint left by request handlers for the background sync
+ALTER TABLE sync_status ADD COLUMN IF NOT EXISTS refresh_requested_at TIMESTAMP;
+
+INSERT INTO sync_status (id, last_sync, sync_in_progress)
+VALUES (1, NOW(), false)
+ON CONFLICT (id) DO NOTHING;
+
+-- Per-day reply aggregates (campaign_id 0 holds the all-campaign totals for the day).
+-- Lead id arrays let range queries count distinct leads across days exactly.
+CREATE TABLE IF NOT EXISTS reply_daily_rollup (
+    stat_date DATE NOT NULL,
+    campaign_id INTEGER NOT NULL,
+    unique_leads INTEGER DEFAULT 0,
+    interested_leads INTEGER DEFAULT 0,
+    reply_count INTEGER DEFAULT 0,
+    interested_count INTEGER DEFAULT 0,
+    lead_ids INTEGER[] DEFAULT '{}',
+    interested_lead_ids INTEGER[] DEFAULT '{}',
+    updated_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (stat_date, campaign_id)
+);
+
+-- High-water marks for incremental sync (one row per entity, and per campaign for replies)
+CREATE TABLE IF NOT EXISTS sync_watermarks (
+    entity TEXT NOT NULL,
+    scope_id INTEGER NOT NULL DEFAULT 0,
+    last_seen TEXT,
+    last_full_sync TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (entity, scope_id)
+);
+
+-- Indexes
+CREATE INDEX IF NOT EXISTS idx_replies_campaign_id ON replies(campaign_id);
+CREATE INDEX IF NOT EXISTS idx_replies_lead_id ON replies(lead_id);
+CREATE INDEX IF NOT EXISTS idx_replies_date_received ON replies(date_received);
+CREATE INDEX IF NOT EXISTS idx_replies_interested ON replies(interested);
+CREATE INDEX IF NOT EXISTS idx_leads_state ON leads(state);
+CREATE INDEX IF NOT EXISTS idx_campaigns_status ON campaigns(status);
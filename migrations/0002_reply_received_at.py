@@ -0,0 +1,66 @@
+"""Typed reply timestamp so date range filters can use an index instead of DATE(LEFT(...))"""
+
+# Shape of the date_received values worth casting (YYYY-MM-DD[THH:MM[:SS[.ffffff]]][Z|+HH[:MM]]);
+# the values themselves are range-checked by parse_reply_timestamp
+ISO_TIMESTAMP_PATTERN = r'^\d{4}-\d{2}-\d{2}([T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?(Z|[+-]\d{2}(:?\d{2})?)?$'
+
+BACKFILL_BATCH_SIZE = 5000
+
+def upgrade(conn):
+    cursor = conn.cursor()
+    
+    cursor.execute('ALTER TABLE replies ADD COLUMN IF NOT EXISTS received_at TIMESTAMPTZ')
+    cursor.execute('''
+        ALTER TABLE replies ADD COLUMN IF NOT EXISTS received_date DATE
+        GENERATED ALWAYS AS ((received_at AT TIME ZONE 'UTC')::date) STORED
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_replies_received_date ON replies(received_date)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_replies_received_at ON replies(received_at)')
+    conn.commit()
+    
+    # Values that pass the shape check can still be out of range ("2024-02-30T25:61"); the
+    # helper returns NULL for those instead of failing the cast and with it every process boot.
+    # Values without an offset are UTC, matching _parse_timestamp in the sync.
+    cursor.execute(r"""
+        CREATE OR REPLACE FUNCTION pg_temp.parse_reply_timestamp(value TEXT) RETURNS TIMESTAMPTZ AS $$
+        BEGIN
+            IF value ~ '(Z|[T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?[+-]\d{2}(:?\d{2})?)$' THEN
+                RETURN value::timestamptz;
+            END IF;
+            RETURN value::timestamp AT TIME ZONE 'UTC';
+        EXCEPTION WHEN invalid_datetime_format OR datetime_field_overflow
+                       OR invalid_time_zone_displacement_value THEN
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    
+    # Backfill existing rows in committed batches so no single transaction holds the table.
+    # Batches walk forward by id: unparseable rows stay NULL and must not be picked again.
+    total = 0
+    last_id = 0
+    while True:
+        cursor.execute("""
+            UPDATE replies SET received_at = pg_temp.parse_reply_timestamp(date_received)
+            WHERE id IN (
+                SELECT id FROM replies
+                WHERE id > %s
+                AND received_at IS NULL
+                AND date_received ~ %s
+                ORDER BY id
+                LIMIT %s
+            )
+            RETURNING id, received_at IS NOT NULL
+        """, (last_id, ISO_TIMESTAMP_PATTERN, BACKFILL_BATCH_SIZE))
+        batch = cursor.fetchall()
+        conn.commit()
+        total += sum(1 for _, parsed in batch if parsed)
+        if len(batch) < BACKFILL_BATCH_SIZE:
+            break
+        last_id = max(reply_id for reply_id, _ in batch)
+    
+    if total:
+        # Rollup days were keyed on the raw date_received prefix; rebuild them from received_date
+        cursor.execute('DELETE FROM reply_daily_rollup')
+        conn.commit()
+        print(f"Backfilled received_at for {total} replies")
@@ -0,0 +1,2 @@
+-- Bumped by every successful sync so dashboard caches in any process can tell their data is stale
+ALTER TABLE sync_status ADD COLUMN IF NOT EXISTS data_generation BIGINT NOT NULL DEFAULT 0;
@@ -0,0 +1,11 @@
+-- Cached EmailBison workspace responses keyed by endpoint and date range.
+-- expires_at is NULL for closed historical ranges, which never change upstream.
+CREATE TABLE IF NOT EXISTS api_response_cache (
+    cache_key TEXT PRIMARY KEY,
+    endpoint TEXT NOT NULL,
+    start_date DATE NOT NULL,
+    end_date DATE NOT NULL,
+    response JSONB NOT NULL,
+    fetched_at TIMESTAMP DEFAULT NOW(),
+    expires_at TIMESTAMP
+);
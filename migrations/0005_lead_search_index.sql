@@ -0,0 +1,11 @@
+-- Trigram index for /api/leads search. The expression must match LEAD_SEARCH_DOCUMENT in app.py.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_leads_search_trgm ON leads USING GIN (
+    lower(coalesce(first_name, '') || ' ' || coalesce(last_name, '') || ' ' ||
+          coalesce(email, '') || ' ' || coalesce(company, '') || ' ' || coalesce(title, ''))
+    gin_trgm_ops
+);
+
+-- Lead filters probe replies per lead
+CREATE INDEX IF NOT EXISTS idx_replies_lead_interested ON replies(lead_id, interested) WHERE automated_reply = false;
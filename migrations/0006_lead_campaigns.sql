@@ -0,0 +1,19 @@
+-- Per-lead, per-campaign state from EmailBison's lead_campaign_data, for local lead filters
+CREATE TABLE IF NOT EXISTS lead_campaigns (
+    lead_id INTEGER NOT NULL,
+    campaign_id INTEGER NOT NULL,
+    status TEXT,
+    interested BOOLEAN DEFAULT false,
+    replies INTEGER DEFAULT 0,
+    emails_sent INTEGER DEFAULT 0,
+    last_synced TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (lead_id, campaign_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_lead_campaigns_campaign ON lead_campaigns(campaign_id, lead_id);
+CREATE INDEX IF NOT EXISTS idx_lead_campaigns_campaign_interested ON lead_campaigns(campaign_id, interested);
+CREATE INDEX IF NOT EXISTS idx_lead_campaigns_interested ON lead_campaigns(lead_id) WHERE interested;
+CREATE INDEX IF NOT EXISTS idx_lead_campaigns_replied ON lead_campaigns(lead_id) WHERE replies > 0;
+
+-- Existing leads only get their campaign rows on a full pass; force the next lead sync to be one
+DELETE FROM sync_watermarks WHERE entity = 'leads';
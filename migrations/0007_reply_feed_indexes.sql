@@ -0,0 +1,14 @@
+-- Keyset pagination of reply feeds. The sort expression must match REPLY_SORT_KEY in app.py;
+-- ascending indexes serve the newest-first row comparisons via backward scans.
+CREATE INDEX IF NOT EXISTS idx_replies_feed
+    ON replies ((COALESCE(received_at, '-infinity'::timestamptz)), id)
+    WHERE automated_reply = false;
+
+CREATE INDEX IF NOT EXISTS idx_replies_campaign_feed
+    ON replies (campaign_id, (COALESCE(received_at, '-infinity'::timestamptz)), id)
+    WHERE automated_reply = false;
+
+-- Latest-reply-per-lead checks look for a newer reply from the same lead
+CREATE INDEX IF NOT EXISTS idx_replies_lead_feed
+    ON replies (lead_id, (COALESCE(received_at, '-infinity'::timestamptz)), id)
+    WHERE automated_reply = false;
@@ -0,0 +1,16 @@
+-- Geocoding results keyed by normalized address (geocoding.normalize_address), shared by all leads
+CREATE TABLE IF NOT EXISTS geocode_cache (
+    address_key TEXT PRIMARY KEY,
+    query TEXT,
+    status TEXT NOT NULL CHECK (status IN ('found', 'not_found', 'error')),
+    latitude DECIMAL(10, 8),
+    longitude DECIMAL(11, 8),
+    display_name TEXT,
+    confidence DOUBLE PRECISION,
+    provider TEXT NOT NULL,
+    provider_place_id TEXT,
+    attempts INTEGER NOT NULL DEFAULT 1,
+    retry_after TIMESTAMPTZ,              -- NULL for found; when a failed lookup may be retried
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
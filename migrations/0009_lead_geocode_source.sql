@@ -0,0 +1,3 @@
+-- Where a lead's coordinates came from: gazetteer_zip / gazetteer_city (offline centroid) or nominatim
+ALTER TABLE leads ADD COLUMN IF NOT EXISTS geocode_source TEXT;
+UPDATE leads SET geocode_source = 'nominatim' WHERE latitude IS NOT NULL AND geocode_source IS NULL;
@@ -0,0 +1,16 @@
+-- Persistent queue for the geocoding worker: one job per normalized address, shared by its leads
+CREATE TABLE IF NOT EXISTS geocode_jobs (
+    address_key TEXT PRIMARY KEY,
+    query TEXT NOT NULL,
+    country_codes TEXT,
+    lead_ids INTEGER[] NOT NULL DEFAULT '{}',
+    priority INTEGER NOT NULL DEFAULT 0,   -- 1 when any lead is interested
+    status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'running', 'done', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    enqueued_at TIMESTAMPTZ DEFAULT NOW(),
+    started_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_geocode_jobs_pending
+    ON geocode_jobs (priority DESC, enqueued_at) WHERE status = 'pending';
@@ -0,0 +1,4 @@
+-- /api/map viewport queries: bbox range scans over located leads
+CREATE INDEX IF NOT EXISTS idx_leads_location
+    ON leads (latitude, longitude)
+    WHERE latitude IS NOT NULL AND longitude IS NOT NULL;
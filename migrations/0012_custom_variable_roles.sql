@@ -0,0 +1,9 @@
+-- Workspace custom variable definitions (EmailBison /api/custom-variables) mapped to an address role
+CREATE TABLE IF NOT EXISTS custom_variable_roles (
+    name TEXT PRIMARY KEY,                -- matches custom_variables[].name on leads
+    variable_id INTEGER,
+    label TEXT,
+    role TEXT CHECK (role IN ('street', 'city', 'state', 'zip')),   -- NULL: not an address field
+    role_source TEXT NOT NULL DEFAULT 'inferred' CHECK (role_source IN ('inferred', 'manual')),
+    refreshed_at TIMESTAMPTZ DEFAULT NOW()
+);
@@ -0,0 +1,7 @@
+-- Reply days whose reply_daily_rollup rows still need recomputing. Written before the reply
+-- watermarks advance and cleared in the same transaction as the rollup update, so a failed
+-- rollup is retried by the next sync instead of leaving drifted per-day counts.
+CREATE TABLE IF NOT EXISTS reply_rollup_pending (
+    stat_date DATE PRIMARY KEY,
+    queued_at TIMESTAMPTZ DEFAULT NOW()
+);
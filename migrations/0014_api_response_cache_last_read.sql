@@ -0,0 +1,4 @@
+-- When each cached EmailBison response was last served, so the sync can purge closed
+-- ranges nobody reads any more (custom ranges otherwise accumulate one row per range).
+ALTER TABLE api_response_cache ADD COLUMN IF NOT EXISTS last_read_at TIMESTAMP DEFAULT NOW();
+CREATE INDEX IF NOT EXISTS idx_api_response_cache_expires_at ON api_response_cache (expires_at);
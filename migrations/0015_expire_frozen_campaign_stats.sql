@@ -0,0 +1,7 @@
+-- Per-campaign stats of finished/paused campaigns used to be cached without expiry, even for
+-- ranges reaching today. Expire those now so they are refetched with a TTL and purged.
+UPDATE api_response_cache
+SET expires_at = NOW()
+WHERE endpoint LIKE 'campaign_stats/%@%'
+AND expires_at IS NULL
+AND end_date >= CURRENT_DATE - 1;
@@ -0,0 +1,5 @@
+-- ZIP centroids used to be applied to any five-digit postal code, placing e.g. Berlin 10115 in
+-- New York. Clear those so the next sync re-places them with the state check (or Nominatim).
+UPDATE leads
+SET latitude = NULL, longitude = NULL, geocoded_at = NULL, geocode_source = NULL
+WHERE geocode_source = 'gazetteer_zip';
@@ -0,0 +1,110 @@
+import importlib.util
+import os
+import re
+
+import psycopg2
+from psycopg2 import errors
+
+# Ordered migration files: NNNN_description.sql, or NNNN_description.py defining upgrade(conn)
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+MIGRATION_FILE_PATTERN = re.compile(r'^(\d+)_([\w-]+)\.(sql|py)$')
+
+# Key for pg_advisory_lock so only one process applies migrations at a time
+MIGRATION_LOCK_ID = 727_001
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    """Return [(version, name, path)] for every migration file, ordered by version"""
+    migrations = []
+    for filename in os.listdir(directory):
+        match = MIGRATION_FILE_PATTERN.match(filename)
+        if not match:
+            continue
+        migrations.append((int(match.group(1)), filename, os.path.join(directory, filename)))
+
+    migrations.sort()
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Duplicate migration version in {directory}")
+    return migrations
+
+def get_schema_version(conn):
+    """Highest applied migration version, or None if schema_migrations does not exist yet"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute('SELECT COALESCE(MAX(version), 0) FROM schema_migrations')
+        version = cursor.fetchone()[0]
+        conn.commit()
+        return version
+    except errors.UndefinedTable:
+        conn.rollback()
+        return None
+
+def run_migrations(conn, directory=MIGRATIONS_DIR):
+    """Apply pending migrations. Up-to-date databases cost a single version check."""
+    migrations = load_migrations(directory)
+    latest = migrations[-1][0] if migrations else 0
+
+    if get_schema_version(conn) == latest:
+        return 0
+
+    cursor = conn.cursor()
+    # Migrations may create indexes or backfill large tables; lift the pool's statement timeout
+    cursor.execute('SET statement_timeout = 0')
+    cursor.execute('SELECT pg_advisory_lock(%s)', (MIGRATION_LOCK_ID,))
+    conn.commit()
+
+    applied_count = 0
+    try:
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT NOW()
+            )
+        ''')
+        conn.commit()
+
+        # Re-read under the lock: another worker may have migrated while we waited
+        cursor.execute('SELECT version FROM schema_migrations')
+        applied = {row[0] for row in cursor.fetchall()}
+        conn.commit()
+
+        for version, name, path in migrations:
+            if version in applied:
+                continue
+
+            print(f"Applying migration {name}")
+            try:
+                _apply_migration(conn, path)
+                cursor.execute('INSERT INTO schema_migrations (version, name) VALUES (%s, %s)',
+                               (version, name))
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                print(f"Migration {name} failed: {e}")
+                raise
+            applied_count += 1
+
+        if applied_count:
+            print(f"Applied {applied_count} migration(s), schema at version {latest}")
+        return applied_count
+    finally:
+        try:
+            cursor.execute('SELECT pg_advisory_unlock(%s)', (MIGRATION_LOCK_ID,))
+            cursor.execute('RESET statement_timeout')
+            conn.commit()
+        except psycopg2.Error as e:
+            print(f"Error releasing migration lock: {e}")
+
+def _apply_migration(conn, path):
+    """Run one migration file. SQL files run in a single transaction; Python ones manage their own."""
+    if path.endswith('.sql'):
+        with open(path) as f:
+            sql = f.read()
+        conn.cursor().execute(sql)
+        return
+
+    spec = importlib.util.spec_from_file_location(f'migration_{os.path.basename(path)[:-3]}', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.upgrade(conn)
@@ -70,6 +70,7 @@ async function fetchDashboardData() {
         
         updateMetrics(data.metrics, data.timeframe_label);
         updateCharts(data.chart_data);
+        updateDataFreshness(data.data_freshness, (data.timed_out_sections || []).concat(data.failed_sections || []));
         
         // Hide loading overlay for dashboard
         hideLoading();
@@ -194,13 +195,35 @@ function updateMetrics(metrics, timeframeLabel) {
     updatePipelineCalculator(metrics.total_leads);
 }
 
+// Show when the background sync last refreshed the data
+function updateDataFreshness(freshness, partialSections) {
+    const element = document.getElementById('data-freshness');
+    if (!element) return;
+    
+    if (!freshness || !freshness.last_sync) {
+        element.textContent = '';
+        return;
+    }
+    
+    const minutes = Math.floor((freshness.age_seconds || 0) / 60);
+    let text = minutes < 1 ? 'Data updated just now' : `Data updated ${minutes} min ago`;
+    if (freshness.sync_in_progress || freshness.refresh_queued) {
+        text += ' · refreshing in background';
+    }
+    if (partialSections && partialSections.length > 0) {
+        // Some sections failed or missed the server deadline and show fallback data
+        text += ' · some figures are partial';
+    }
+    element.textContent = text;
+}
+
 // Update all charts
 function updateCharts(chartData) {
     updateRepliesTimeChart(chartData.replies_over_time);
     updateCampaignBreakdownChart(chartData.campaign_breakdown);
     updateReplyStatusChart(chartData.reply_status);
     updateCampaignPerformanceChart(chartData.campaign_performance);
-    updateInteractiveMap(chartData.map_locations);
+    refreshLeadMap();
 }
 
 // Chart instances
@@ -509,16 +532,19 @@ function updateCampaignPerformanceChart(data) {
     });
 }
 
-// 6. Interactive Point Map (Individual Lead Locations)
+// 6. Interactive Point Map (clustered lead locations, fetched per viewport)
 let leadsMap = null;
 let leadMarkers = null;
+let leadMapRequest = 0;
+const LEAD_MAP_MAX_CLUSTER_ZOOM = 15;
+const LEAD_POPUP_PAGE_SIZE = 10; // MAP_CLUSTER_LEAD_IDS_MAX on the server
 
-function updateInteractiveMap(leadLocations) {
+function initLeadMap() {
     // Check if map container exists
     const mapContainer = document.getElementById('leadsLocationMap');
     if (!mapContainer) {
         console.error('Map container not found');
-        return;
+        return false;
     }
     
     // Initialize map if not already created
@@ -533,62 +559,150 @@ function updateInteractiveMap(leadLocations) {
                 maxZoom: 18,
                 minZoom: 3
             }).addTo(leadsMap);
+            
+            leadMarkers = L.layerGroup().addTo(leadsMap);
+            
+            // Panning or zooming loads the clusters for the new viewport
+            leadsMap.on('moveend', refreshLeadMap);
         } catch (error) {
             console.error('Error initializing map:', error);
-            return;
+            return false;
         }
     }
+    return true;
+}
+
+// Fetch clusters for the visible area and current timeframe
+async function refreshLeadMap() {
+    // Nothing to fetch while the map section is hidden
+    const mapContainer = document.getElementById('leadsLocationMap');
+    if (mapContainer && !mapContainer.offsetParent) return;
+    if (!initLeadMap()) return;
+    
+    const params = new URLSearchParams({
+        bbox: leadsMap.getBounds().toBBoxString(),
+        zoom: leadsMap.getZoom(),
+        timeframe: currentTimeframe
+    });
+    if (currentTimeframe === 'custom' && customStartDate && customEndDate) {
+        params.append('start_date', customStartDate);
+        params.append('end_date', customEndDate);
+    }
     
-    // Clear existing markers
-    if (leadMarkers) {
-        leadMarkers.clearLayers();
-    } else {
-        leadMarkers = L.layerGroup().addTo(leadsMap);
+    // Only the latest request gets drawn when the map moves quickly
+    const requestId = ++leadMapRequest;
+    try {
+        const response = await fetch(`/api/map?${params.toString()}`);
+        const data = await response.json();
+        if (requestId !== leadMapRequest) return;
+        
+        if (data.success) {
+            updateInteractiveMap(data.clusters);
+        } else {
+            console.error('Error loading map clusters:', data.error);
+        }
+    } catch (error) {
+        console.error('Error loading map clusters:', error);
     }
+}
+
+function updateInteractiveMap(clusters) {
+    leadMarkers.clearLayers();
     
-    if (!leadLocations || leadLocations.length === 0) {
+    if (!clusters || clusters.length === 0) {
         console.log('No lead locations to display');
         return;
     }
     
-    // Create markers for each lead location
-    leadLocations.forEach(lead => {
-        if (lead.lat && lead.lng) {
-            // Create custom marker icon
-            const markerIcon = L.divIcon({
-                className: 'custom-marker',
-                html: '<div class="marker-pin"></div>',
-                iconSize: [20, 20],
-                iconAnchor: [10, 20],
-                popupAnchor: [0, -20]
+    clusters.forEach(cluster => {
+        const marker = L.marker([cluster.lat, cluster.lng], { icon: createClusterIcon(cluster.count) });
+        
+        if (cluster.lead_ids) {
+            // Small or unsplittable clusters: load lead details when the popup opens
+            marker.bindPopup('<div class="lead-popup-content">Loading...</div>', {
+                maxWidth: 300,
+                maxHeight: 320,
+                className: 'lead-popup'
+            });
+            marker.on('popupopen', () => loadLeadPopup(marker, cluster));
+        } else {
+            // Large clusters: zoom in to split them up (never out)
+            marker.on('click', () => {
+                const zoom = Math.max(leadsMap.getZoom(), Math.min(leadsMap.getZoom() + 2, LEAD_MAP_MAX_CLUSTER_ZOOM));
+                leadsMap.setView([cluster.lat, cluster.lng], zoom);
             });
-            
-            // Create marker
-            const marker = L.marker([lead.lat, lead.lng], { icon: markerIcon })
-                .bindPopup(createLeadPopup(lead), {
-                    maxWidth: 300,
-                    className: 'lead-popup'
-                });
-            
-            leadMarkers.addLayer(marker);
         }
+        
+        leadMarkers.addLayer(marker);
     });
     
-    // Fit map to show all markers
-    if (leadLocations.length > 0) {
-        const group = new L.featureGroup(leadMarkers.getLayers());
-        leadsMap.fitBounds(group.getBounds().pad(0.1));
+    const total = clusters.reduce((sum, cluster) => sum + cluster.count, 0);
+    console.log(`Interactive map updated with ${total} leads in ${clusters.length} clusters`);
+}
+
+function createClusterIcon(count) {
+    // Create custom marker icon
+    if (count === 1) {
+        return L.divIcon({
+            className: 'custom-marker',
+            html: '<div class="marker-pin"></div>',
+            iconSize: [20, 20],
+            iconAnchor: [10, 20],
+            popupAnchor: [0, -20]
+        });
     }
     
-    console.log(`Interactive map updated with ${leadLocations.length} lead locations`);
+    const size = count < 10 ? 30 : count < 100 ? 36 : 44;
+    return L.divIcon({
+        className: 'custom-marker',
+        html: `<div class="marker-cluster" style="width: ${size}px; height: ${size}px; line-height: ${size}px;">${count}</div>`,
+        iconSize: [size, size],
+        iconAnchor: [size / 2, size / 2],
+        popupAnchor: [0, -size / 2]
+    });
+}
+
+// Loads the cluster's lead details a page at a time; "Show more" appends the next page
+async function loadLeadPopup(marker, cluster, shown = 0, html = '') {
+    const pageIds = cluster.lead_ids.slice(shown, shown + LEAD_POPUP_PAGE_SIZE);
+    try {
+        const response = await fetch(`/api/map/leads?ids=${pageIds.join(',')}`);
+        const data = await response.json();
+        
+        if (data.success && data.leads.length > 0) {
+            html += (html ? '<hr class="my-2">' : '') + data.leads.map(createLeadPopup).join('<hr class="my-2">');
+            shown += pageIds.length;
+            
+            let footer = '';
+            if (shown < cluster.lead_ids.length) {
+                footer = `<a href="#" class="lead-popup-more d-block mt-2">Show more (${shown} of ${cluster.count})</a>`;
+            } else if (shown < cluster.count) {
+                footer = `<div class="text-muted small mt-2">Showing ${shown} of ${cluster.count} leads</div>`;
+            }
+            marker.setPopupContent(html + footer);
+            
+            const more = marker.getPopup().getElement()?.querySelector('.lead-popup-more');
+            if (more) {
+                more.addEventListener('click', event => {
+                    event.preventDefault();
+                    loadLeadPopup(marker, cluster, shown, html);
+                });
+            }
+        } else if (!html) {
+            marker.setPopupContent('<div class="lead-popup-content">No details available</div>');
+        }
+    } catch (error) {
+        console.error('Error loading lead details:', error);
+        marker.setPopupContent('<div class="lead-popup-content">Failed to load lead details</div>');
+    }
 }
 
 function createLeadPopup(lead) {
-    const replyDate = new Date(lead.date_received).toLocaleDateString('en-US', {
+    const replyDate = lead.date_received ? new Date(lead.date_received).toLocaleDateString('en-US', {
         month: 'short',
         day: 'numeric',
         year: 'numeric'
-    });
+    }) : 'Unknown';
     
     return `
         <div class="lead-popup-content">
@@ -1,60 +1,68 @@
 import psycopg2
 from psycopg2 import pool
+from psycopg2.extras import execute_values
 import threading
 import time
-from datetime import datetime, timedelta
-import requests
+from datetime import datetime, timedelta, timezone
 import json
 import os
+import queue
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
+from emailbison_client import EMAILBISON_DOMAIN, get_emailbison_client
+from schema_migrations import run_migrations
+from address_extraction import extract_address_from_custom_variables, refresh_custom_variable_roles
+from geocoding import GeocodeWorker, build_lead_address, enqueue_geocode_jobs, locate_leads_offline
 
-# Import the improved address extraction function
-try:
-    from app import extract_address_from_custom_variables
-except ImportError:
-    # Fallback if app.py is not available
-    def extract_address_from_custom_variables(custom_vars):
-        """Fallback address extraction"""
-        if not isinstance(custom_vars, list):
-            return None, None, None, None
-        
-        address = None
-        city = None
-        state = None
-        zip_code = None
-        
-        for var in custom_vars:
-            var_name = var.get('name', '') or ''
-            var_value = var.get('value', '') or ''
-            
-            # Skip if name or value is None
-            if not var_name or not var_value:
-                continue
-                
-            var_name = var_name.lower().strip()
-            var_value = var_value.strip()
-            
-            if not var_value or var_value == 'None':
-                continue
-            
-            if 'street' in var_name or 'address' in var_name:
-                address = var_value
-            elif 'city' in var_name or 'town' in var_name:
-                city = var_value
-            elif 'state' in var_name or 'province' in var_name:
-                state = var_value
-            elif 'zip' in var_name or 'postal' in var_name:
-                zip_code = var_value
-        
-        return address, city, state, zip_code
+# Number of campaigns whose replies are fetched in parallel (bounded further by the client's rate limiter)
+SYNC_REPLY_WORKERS = max(1, int(os.environ.get('SYNC_REPLY_WORKERS', '4')))
+
+# Replies are buffered across pages/campaigns and written once this many rows are pending
+REPLY_WRITE_BATCH_SIZE = 1000
+
+# Background sync schedule; refresh hints are polled so any process can wake the syncing one
+SYNC_INTERVAL_SECONDS = int(os.environ.get('SYNC_INTERVAL_SECONDS', '300'))
+REFRESH_POLL_SECONDS = 15
+
+# Key for the session advisory lock held by the one process allowed to sync (migrations use 727_001)
+SYNC_LEADER_LOCK_ID = 727_002
+# How often a process that is not the sync leader retries the lock, i.e. the failover delay
+SYNC_LEADER_RETRY_SECONDS = int(os.environ.get('SYNC_LEADER_RETRY_SECONDS', '30'))
+
+# Incremental sync configuration: how often a full (non-incremental) pass is forced
+SYNC_FULL_RECONCILE_HOURS = int(os.environ.get('SYNC_FULL_RECONCILE_HOURS', '24'))
 
-# EmailBison API configuration
-EMAILBISON_DOMAIN = os.environ.get('EMAILBISON_DOMAIN', 'https://send.longrun.agency')
-EMAILBISON_API_KEY = os.environ.get('EMAILBISON_API_KEY', '5|LJwTR33haOeU6bSlBGU08roquoklOlZg3CsNgEMtdd040014')
-EMAILBISON_HEADERS = {
-    'Authorization': f'Bearer {EMAILBISON_API_KEY}',
-    'Accept': 'application/json'
-}
+# Runaway guard for paginated sync walks; a walk cut short by it keeps its old watermark
+SYNC_MAX_PAGES = int(os.environ.get('SYNC_MAX_PAGES', '1000'))
+
+# Cached EmailBison responses that never expire (closed ranges) are purged after this many unread days
+API_CACHE_RETENTION_DAYS = int(os.environ.get('API_CACHE_RETENTION_DAYS', '30'))
+
+# Queries issued in the current request/task, read by app.py to report X-DB-Queries
+_query_counter = contextvars.ContextVar('query_counter', default=None)
+
+class QueryCounter:
+    """Thread-safe count of database round trips (shared by threads that copy the context)"""
+    
+    def __init__(self):
+        self.count = 0
+        self.lock = threading.Lock()
+    
+    def increment(self):
+        with self.lock:
+            self.count += 1
+
+def start_query_count():
+    """Begin counting queries for the current context and return the counter"""
+    counter = QueryCounter()
+    _query_counter.set(counter)
+    return counter
+
+def _count_query():
+    counter = _query_counter.get()
+    if counter is not None:
+        counter.increment()
 
 # Supabase configuration
 SUPABASE_URL = os.environ.get('SUPABASE_URL', 'https://ocoihazbvkyjuexmhpnj.supabase.co')
@@ -100,128 +108,14 @@ class SupabaseManager:
                 self.connection_pool.putconn(conn)
     
     def init_database(self):
-        """Initialize the database with all required tables"""
+        """Bring the schema up to date by applying any pending migrations (see migrations/)"""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Campaigns table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS campaigns (
-                    id INTEGER PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    status TEXT,
-                    unique_replies INTEGER DEFAULT 0,
-                    interested INTEGER DEFAULT 0,
-                    total_leads_contacted INTEGER DEFAULT 0,
-                    emails_sent INTEGER DEFAULT 0,
-                    created_at TEXT,
-                    updated_at TEXT,
-                    last_synced TIMESTAMP DEFAULT NOW()
-                )
-            ''')
-            
-            # Leads table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS leads (
-                    id INTEGER PRIMARY KEY,
-                    email TEXT,
-                    first_name TEXT,
-                    last_name TEXT,
-                    title TEXT,
-                    company TEXT,
-                    phone TEXT,
-                    state TEXT,
-                    address TEXT,
-                    city TEXT,
-                    zip_code TEXT,
-                    latitude DECIMAL(10, 8),
-                    longitude DECIMAL(11, 8),
-                    geocoded_address TEXT,
-                    geocoded_at TIMESTAMP,
-                    interested BOOLEAN DEFAULT false,
-                    created_at TEXT,
-                    updated_at TEXT,
-                    last_synced TIMESTAMP DEFAULT NOW()
-                )
-            ''')
-            
-            # Add address and geocoding fields if they don't exist (for existing databases)
-            try:
-                cursor.execute('ALTER TABLE leads ADD COLUMN IF NOT EXISTS address TEXT')
-                cursor.execute('ALTER TABLE leads ADD COLUMN IF NOT EXISTS city TEXT')
-                cursor.execute('ALTER TABLE leads ADD COLUMN IF NOT EXISTS zip_code TEXT')
-                cursor.execute('ALTER TABLE leads ADD COLUMN IF NOT EXISTS latitude DECIMAL(10, 8)')
-                cursor.execute('ALTER TABLE leads ADD COLUMN IF NOT EXISTS longitude DECIMAL(11, 8)')
-                cursor.execute('ALTER TABLE leads ADD COLUMN IF NOT EXISTS geocoded_address TEXT')
-                cursor.execute('ALTER TABLE leads ADD COLUMN IF NOT EXISTS geocoded_at TIMESTAMP')
-            except Exception as e:
-                print(f"Note: Address/geocoding columns may already exist: {e}")
-            
-            # Replies table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS replies (
-                    id SERIAL PRIMARY KEY,
-                    reply_uuid TEXT UNIQUE,
-                    lead_id INTEGER,
-                    campaign_id INTEGER,
-                    date_received TEXT,
-                    interested BOOLEAN DEFAULT false,
-                    automated_reply BOOLEAN DEFAULT false,
-                    subject TEXT,
-                    content TEXT,
-                    sender_email TEXT,
-                    created_at TIMESTAMP DEFAULT NOW(),
-                    FOREIGN KEY (lead_id) REFERENCES leads (id),
-                    FOREIGN KEY (campaign_id) REFERENCES campaigns (id)
-                )
-            ''')
-            
-            # Campaign stats table for time-based metrics
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS campaign_stats (
-                    id SERIAL PRIMARY KEY,
-                    campaign_id INTEGER,
-                    stat_date TEXT,
-                    unique_replies INTEGER DEFAULT 0,
-                    interested INTEGER DEFAULT 0,
-                    total_leads_contacted INTEGER DEFAULT 0,
-                    emails_sent INTEGER DEFAULT 0,
-                    created_at TIMESTAMP DEFAULT NOW(),
-                    FOREIGN KEY (campaign_id) REFERENCES campaigns (id),
-                    UNIQUE(campaign_id, stat_date)
-                )
-            ''')
-            
-            # Sync status table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS sync_status (
-                    id INTEGER PRIMARY KEY,
-                    last_sync TIMESTAMP DEFAULT NOW(),
-                    sync_in_progress BOOLEAN DEFAULT false,
-                    error_message TEXT
-                )
-            ''')
-            
-            # Insert initial sync status
-            cursor.execute('''
-                INSERT INTO sync_status (id, last_sync, sync_in_progress)
-                VALUES (1, NOW(), false)
-                ON CONFLICT (id) DO NOTHING
-            ''')
-            
-            # Create indexes for better performance
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_replies_campaign_id ON replies(campaign_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_replies_lead_id ON replies(lead_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_replies_date_received ON replies(date_received)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_replies_interested ON replies(interested)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_leads_state ON leads(state)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_campaigns_status ON campaigns(status)')
-            
-            conn.commit()
+            run_migrations(conn)
             print("Database schema initialized")
     
     def execute_query(self, query, params=None):
         """Execute a query and return results"""
+        _count_query()
         max_retries = 3
         for attempt in range(max_retries):
             try:
@@ -250,6 +144,7 @@ class SupabaseManager:
     
     def execute_many(self, query, params_list):
         """Execute many queries with proper error handling"""
+        _count_query()
         max_retries = 3
         for attempt in range(max_retries):
             try:
@@ -266,9 +161,154 @@ class SupabaseManager:
                     print(f"Execute many error: {e}")
                     raise
 
+    def bulk_upsert(self, query, rows, template=None, key_index=0, page_size=1000):
+        """Execute a multi-row INSERT ... VALUES %s ... ON CONFLICT statement.
+
+        All rows are sent in pages of ``page_size`` over a single connection and
+        committed once. Rows sharing the same conflict key (``rows[i][key_index]``)
+        are collapsed to the last occurrence, since Postgres refuses to update the
+        same row twice within one statement.
+        """
+        if not rows:
+            return 0
+        
+        _count_query()
+        if key_index is not None:
+            rows = list({row[key_index]: row for row in rows}.values())
+        
+        max_retries = 3
+        for attempt in range(max_retries):
+            try:
+                with self.get_connection() as conn:
+                    try:
+                        cursor = conn.cursor()
+                        execute_values(cursor, query, rows, template=template, page_size=page_size)
+                        conn.commit()
+                        return len(rows)
+                    except Exception:
+                        conn.rollback()
+                        raise
+            except Exception as e:
+                if attempt < max_retries - 1:
+                    time.sleep(0.1 * (attempt + 1))
+                    continue
+                else:
+                    print(f"Bulk upsert error: {e}")
+                    raise
+    
+    def replace_lead_campaigns(self, leads):
+        """Store each lead's lead_campaign_data, replacing its previous campaign rows.
+
+        Only leads whose payload carries a lead_campaign_data key are touched; payloads
+        without it (e.g. the single-lead endpoint) say nothing about the lead's campaigns.
+        Deletes and inserts happen in one transaction so filters never see a lead
+        with its campaign rows missing.
+        """
+        leads = [lead for lead in leads if lead.get('id') is not None and 'lead_campaign_data' in lead]
+        lead_ids = [lead['id'] for lead in leads]
+        if not lead_ids:
+            return 0
+        
+        rows = {}
+        for lead in leads:
+            for campaign_data in lead.get('lead_campaign_data') or []:
+                campaign_id = campaign_data.get('campaign_id')
+                if campaign_id is None:
+                    continue
+                rows[(lead['id'], campaign_id)] = (
+                    lead['id'],
+                    campaign_id,
+                    campaign_data.get('status'),
+                    bool(campaign_data.get('interested')),
+                    campaign_data.get('replies') or 0,
+                    campaign_data.get('emails_sent') or 0
+                )
+        
+        _count_query()
+        with self.get_connection() as conn:
+            try:
+                cursor = conn.cursor()
+                cursor.execute('DELETE FROM lead_campaigns WHERE lead_id = ANY(%s)', (lead_ids,))
+                if rows:
+                    execute_values(cursor, '''
+                        INSERT INTO lead_campaigns (lead_id, campaign_id, status, interested,
+                                                    replies, emails_sent, last_synced)
+                        VALUES %s
+                    ''', list(rows.values()), template='(%s, %s, %s, %s, %s, %s, NOW())', page_size=1000)
+                conn.commit()
+                return len(rows)
+            except Exception as e:
+                conn.rollback()
+                print(f"Error replacing lead campaigns: {e}")
+                raise
+
+class SyncLeaderLock:
+    """
+    Cluster-wide sync leadership: a session-level advisory lock held on a dedicated
+    connection (pooled connections are shared, so they cannot own a session lock).
+    Postgres releases the lock when the holding process or its connection dies, and
+    the next process to call acquire() takes over.
+    """
+    
+    def __init__(self, database_url=DATABASE_URL, lock_id=SYNC_LEADER_LOCK_ID):
+        self.database_url = database_url
+        self.lock_id = lock_id
+        self.conn = None
+        self.is_leader = False
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Return True if this process holds the lock, taking it when it is free"""
+        with self.lock:
+            try:
+                if self.conn is None or self.conn.closed:
+                    self.is_leader = False
+                    self.conn = psycopg2.connect(
+                        self.database_url,
+                        application_name='longrun-sync-leader',
+                        keepalives=1, keepalives_idle=30, keepalives_interval=10, keepalives_count=3
+                    )
+                    self.conn.autocommit = True
+                
+                cursor = self.conn.cursor()
+                if self.is_leader:
+                    # The lock lives as long as the session, so a live session means we still hold it
+                    cursor.execute('SELECT 1')
+                else:
+                    cursor.execute('SELECT pg_try_advisory_lock(%s)', (self.lock_id,))
+                    self.is_leader = bool(cursor.fetchone()[0])
+                    if self.is_leader:
+                        print("Acquired sync leader lock")
+                cursor.close()
+            except psycopg2.Error as e:
+                if self.is_leader:
+                    print(f"Lost sync leader lock: {e}")
+                else:
+                    print(f"Error acquiring sync leader lock: {e}")
+                self._close()
+            return self.is_leader
+    
+    def release(self):
+        """Give up leadership (e.g. on shutdown) so another process can take over immediately"""
+        with self.lock:
+            if self.is_leader:
+                print("Released sync leader lock")
+            self._close()
+    
+    def _close(self):
+        self.is_leader = False
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except psycopg2.Error:
+                pass
+            self.conn = None
+
 # Global database manager
 db_manager = None
 data_sync_manager = None
+geocode_worker = None
+sync_leader = None
 
 def get_db_manager():
     """Get or create database manager instance"""
@@ -284,37 +324,125 @@ def get_sync_manager():
         data_sync_manager = DataSyncManager()
     return data_sync_manager
 
+def get_sync_leader():
+    """Get or create this process's sync leader lock"""
+    global sync_leader
+    if sync_leader is None:
+        sync_leader = SyncLeaderLock(get_db_manager().database_url)
+    return sync_leader
+
+def get_geocode_worker():
+    """Get or create the geocoding worker, starting its thread; it only works while this process leads"""
+    global geocode_worker
+    if geocode_worker is None:
+        geocode_worker = GeocodeWorker(get_db_manager(), is_active=lambda: get_sync_leader().is_leader)
+    geocode_worker.start()
+    return geocode_worker
+
+def _parse_timestamp(value):
+    """Parse an EmailBison ISO timestamp into an aware datetime (UTC if no offset)"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+def _newest_timestamp(records, field, current=None):
+    """Return the raw value of the newest ``field`` timestamp among records and ``current``"""
+    newest, newest_parsed = current, _parse_timestamp(current)
+    for record in records:
+        parsed = _parse_timestamp(record.get(field))
+        if parsed and (newest_parsed is None or parsed > newest_parsed):
+            newest, newest_parsed = record.get(field), parsed
+    return newest
+
 class DataSyncManager:
-    """Manages background data synchronization from EmailBison API"""
+    """
+    Manages background data synchronization from EmailBison API. Creating one does not
+    start syncing: the worker process (worker.py) calls start_background_sync(), web
+    processes only use request_refresh() unless RUN_SYNC_IN_WEB is set.
+    """
     
     def __init__(self):
         self.sync_in_progress = False
+        self.sync_lock = threading.Lock()
         self.last_sync = None
         self.sync_thread = None
-        self.start_background_sync()
+        self.refresh_event = threading.Event()
     
     def start_background_sync(self):
-        """Start the background sync thread"""
+        """Start the background sync thread (no-op if it is already running)"""
         if self.sync_thread is None or not self.sync_thread.is_alive():
             self.sync_thread = threading.Thread(target=self._background_sync_loop, daemon=True)
             self.sync_thread.start()
             print("Background sync started")
     
     def _background_sync_loop(self):
-        """Background sync loop that runs every 5 minutes"""
+        """
+        Background sync loop that runs every 5 minutes, or sooner when a refresh is requested.
+        Only the process holding the sync leader lock syncs; the others retry the lock
+        every SYNC_LEADER_RETRY_SECONDS and take over if the leader goes away.
+        """
         while True:
             try:
+                if not get_sync_leader().acquire():
+                    time.sleep(SYNC_LEADER_RETRY_SECONDS)
+                    continue
+                get_geocode_worker()
                 self.sync_data()
-                time.sleep(300)  # Wait 5 minutes
+                self._wait_for_next_sync(SYNC_INTERVAL_SECONDS)
             except Exception as e:
                 print(f"Background sync error: {e}")
                 time.sleep(60)  # Wait 1 minute on error
     
+    def _wait_for_next_sync(self, interval):
+        """Sleep until the next scheduled sync, waking early if a refresh was requested"""
+        deadline = time.monotonic() + interval
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            if self.refresh_event.wait(timeout=min(REFRESH_POLL_SECONDS, remaining)) or self._refresh_requested():
+                self.refresh_event.clear()
+                print("Refresh requested, starting sync early")
+                return
+    
+    def _refresh_requested(self):
+        """Whether a refresh hint newer than the last sync is pending in sync_status"""
+        try:
+            db_manager = get_db_manager()
+            result = db_manager.execute_query(
+                "SELECT refresh_requested_at > last_sync FROM sync_status WHERE id = 1"
+            )
+            return bool(result and result[0][0])
+        except Exception as e:
+            print(f"Error checking refresh hint: {e}")
+            return False
+    
+    def request_refresh(self):
+        """Queue a sync without waiting for it; the background loop picks it up shortly"""
+        db_manager = get_db_manager()
+        db_manager.execute_query("UPDATE sync_status SET refresh_requested_at = NOW() WHERE id = 1")
+        self.refresh_event.set()
+    
     def sync_data(self):
-        """Sync data from EmailBison API to Supabase"""
-        if self.sync_in_progress:
+        """
+        Sync data from EmailBison API to Supabase. Returns False without syncing when
+        another process is the sync leader (a refresh is queued for it instead) or a
+        sync is already running here.
+        """
+        if not get_sync_leader().acquire():
+            print("Another process is the sync leader, queueing a refresh instead")
+            self.request_refresh()
+            return False
+        
+        if not self.sync_lock.acquire(blocking=False):
             print("Sync already in progress, skipping...")
-            return
+            return False
         
         self.sync_in_progress = True
         try:
@@ -332,6 +460,9 @@ class DataSyncManager:
             print("\nSyncing campaigns...")
             self._sync_campaigns()
             
+            # Refresh the custom variable → address role mapping used to read lead addresses
+            refresh_custom_variable_roles(db_manager)
+            
             # Sync leads
             print("\nSyncing leads...")
             self._sync_leads()
@@ -340,13 +471,25 @@ class DataSyncManager:
             print("\nSyncing replies...")
             self._sync_replies()
             
+            # Roll up the days that received new or changed replies
+            print("\nUpdating reply rollup...")
+            self._update_reply_rollup()
+            
             # Background geocoding for leads without coordinates
             print("\nBackground geocoding...")
             self._background_geocoding()
             
+            # Drop expired and long-unread EmailBison responses
+            self._purge_api_response_cache()
+            
             # Update sync status
             db_manager.execute_query(
-                "UPDATE sync_status SET sync_in_progress = false, last_sync = NOW(), error_message = NULL WHERE id = 1"
+                """
+                UPDATE sync_status
+                SET sync_in_progress = false, last_sync = NOW(), error_message = NULL,
+                    data_generation = data_generation + 1
+                WHERE id = 1
+                """
             )
             
             self.last_sync = datetime.now()
@@ -364,12 +507,39 @@ class DataSyncManager:
             )
         finally:
             self.sync_in_progress = False
+            self.sync_lock.release()
+        return True
+    
+    def _get_watermarks(self, entity):
+        """Return {scope_id: (last_seen, needs_full_sync)} for an entity"""
+        db_manager = get_db_manager()
+        rows = db_manager.execute_query("""
+            SELECT scope_id, last_seen,
+                   (last_full_sync IS NULL OR last_full_sync < NOW() - make_interval(hours => %s)) AS needs_full_sync
+            FROM sync_watermarks
+            WHERE entity = %s
+        """, (SYNC_FULL_RECONCILE_HOURS, entity))
+        return {row[0]: (row[1], bool(row[2])) for row in rows}
+    
+    def _save_watermarks(self, entity, watermarks):
+        """Persist high-water marks given as (scope_id, last_seen, was_full_sync) tuples"""
+        rows = [(entity, scope_id, last_seen, bool(was_full_sync)) for scope_id, last_seen, was_full_sync in watermarks]
+        
+        db_manager = get_db_manager()
+        db_manager.bulk_upsert('''
+            INSERT INTO sync_watermarks (entity, scope_id, last_seen, last_full_sync, updated_at)
+            VALUES %s
+            ON CONFLICT (entity, scope_id) DO UPDATE SET
+                last_seen = COALESCE(EXCLUDED.last_seen, sync_watermarks.last_seen),
+                last_full_sync = COALESCE(EXCLUDED.last_full_sync, sync_watermarks.last_full_sync),
+                updated_at = NOW()
+        ''', rows, template='(%s, %s, %s, CASE WHEN %s THEN NOW() END, NOW())', key_index=1)
     
     def _sync_campaigns(self):
         """Sync campaigns from EmailBison API"""
         try:
             campaigns_url = f'{EMAILBISON_DOMAIN}/api/campaigns'
-            response = requests.get(campaigns_url, headers=EMAILBISON_HEADERS, timeout=30)
+            response = get_emailbison_client().get(campaigns_url, throttle=True)
             response.raise_for_status()
             
             campaigns_data = response.json()
@@ -377,32 +547,33 @@ class DataSyncManager:
             
             db_manager = get_db_manager()
             
-            # Insert/update campaigns using UPSERT (INSERT ... ON CONFLICT)
-            for campaign in campaigns_list:
-                db_manager.execute_query('''
-                    INSERT INTO campaigns (id, name, status, unique_replies, interested, 
-                                         total_leads_contacted, emails_sent, created_at, updated_at, last_synced)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
-                    ON CONFLICT (id) DO UPDATE SET
-                        name = EXCLUDED.name,
-                        status = EXCLUDED.status,
-                        unique_replies = EXCLUDED.unique_replies,
-                        interested = EXCLUDED.interested,
-                        total_leads_contacted = EXCLUDED.total_leads_contacted,
-                        emails_sent = EXCLUDED.emails_sent,
-                        updated_at = EXCLUDED.updated_at,
-                        last_synced = NOW()
-                ''', (
-                    campaign.get('id'),
-                    campaign.get('name', ''),
-                    campaign.get('status', ''),
-                    campaign.get('unique_replies', 0),
-                    campaign.get('interested', 0),
-                    campaign.get('total_leads_contacted', 0),
-                    campaign.get('emails_sent', 0),
-                    campaign.get('created_at', ''),
-                    campaign.get('updated_at', '')
-                ))
+            # Insert/update all campaigns in a single multi-row UPSERT
+            rows = [(
+                campaign.get('id'),
+                campaign.get('name', ''),
+                campaign.get('status', ''),
+                campaign.get('unique_replies', 0),
+                campaign.get('interested', 0),
+                campaign.get('total_leads_contacted', 0),
+                campaign.get('emails_sent', 0),
+                campaign.get('created_at', ''),
+                campaign.get('updated_at', '')
+            ) for campaign in campaigns_list if campaign.get('id') is not None]
+            
+            db_manager.bulk_upsert('''
+                INSERT INTO campaigns (id, name, status, unique_replies, interested, 
+                                     total_leads_contacted, emails_sent, created_at, updated_at, last_synced)
+                VALUES %s
+                ON CONFLICT (id) DO UPDATE SET
+                    name = EXCLUDED.name,
+                    status = EXCLUDED.status,
+                    unique_replies = EXCLUDED.unique_replies,
+                    interested = EXCLUDED.interested,
+                    total_leads_contacted = EXCLUDED.total_leads_contacted,
+                    emails_sent = EXCLUDED.emails_sent,
+                    updated_at = EXCLUDED.updated_at,
+                    last_synced = NOW()
+            ''', rows, template='(%s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())')
             
             print(f"   Synced {len(campaigns_list)} campaigns")
             
@@ -423,60 +594,83 @@ class DataSyncManager:
             """)
             
             # Fetch specific missing leads first
+            missing_leads = []
             for lead_id_row in missing_lead_ids:
                 lead_id = lead_id_row[0]
                 try:
                     lead_url = f'{EMAILBISON_DOMAIN}/api/leads/{lead_id}'
-                    response = requests.get(lead_url, headers=EMAILBISON_HEADERS, timeout=30)
+                    response = get_emailbison_client().get(lead_url, throttle=True)
                     response.raise_for_status()
                     
                     lead_data = response.json()
                     lead = lead_data.get('data')
                     if lead:
-                        self._insert_or_update_lead(lead)
+                        missing_leads.append(lead)
                         print(f"   Fetched missing lead {lead_id}")
                 except Exception as e:
                     print(f"   Error fetching lead {lead_id}: {e}")
                     continue
             
-            # Fetch leads with pagination
-            all_leads = []
+            self._upsert_leads(missing_leads)
+            
+            # Only fetch leads updated since the last seen updated_at, unless a full reconcile is due
+            last_seen, full_sync = self._get_watermarks('leads').get(0, (None, True))
+            watermark = None if full_sync else _parse_timestamp(last_seen)
+            newest_seen = last_seen
+            
+            params = {'per_page': 100}
+            if watermark:
+                params['updated_at_from'] = watermark.date().isoformat()
+                print(f"   Incremental lead sync from {params['updated_at_from']}")
+            else:
+                print("   Full lead reconcile")
+            
+            # Fetch leads with pagination, upserting one page per transaction
+            total_leads = 0
             page = 1
-            max_pages = 50
+            complete = False
+            started = time.time()
             
-            while page <= max_pages:
-                leads_url = f'{EMAILBISON_DOMAIN}/api/leads?page={page}&per_page=100'
-                response = requests.get(leads_url, headers=EMAILBISON_HEADERS, timeout=30)
+            while page <= SYNC_MAX_PAGES:
+                params['page'] = page
+                leads_url = f'{EMAILBISON_DOMAIN}/api/leads'
+                response = get_emailbison_client().get(leads_url, params=params, throttle=True)
                 response.raise_for_status()
                 
                 leads_data = response.json()
                 leads_list = leads_data.get('data', [])
                 
                 if not leads_list:
+                    complete = True
                     break
                 
-                all_leads.extend(leads_list)
+                total_leads += self._upsert_leads(leads_list)
+                
+                newest_seen = _newest_timestamp(leads_list, 'updated_at', newest_seen)
                 
                 # Check pagination
                 meta = leads_data.get('meta', {})
                 if meta.get('current_page', page) >= meta.get('last_page', page):
+                    complete = True
                     break
                 page += 1
             
-            # Insert/update leads
-            for lead in all_leads:
-                self._insert_or_update_lead(lead)
+            if complete:
+                self._save_watermarks('leads', [(0, newest_seen, watermark is None)])
+            else:
+                # Leads past the cap were never read; advancing the watermark would skip them for good
+                print(f"   Stopped at SYNC_MAX_PAGES={SYNC_MAX_PAGES}, keeping the lead watermark")
             
-            print(f"   Synced {len(all_leads)} leads")
+            elapsed = time.time() - started
+            rate = total_leads / elapsed if elapsed > 0 else 0
+            print(f"   Synced {total_leads} leads in {elapsed:.1f}s ({rate:.0f} rows/sec)")
             
         except Exception as e:
             print(f"   Error syncing leads: {e}")
             raise
     
-    def _insert_or_update_lead(self, lead):
-        """Helper method to insert or update a single lead"""
-        db_manager = get_db_manager()
-        
+    def _build_lead_row(self, lead):
+        """Build the leads table row for a single EmailBison lead"""
         # Check if lead is interested (from any campaign)
         is_interested = False
         for campaign_data in lead.get('lead_campaign_data', []):
@@ -500,10 +694,32 @@ class DataSyncManager:
             if not zip_code:
                 zip_code = lead.get('zip_code', '') or lead.get('postal_code', '') or ''
         
-        db_manager.execute_query('''
+        return (
+            lead.get('id'),
+            lead.get('email', ''),
+            lead.get('first_name', ''),
+            lead.get('last_name', ''),
+            lead.get('title', ''),
+            lead.get('company', ''),
+            lead.get('phone', ''),
+            state,
+            address,
+            city,
+            zip_code,
+            is_interested,
+            lead.get('created_at', ''),
+            lead.get('updated_at', '')
+        )
+    
+    def _upsert_leads(self, leads):
+        """Insert or update a batch of leads and their per-campaign rows"""
+        rows = [self._build_lead_row(lead) for lead in leads if lead.get('id') is not None]
+        
+        db_manager = get_db_manager()
+        upserted = db_manager.bulk_upsert('''
             INSERT INTO leads (id, email, first_name, last_name, title, company, phone, 
                              state, address, city, zip_code, interested, created_at, updated_at, last_synced)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
+            VALUES %s
             ON CONFLICT (id) DO UPDATE SET
                 email = EXCLUDED.email,
                 first_name = EXCLUDED.first_name,
@@ -518,108 +734,304 @@ class DataSyncManager:
                 interested = EXCLUDED.interested,
                 updated_at = EXCLUDED.updated_at,
                 last_synced = NOW()
-        ''', (
-            lead.get('id'),
-            lead.get('email', ''),
-            lead.get('first_name', ''),
-            lead.get('last_name', ''),
-            lead.get('title', ''),
-            lead.get('company', ''),
-            lead.get('phone', ''),
-            state,
-            address,
-            city,
-            zip_code,
-            is_interested,
-            lead.get('created_at', ''),
-            lead.get('updated_at', '')
-        ))
+        ''', rows, template='(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())')
+        db_manager.replace_lead_campaigns(leads)
+        return upserted
     
     def _sync_replies(self):
-        """Sync replies from all campaigns"""
+        """Sync replies from all campaigns.
+
+        Campaigns are fetched in parallel by a bounded pool of workers that push
+        pages onto a queue; this thread is the single writer and flushes them to
+        the database in batches.
+        """
         try:
             # Get all campaign IDs
             db_manager = get_db_manager()
             campaigns = db_manager.execute_query("SELECT id FROM campaigns")
             campaign_ids = [row[0] for row in campaigns]
             
+            watermarks = self._get_watermarks('replies')
+            new_watermarks = []
+            failed_campaigns = set()
+            
             total_replies = 0
+            started = time.time()
+            
+            pages = queue.Queue()
+            pending_rows = []
+            pending_campaigns = set()
+            touched_dates = set()
             
-            for campaign_id in campaign_ids:
+            def flush():
+                nonlocal total_replies
+                if not pending_rows:
+                    return
                 try:
-                    # Fetch replies with pagination
-                    page = 1
-                    max_pages = 10
-                    
-                    while page <= max_pages:
-                        replies_url = f'{EMAILBISON_DOMAIN}/api/campaigns/{campaign_id}/replies?page={page}&per_page=100'
-                        response = requests.get(replies_url, headers=EMAILBISON_HEADERS, timeout=30)
-                        response.raise_for_status()
-                        
-                        replies_data = response.json()
-                        replies_list = replies_data.get('data', [])
-                        
-                        if not replies_list:
-                            break
-                        
-                        # Insert/update replies
-                        for reply in replies_list:
-                            lead_id = reply.get('lead_id')
-                            reply_uuid = reply.get('uuid', '') or reply.get('reply_uuid', '')
-                            
-                            if not reply_uuid or str(reply_uuid).strip() == '':
-                                continue
-                            
-                            content = reply.get('text_body', '') or reply.get('html_body', '') or reply.get('content', '')
-                            subject = reply.get('subject', '') or reply.get('title', '')
-                            
-                            db_manager.execute_query('''
-                                INSERT INTO replies (reply_uuid, lead_id, campaign_id, date_received, 
-                                                   interested, automated_reply, subject, content, sender_email)
-                                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                                ON CONFLICT (reply_uuid) DO UPDATE SET
-                                    interested = EXCLUDED.interested,
-                                    automated_reply = EXCLUDED.automated_reply,
-                                    subject = EXCLUDED.subject,
-                                    content = EXCLUDED.content,
-                                    sender_email = EXCLUDED.sender_email
-                            ''', (
-                                reply_uuid,
-                                lead_id,
-                                campaign_id,
-                                reply.get('date_received', ''),
-                                reply.get('interested', False),
-                                reply.get('automated_reply', False),
-                                subject,
-                                content,
-                                reply.get('sender_email', '')
-                            ))
-                            total_replies += 1
-                        
-                        # Check pagination
-                        meta = replies_data.get('meta', {})
-                        if meta.get('current_page', page) >= meta.get('last_page', page):
-                            break
-                        page += 1
-                
+                    total_replies += self._write_replies(pending_rows)
+                    touched_dates.update(row[9].astimezone(timezone.utc).date().isoformat()
+                                         for row in pending_rows if row[9])
                 except Exception as e:
-                    print(f"   Error syncing replies for campaign {campaign_id}: {e}")
-                    continue
+                    print(f"   Error writing replies for campaigns {sorted(pending_campaigns)}: {e}")
+                    failed_campaigns.update(pending_campaigns)
+                pending_rows.clear()
+                pending_campaigns.clear()
+            
+            with ThreadPoolExecutor(max_workers=SYNC_REPLY_WORKERS, thread_name_prefix='reply-sync') as executor:
+                for campaign_id in campaign_ids:
+                    executor.submit(self._fetch_campaign_replies, campaign_id,
+                                    watermarks.get(campaign_id, (None, True)), pages)
+                
+                remaining = len(campaign_ids)
+                while remaining:
+                    kind, campaign_id, payload = pages.get()
+                    
+                    if kind == 'page':
+                        pending_rows.extend(self._build_reply_rows(campaign_id, payload))
+                        pending_campaigns.add(campaign_id)
+                        if len(pending_rows) >= REPLY_WRITE_BATCH_SIZE:
+                            flush()
+                    elif kind == 'done':
+                        new_watermarks.append((campaign_id,) + payload)
+                        remaining -= 1
+                    else:
+                        print(f"   Error syncing replies for campaign {campaign_id}: {payload}")
+                        failed_campaigns.add(campaign_id)
+                        remaining -= 1
+            
+            flush()
+            
+            # Record the changed days before the watermarks move past their replies; the
+            # rollup clears them once recomputed, so a failed rollup is retried next sync
+            self._queue_rollup_dates(touched_dates)
+            
+            # Only advance watermarks for campaigns whose replies were all written
+            self._save_watermarks('replies', [w for w in new_watermarks if w[0] not in failed_campaigns])
             
-            print(f"   Synced {total_replies} replies")
+            elapsed = time.time() - started
+            rate = total_replies / elapsed if elapsed > 0 else 0
+            print(f"   Synced {total_replies} replies from {len(campaign_ids)} campaigns "
+                  f"in {elapsed:.1f}s ({rate:.0f} rows/sec, {SYNC_REPLY_WORKERS} workers)")
             
         except Exception as e:
             print(f"   Error syncing replies: {e}")
             raise
     
+    def _fetch_campaign_replies(self, campaign_id, watermark_info, pages):
+        """Fetch one campaign's reply pages onto the ``pages`` queue (runs in a worker thread)"""
+        try:
+            # Walk pages until nothing newer than the campaign's last seen reply turns up. That
+            # early stop is only safe when replies come newest-first, which the API does not
+            # promise, so it is checked on every page: any reply newer than the one before it
+            # disables the early stop and the campaign is walked to its last page.
+            last_seen, full_sync = watermark_info
+            watermark = None if full_sync else _parse_timestamp(last_seen)
+            newest_seen = last_seen
+            previous_received = None
+            newest_first = None  # None until two dated replies have been compared
+            complete = False
+            
+            # Fetch replies with pagination
+            page = 1
+            
+            while page <= SYNC_MAX_PAGES:
+                replies_url = f'{EMAILBISON_DOMAIN}/api/campaigns/{campaign_id}/replies?page={page}&per_page=100'
+                response = get_emailbison_client().get(replies_url, throttle=True)
+                response.raise_for_status()
+                
+                replies_data = response.json()
+                replies_list = replies_data.get('data', [])
+                
+                if not replies_list:
+                    complete = True
+                    break
+                
+                has_newer = False
+                fresh_replies = []
+                for reply in replies_list:
+                    received = _parse_timestamp(reply.get('date_received'))
+                    if received is not None:
+                        if previous_received is not None:
+                            if received > previous_received:
+                                if newest_first is not False:
+                                    print(f"   Campaign {campaign_id}: replies are not newest-first, walking every page")
+                                newest_first = False
+                            elif newest_first is None:
+                                newest_first = True
+                        previous_received = received
+                    if watermark:
+                        if received is None or received >= watermark:
+                            fresh_replies.append(reply)
+                        if received is None or received > watermark:
+                            has_newer = True
+                if watermark:
+                    replies_list = fresh_replies
+                
+                newest_seen = _newest_timestamp(replies_list, 'date_received', newest_seen)
+                
+                if replies_list:
+                    pages.put(('page', campaign_id, replies_list))
+                
+                if watermark and newest_first and not has_newer:
+                    complete = True
+                    break
+                
+                # Check pagination
+                meta = replies_data.get('meta', {})
+                if meta.get('current_page', page) >= meta.get('last_page', page):
+                    complete = True
+                    break
+                page += 1
+            
+            if complete:
+                pages.put(('done', campaign_id, (newest_seen, watermark is None)))
+            else:
+                # Replies past the cap were never read; advancing the watermark would skip them for good
+                print(f"   Campaign {campaign_id}: stopped at SYNC_MAX_PAGES={SYNC_MAX_PAGES}, keeping its watermark")
+                pages.put(('done', campaign_id, (last_seen, False)))
+        
+        except Exception as e:
+            pages.put(('error', campaign_id, e))
+    
+    def _build_reply_rows(self, campaign_id, replies_list):
+        """Build replies table rows for a page of one campaign's replies"""
+        rows = []
+        for reply in replies_list:
+            lead_id = reply.get('lead_id')
+            reply_uuid = reply.get('uuid', '') or reply.get('reply_uuid', '')
+            
+            if not reply_uuid or str(reply_uuid).strip() == '':
+                continue
+            
+            content = reply.get('text_body', '') or reply.get('html_body', '') or reply.get('content', '')
+            subject = reply.get('subject', '') or reply.get('title', '')
+            
+            rows.append((
+                reply_uuid,
+                lead_id,
+                campaign_id,
+                reply.get('date_received', ''),
+                reply.get('interested', False),
+                reply.get('automated_reply', False),
+                subject,
+                content,
+                reply.get('sender_email', ''),
+                _parse_timestamp(reply.get('date_received'))
+            ))
+        return rows
+    
+    def _write_replies(self, rows):
+        """Insert or update a batch of reply rows in a single transaction"""
+        db_manager = get_db_manager()
+        return db_manager.bulk_upsert('''
+            INSERT INTO replies (reply_uuid, lead_id, campaign_id, date_received, 
+                               interested, automated_reply, subject, content, sender_email, received_at)
+            VALUES %s
+            ON CONFLICT (reply_uuid) DO UPDATE SET
+                interested = EXCLUDED.interested,
+                automated_reply = EXCLUDED.automated_reply,
+                subject = EXCLUDED.subject,
+                content = EXCLUDED.content,
+                sender_email = EXCLUDED.sender_email,
+                received_at = COALESCE(replies.received_at, EXCLUDED.received_at)
+        ''', rows)
+    
+    def _queue_rollup_dates(self, touched_dates):
+        """Add YYYY-MM-DD (UTC) reply dates to reply_rollup_pending"""
+        if not touched_dates:
+            return
+        db_manager = get_db_manager()
+        db_manager.execute_query("""
+            INSERT INTO reply_rollup_pending (stat_date)
+            SELECT unnest(%s::date[])
+            ON CONFLICT (stat_date) DO NOTHING
+        """, (sorted(touched_dates),))
+    
+    def _update_reply_rollup(self):
+        """Recompute reply_daily_rollup rows for the days queued in reply_rollup_pending.
+
+        The whole table is rebuilt instead when it is still empty (first run after
+        the rollup was introduced). Errors propagate so the sync is marked as failed;
+        the queued days stay pending and are retried by the next sync.
+        """
+        db_manager = get_db_manager()
+        is_empty = db_manager.execute_query("SELECT NOT EXISTS (SELECT 1 FROM reply_daily_rollup)")[0][0]
+        pending_dates = [row[0] for row in db_manager.execute_query(
+            "SELECT stat_date FROM reply_rollup_pending ORDER BY stat_date"
+        )]
+        
+        if is_empty:
+            delete_filter = "TRUE"
+            date_filter = "TRUE"
+            print("   Rollup is empty, rebuilding from all replies")
+        elif pending_dates:
+            delete_filter = "stat_date = ANY(%(dates)s::date[])"
+            date_filter = "received_date = ANY(%(dates)s::date[])"
+        else:
+            print("   No reply days changed")
+            return
+        
+        # One transaction: the pending days are only cleared if their rollup rows were rewritten
+        db_manager.execute_query(f"""
+            DELETE FROM reply_daily_rollup
+            WHERE {delete_filter};
+            
+            INSERT INTO reply_daily_rollup (stat_date, campaign_id, unique_leads, interested_leads,
+                                            reply_count, interested_count, lead_ids, interested_lead_ids, updated_at)
+            SELECT received_date AS stat_date,
+                   CASE WHEN GROUPING(campaign_id) = 1 THEN 0 ELSE campaign_id END,
+                   COUNT(DISTINCT lead_id),
+                   COUNT(DISTINCT CASE WHEN interested = true THEN lead_id END),
+                   COUNT(*),
+                   COUNT(*) FILTER (WHERE interested = true),
+                   COALESCE(array_agg(DISTINCT lead_id) FILTER (WHERE lead_id IS NOT NULL), '{{}}'),
+                   COALESCE(array_agg(DISTINCT lead_id) FILTER (WHERE lead_id IS NOT NULL AND interested = true), '{{}}'),
+                   NOW()
+            FROM replies
+            WHERE automated_reply = false
+            AND campaign_id IS NOT NULL
+            AND received_date IS NOT NULL
+            AND {date_filter}
+            GROUP BY GROUPING SETS ((received_date, campaign_id), (received_date));
+            
+            DELETE FROM reply_rollup_pending
+            WHERE stat_date = ANY(%(dates)s::date[]);
+        """, {'dates': pending_dates})
+        
+        print(f"   Rolled up {'all' if is_empty else len(pending_dates)} reply days")
+    
+    def _purge_api_response_cache(self):
+        """
+        Delete api_response_cache rows that have expired, and rows without an expiry (closed
+        ranges) not read for API_CACHE_RETENTION_DAYS. Custom dashboard ranges add a row per
+        range, so without this the table only grows. Errors are logged, not raised.
+        """
+        try:
+            rows = get_db_manager().execute_query("""
+                WITH purged AS (
+                    DELETE FROM api_response_cache
+                    WHERE expires_at < NOW()
+                    OR (expires_at IS NULL AND COALESCE(last_read_at, fetched_at) < NOW() - make_interval(days => %s))
+                    RETURNING 1
+                )
+                SELECT COUNT(*) FROM purged
+            """, (API_CACHE_RETENTION_DAYS,))
+            if rows and rows[0][0]:
+                print(f"Purged {rows[0][0]} cached API responses")
+        except Exception as e:
+            print(f"Error purging API response cache: {e}")
+    
     def _background_geocoding(self):
-        """Background geocoding for leads that don't have coordinates yet"""
+        """Place leads from the offline gazetteer and queue the rest for the geocoding worker"""
         try:
             db_manager = get_db_manager()
             
-            # Get leads that need geocoding (have address info but no coordinates)
+            # ZIP/city centroids from the bundled gazetteer cover most leads without network
+            locate_leads_offline(db_manager)
+            
+            # Get leads the gazetteer could not place (have address info but no coordinates)
             leads_to_geocode = db_manager.execute_query("""
-                SELECT id, address, city, state, zip_code
+                SELECT id, address, city, state, zip_code, interested
                 FROM leads
                 WHERE (latitude IS NULL OR longitude IS NULL)
                 AND (
@@ -628,99 +1040,23 @@ class DataSyncManager:
                     (state IS NOT NULL AND state != '') OR
                     (zip_code IS NOT NULL AND zip_code != '')
                 )
-                LIMIT 50
             """)
             
             if not leads_to_geocode:
                 print("   No leads need geocoding")
                 return
             
-            print(f"   Geocoding {len(leads_to_geocode)} leads...")
-            
-            for lead_row in leads_to_geocode:
-                lead_id, address, city, state, zip_code = lead_row
-                
-                # Build address string
-                address_parts = []
-                if address and str(address).strip():
-                    address_parts.append(str(address).strip())
-                if city and str(city).strip():
-                    address_parts.append(str(city).strip())
-                if state and str(state).strip():
-                    address_parts.append(str(state).strip())
-                if zip_code and str(zip_code).strip():
-                    address_parts.append(str(zip_code).strip())
-                
-                full_address = ', '.join(address_parts)
-                
-                if not full_address:
-                    continue
-                
-                # Geocode the address
-                geocoded = self._geocode_address(full_address)
-                
-                if geocoded:
-                    # Update the lead with coordinates
-                    db_manager.execute_query("""
-                        UPDATE leads 
-                        SET latitude = %s, longitude = %s, geocoded_address = %s, geocoded_at = NOW()
-                        WHERE id = %s
-                    """, (
-                        geocoded['lat'],
-                        geocoded['lng'],
-                        geocoded['display_name'],
-                        lead_id
-                    ))
-                    print(f"   Geocoded lead {lead_id}: {full_address}")
-                else:
-                    print(f"   Failed to geocode lead {lead_id}: {full_address}")
-                
-                # Small delay to be respectful to the geocoding service
-                time.sleep(0.5)
-            
-            print(f"   Background geocoding completed")
+            # The geocoding worker does the lookups; the sync only queues them
+            counts = enqueue_geocode_jobs(db_manager, [
+                (lead_id, build_lead_address(address, city, state, zip_code)[0], bool(interested))
+                for lead_id, address, city, state, zip_code, interested in leads_to_geocode
+            ])
+            print(f"   {counts['queued']} leads queued for geocoding, {counts['from_cache']} from cache, "
+                  f"{counts['skipped']} awaiting retry")
             
         except Exception as e:
             print(f"   Error in background geocoding: {e}")
     
-    def _geocode_address(self, address_string):
-        """Geocode an address string to lat/lng coordinates using Nominatim (OpenStreetMap)"""
-        try:
-            if not address_string or not str(address_string).strip():
-                return None
-            
-            # Use Nominatim geocoding service
-            url = "https://nominatim.openstreetmap.org/search"
-            headers = {
-                'User-Agent': 'LongRun Reports App/1.0 (contact@longrun.agency)'
-            }
-            params = {
-                'q': str(address_string).strip(),
-                'format': 'json',
-                'limit': 1,
-                'countrycodes': 'us',  # Limit to US addresses
-                'addressdetails': 1
-            }
-            
-            response = requests.get(url, params=params, headers=headers, timeout=5)
-            response.raise_for_status()
-            data = response.json()
-            
-            if data and len(data) > 0:
-                result = data[0]
-                return {
-                    'lat': float(result['lat']),
-                    'lng': float(result['lon']),
-                    'display_name': result.get('display_name', ''),
-                    'confidence': result.get('importance', 0)
-                }
-            
-            return None
-            
-        except Exception as e:
-            print(f"Error geocoding address '{address_string}': {e}")
-            return None
-
 # Initialize on import
 if __name__ == '__main__':
     # Test connection
@@ -0,0 +1,67 @@
+import threading
+import time
+from collections import OrderedDict
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire ``ttl`` seconds after they are stored.
+
+    ``get_or_compute`` is single-flight: concurrent callers asking for the same missing
+    key wait for one computation instead of each running it.
+    """
+
+    def __init__(self, maxsize=64, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.key_locks = {}
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                return default
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get_or_compute(self, key, compute, cache_if=None):
+        """Return the cached value for ``key``, calling ``compute()`` at most once per miss.
+
+        ``cache_if(value)`` returning False hands the value back without storing it.
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+
+        with self.lock:
+            key_lock = self.key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Another thread may have filled the entry while we waited
+            value = self.get(key, missing)
+            if value is not missing:
+                return value
+            try:
+                value = compute()
+                if cache_if is None or cache_if(value):
+                    self.set(key, value)
+                return value
+            finally:
+                with self.lock:
+                    self.key_locks.pop(key, None)
@@ -0,0 +1,37 @@
+import signal
+import threading
+
+from supabase_manager_postgres_backup import get_db_manager, get_sync_leader, get_sync_manager
+
+# How often the main thread checks that the sync thread is still alive
+WORKER_WATCHDOG_SECONDS = 60
+
+def main():
+    """
+    Sync worker process (Procfile `worker`): runs the EmailBison sync scheduler, which also
+    maintains the reply rollup and custom variable roles, and the geocoding queue. Web
+    processes only read the database and leave refresh hints that this process picks up.
+    """
+    stop = threading.Event()
+
+    def handle_signal(signum, frame):
+        print(f"Received signal {signum}, stopping sync worker...")
+        stop.set()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    print("Starting sync worker...")
+    get_db_manager()  # Connect and apply pending migrations before the first sync
+    sync_manager = get_sync_manager()
+    sync_manager.start_background_sync()
+
+    while not stop.wait(timeout=WORKER_WATCHDOG_SECONDS):
+        sync_manager.start_background_sync()
+
+    # Hand leadership over now rather than when Postgres notices the closed connection
+    get_sync_leader().release()
+    print("Sync worker stopped")
+
+if __name__ == '__main__':
+    main()